@@ -0,0 +1,178 @@
+import numpy as np
+
+from voting_mechanism_design.projects.project import Project, ProjectPopulation
+from voting_mechanism_design.projects.pair_view import AllPairsView
+from voting_mechanism_design.agents.quorum_badgeholder import QuorumBadgeholder, QuorumBadgeholderPopulation
+from voting_mechanism_design.agents.pairwise_badgeholder import PairwiseBadgeholder, PairwiseBadgeholderPopulation
+from voting_mechanism_design.funds_distribution.threshold_and_aggregate import ThresholdAndAggregate
+from voting_mechanism_design.funds_distribution.pairwise_binary import PairwiseBinary
+from voting_mechanism_design.legacy.op_simulator import Simulation
+from voting_mechanism_design.legacy.ledger_adapter import LedgerSimulation
+
+# The benchmarks run by run.py.  Each one has a grid of parameters, a setup(**params) which
+# builds the state to benchmark (not timed), and a run(state) which is timed.  setup is
+# called again before every repeat, so run may change the state it is given.
+#
+# The full grids go up to 1k voters x 10k projects for quorum voting; pairwise voting with
+# the full view of all C(n, 2) pairs is benchmarked up to 200 projects (~20k pairs per
+# voter), since every voter votes on every pair.
+
+SEED = 1234
+
+def _projects(num_projects, rng):
+    projects = ProjectPopulation()
+    projects.add_projects([Project(ix, rng.uniform()) for ix in range(num_projects)])
+    return projects
+
+class Benchmark:
+    def __init__(self, name, setup, run, grid, quick_grid, skip=None):
+        self.name = name
+        self.setup = setup
+        self.run = run
+        self.grid = grid
+        self.quick_grid = quick_grid
+        # skip(**params) -> True for the combinations of the grid which are not run
+        self.skip = skip
+
+    def params(self, quick=False):
+        grid = self.quick_grid if quick else self.grid
+        names = list(grid)
+        combinations = [{}]
+        for name in names:
+            combinations = [dict(params, **{name: value}) for params in combinations for value in grid[name]]
+        return [params for params in combinations if self.skip is None or not self.skip(**params)]
+
+def setup_quorum(num_voters, num_projects, vectorized):
+    rng = np.random.default_rng(SEED)
+    projects = _projects(num_projects, rng)
+    population = QuorumBadgeholderPopulation()
+    population.add_badgeholders([
+        QuorumBadgeholder(bb, laziness=0.5, expertise=0.7) for bb in range(num_voters)
+    ])
+    population.send_application_information(projects)
+    population.set_random_generator(rng)
+    return population, vectorized
+
+def run_quorum(state):
+    population, vectorized = state
+    population.cast_votes(vectorized=vectorized)
+
+def setup_pairwise(num_voters, num_projects, vectorized):
+    rng = np.random.default_rng(SEED)
+    projects = _projects(num_projects, rng)
+    population = PairwiseBadgeholderPopulation()
+    population.add_badgeholders([
+        PairwiseBadgeholder(bb, voting_style='skewed_towards_impact', expertise=0.7, laziness=0.3) for bb in range(num_voters)
+    ])
+    population.send_application_information(projects)
+    population.set_random_generator(rng)
+    return population, AllPairsView(num_projects), vectorized
+
+def run_pairwise(state):
+    population, view, vectorized = state
+    population.cast_votes(view, vectorized=vectorized)
+
+def setup_allocate_funds(num_voters, num_projects, scoring_method):
+    population, _ = setup_quorum(num_voters, num_projects, vectorized=True)
+    population.cast_votes(vectorized=True)
+    projects = population.badgeholders[0].project_population
+    return ThresholdAndAggregate(scoring_method, quorum=17, min_amount=1), projects.get_projects()
+
+def run_allocate_funds(state):
+    funding_design, projects = state
+    funding_design.allocate_funds(projects)
+
+SCORING_GRID = {
+    'scoring_method': ['median', 'mean', 'quadratic', 'outliers', 'sum'],
+    'quorum': [0, 1, 5, 17, 40],
+    'min_amount': [0, 1, 3.5],
+}
+
+def setup_score_many(num_voters, num_projects):
+    _, projects = setup_allocate_funds(num_voters, num_projects, 'median')
+    return ThresholdAndAggregate.from_grid(SCORING_GRID), projects
+
+def run_score_many(state):
+    designs, projects = state
+    ThresholdAndAggregate.score_many(designs, projects)
+
+def setup_pairwise_scoring(num_voters, num_projects):
+    population, view, _ = setup_pairwise(num_voters, num_projects, vectorized=True)
+    population.cast_votes(view, vectorized=True)
+    projects = population.badgeholders[0].project_population
+    return PairwiseBinary(max_funding=1000), projects.get_projects()
+
+def run_pairwise_scoring(state):
+    funding_design, projects = state
+    funding_design.allocate_funds(projects)
+
+def setup_build_population(num_voters, factory):
+    return num_voters, factory
+
+def run_build_population(state):
+    num_voters, factory = state
+    if factory:
+        QuorumBadgeholderPopulation.from_traits(num_voters, expertise='medium', laziness='low', rng=SEED)
+        ProjectPopulation.from_impact(num_voters, impact='medium', rng=SEED)
+        return
+    # one badgeholder / project at a time, as the notebooks do
+    rng = np.random.default_rng(SEED)
+    population = QuorumBadgeholderPopulation()
+    population.add_badgeholders([
+        QuorumBadgeholder(ix, expertise=rng.beta(3, 3), laziness=rng.beta(1, 3)) for ix in range(num_voters)
+    ])
+    projects = ProjectPopulation()
+    projects.add_projects([Project(ix, rng.beta(2, 2)) for ix in range(num_voters)])
+
+def setup_legacy(num_voters, num_projects, simulator):
+    np.random.seed(SEED)
+    simulation = {'legacy': Simulation, 'ledger': LedgerSimulation}[simulator]()
+    simulation.initialize_round(30_000_000)
+    simulation.randomize_voters(num_voters, willingness_to_spend=1, laziness_factor=0.6, expertise_factor=0.7)
+    simulation.randomize_projects(num_projects, coi_factor=0.1)
+    return simulation
+
+def run_legacy(simulation):
+    simulation.simulate_voting_and_scoring(n=1, scoring_method='median', quorum=17, min_amount=1500)
+
+BENCHMARKS = [
+    Benchmark(
+        'quorum_cast_votes', setup_quorum, run_quorum,
+        grid={'num_voters': [100, 1000], 'num_projects': [1000, 10000], 'vectorized': [False, True]},
+        quick_grid={'num_voters': [50], 'num_projects': [500], 'vectorized': [False, True]},
+    ),
+    Benchmark(
+        'pairwise_cast_votes', setup_pairwise, run_pairwise,
+        grid={'num_voters': [100, 1000], 'num_projects': [50, 200], 'vectorized': [False, True]},
+        quick_grid={'num_voters': [25], 'num_projects': [50], 'vectorized': [False, True]},
+    ),
+    Benchmark(
+        'allocate_funds', setup_allocate_funds, run_allocate_funds,
+        grid={'num_voters': [100, 1000], 'num_projects': [1000, 10000], 'scoring_method': ['median', 'mean', 'quadratic', 'outliers', 'sum']},
+        quick_grid={'num_voters': [50], 'num_projects': [500], 'scoring_method': ['median', 'mean', 'quadratic', 'outliers', 'sum']},
+    ),
+    Benchmark(
+        # the 75 designs of SCORING_GRID on one set of votes
+        'score_many', setup_score_many, run_score_many,
+        grid={'num_voters': [100, 1000], 'num_projects': [1000, 10000]},
+        quick_grid={'num_voters': [50], 'num_projects': [500]},
+    ),
+    Benchmark(
+        'pairwise_scoring', setup_pairwise_scoring, run_pairwise_scoring,
+        grid={'num_voters': [100, 1000], 'num_projects': [50, 200]},
+        quick_grid={'num_voters': [25], 'num_projects': [50]},
+    ),
+    Benchmark(
+        # num_voters badgeholders and as many projects
+        'build_population', setup_build_population, run_build_population,
+        grid={'num_voters': [1000, 100000], 'factory': [False, True]},
+        quick_grid={'num_voters': [1000], 'factory': [False, True]},
+    ),
+    Benchmark(
+        'legacy_round', setup_legacy, run_legacy,
+        grid={'num_voters': [150, 1000], 'num_projects': [600, 10000], 'simulator': ['legacy', 'ledger']},
+        quick_grid={'num_voters': [50], 'num_projects': [100], 'simulator': ['legacy', 'ledger']},
+        # the legacy loop takes minutes per round beyond the size of op_simulator.test()
+        skip=lambda num_voters, num_projects, simulator: simulator == 'legacy' and num_voters * num_projects > 150 * 600,
+    ),
+]
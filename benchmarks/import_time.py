@@ -0,0 +1,91 @@
+"""
+Checks that importing the core of the package is cheap, so that the worker processes of a
+sweep start quickly.
+
+    python benchmarks/import_time.py                  # check against the default budget
+    python benchmarks/import_time.py --budget-ms 10
+
+Every repeat imports the core modules in a fresh interpreter, after NumPy, and times the
+imports.  The check fails if the best time is over the budget, or if any of the optional
+plotting / science packages used by the notebooks gets imported along the way: the core
+only needs NumPy.
+
+The bytecode cache is warmed up first (also when PYTHONDONTWRITEBYTECODE is set), since
+compiling the sources would otherwise dominate the timings.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CORE_MODULES = [
+    'voting_mechanism_design.sim',
+    'voting_mechanism_design.sweep',
+    'voting_mechanism_design.monte_carlo',
+    'voting_mechanism_design.results_store',
+    'voting_mechanism_design.metrics',
+    'voting_mechanism_design.populations',
+    'voting_mechanism_design.agents.quorum_badgeholder',
+    'voting_mechanism_design.agents.pairwise_badgeholder',
+    'voting_mechanism_design.agents.communication',
+    'voting_mechanism_design.projects.project',
+    'voting_mechanism_design.projects.pair_view',
+    'voting_mechanism_design.funds_distribution.threshold_and_aggregate',
+    'voting_mechanism_design.funds_distribution.op_quorum',
+    'voting_mechanism_design.funds_distribution.pairwise_binary',
+]
+
+# only the notebooks and the plotting code need these
+OPTIONAL_PACKAGES = ['matplotlib', 'seaborn', 'scipy', 'pandas', 'choix', 'tqdm', 'joblib', 'networkx']
+
+CHILD = '''
+import json, sys, time
+start = time.perf_counter()
+import numpy
+numpy_time = time.perf_counter() - start
+start = time.perf_counter()
+{imports}
+core_time = time.perf_counter() - start
+optional = [name for name in {optional!r} if name in sys.modules]
+print(json.dumps({{'numpy': numpy_time, 'core': core_time, 'optional': optional}}))
+'''
+
+def measure(modules, repeat):
+    code = CHILD.format(imports='\n'.join(f'import {module}' for module in modules), optional=OPTIONAL_PACKAGES)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.environ.get('PYTHONPATH', '')]))
+    warm_env = {key: value for key, value in env.items() if key != 'PYTHONDONTWRITEBYTECODE'}
+    subprocess.run([sys.executable, '-c', code], env=warm_env, check=True, capture_output=True)
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, '-c', code], env=env, check=True, capture_output=True, text=True).stdout
+        runs.append(json.loads(out))
+    return runs
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--budget-ms', type=float, default=15.0, help='budget for importing the core after NumPy')
+    parser.add_argument('--repeat', type=int, default=7)
+    args = parser.parse_args(argv)
+
+    runs = measure(CORE_MODULES, args.repeat)
+    core_ms = min(run['core'] for run in runs) * 1000
+    numpy_ms = statistics.median(run['numpy'] for run in runs) * 1000
+    optional = sorted(set().union(*[run['optional'] for run in runs]))
+    print(f'numpy:          {numpy_ms:8.1f} ms (median)')
+    print(f'package core:   {core_ms:8.1f} ms (best of {args.repeat}, budget {args.budget_ms:.0f} ms)')
+
+    failed = False
+    if core_ms > args.budget_ms:
+        print(f'the core takes longer to import than the budget of {args.budget_ms:.0f} ms')
+        failed = True
+    if optional:
+        print('the core imports optional packages: ' + ', '.join(optional))
+        failed = True
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
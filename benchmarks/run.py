@@ -0,0 +1,119 @@
+"""
+Runs the benchmarks in cases.py, reporting the time and peak memory of every case and
+comparing them to a stored baseline.
+
+    python benchmarks/run.py                     # full grids, compared to baseline.json
+    python benchmarks/run.py --quick             # small grids, for a quick check
+    python benchmarks/run.py --filter quorum     # only the benchmarks whose name matches
+    python benchmarks/run.py --save-baseline     # store the results as the new baseline
+
+The time of a case is the best of --repeat runs (fewer for cases slower than a second), and
+its peak memory is measured by tracemalloc on a separate run, so that tracing does not slow
+down the timed runs.  Timings are only comparable between runs on the same machine.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from cases import BENCHMARKS
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+def case_key(name, params):
+    return name + '[' + ','.join(f'{key}={value}' for key, value in params.items()) + ']'
+
+def time_case(benchmark, params, repeat, max_time=1.0):
+    times = []
+    while len(times) < repeat:
+        state = benchmark.setup(**params)
+        gc.collect()
+        start = time.perf_counter()
+        benchmark.run(state)
+        times.append(time.perf_counter() - start)
+        del state
+        # slow cases are not worth repeating as often
+        if sum(times) > max_time * repeat:
+            break
+    return min(times)
+
+def peak_memory(benchmark, params):
+    state = benchmark.setup(**params)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        benchmark.run(state)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--quick', action='store_true', help='run the small grids')
+    parser.add_argument('--filter', default=None, help='only run the benchmarks whose name contains this')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--no-memory', action='store_true', help='do not measure the peak memory')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help='merge the results into the baseline file')
+    parser.add_argument('--output', default=None, help='write the results to this JSON file')
+    parser.add_argument('--max-slowdown', type=float, default=None,
+                        help='exit with an error if a case is this many times slower than its baseline')
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+
+    results = {}
+    regressions = []
+    print(f"{'case':<78} {'time (s)':>10} {'peak (MB)':>10} {'baseline':>10} {'ratio':>7}")
+    for benchmark in BENCHMARKS:
+        if args.filter is not None and args.filter not in benchmark.name:
+            continue
+        for params in benchmark.params(quick=args.quick):
+            key = case_key(benchmark.name, params)
+            seconds = time_case(benchmark, params, args.repeat)
+            peak = None if args.no_memory else peak_memory(benchmark, params)
+            results[key] = {'time': seconds, 'peak_memory': peak}
+
+            reference = baseline.get(key, {}).get('time')
+            ratio = seconds / reference if reference else None
+            if ratio is not None and args.max_slowdown is not None and ratio > args.max_slowdown:
+                regressions.append(key)
+            print(
+                f"{key:<78} {seconds:>10.4f} {'-' if peak is None else f'{peak / 2**20:.1f}':>10} "
+                f"{'-' if reference is None else f'{reference:.4f}':>10} {'-' if ratio is None else f'{ratio:.2f}':>7}",
+                flush=True
+            )
+
+    report = {
+        'machine': {'python': platform.python_version(), 'numpy': np.__version__, 'platform': platform.platform()},
+        'results': results,
+    }
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        report['results'] = dict(baseline, **results)
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if regressions:
+        print(f'{len(regressions)} case(s) slower than {args.max_slowdown}x their baseline:')
+        for key in regressions:
+            print('  ' + key)
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,6 +3,11 @@ import setuptools
 setuptools.setup(
     name="voting_mechanism_design",
     packages=setuptools.find_packages(),
+    # the simulation core only needs NumPy; the notebooks need the rest
+    install_requires=["numpy"],
+    extras_require={
+        "notebooks": ["matplotlib", "seaborn", "scipy", "pandas", "choix", "tqdm", "joblib", "networkx"],
+    },
     classifiers=[
         "Programming Language :: Python :: 3",
         "License :: OSI Approved :: MIT License",
@@ -0,0 +1,73 @@
+import numpy as np
+
+from voting_mechanism_design.funds_distribution.funding_design import FundingDesign
+from voting_mechanism_design.funds_distribution.pairwise_binary import PairwiseBinary, fit_bradley_terry, win_counts
+from voting_mechanism_design.projects.project import Project
+from voting_mechanism_design.voting_designs.ledger import VoteLedger
+from voting_mechanism_design.voting_designs.ranking import PairwiseRankingVote
+
+def comparisons(num_projects, num_comparisons, seed=0):
+    rng = np.random.default_rng(seed)
+    strengths = rng.normal(0, 1, num_projects)
+    i = rng.integers(0, num_projects, num_comparisons)
+    j = (i + rng.integers(1, num_projects, num_comparisons)) % num_projects
+    i_wins = rng.random(num_comparisons) < 1 / (1 + np.exp(strengths[j] - strengths[i]))
+    winner, loser = np.where(i_wins, i, j), np.where(i_wins, j, i)
+    return strengths, win_counts(winner, loser, num_projects)
+
+def plain_mm(winner, loser, counts, num_projects, alpha, num_iter):
+    """
+    Hunter's MM updates, without acceleration, on the dense win matrix
+    """
+    wins = np.zeros((num_projects, num_projects))
+    np.add.at(wins, (winner, loser), counts)
+    compared = (wins + wins.T) > 0
+    wins = wins + alpha * compared
+    n = wins + wins.T
+    p = np.ones(num_projects)
+    for _ in range(num_iter):
+        p = wins.sum(1) / (n / (p[:, None] + p[None, :])).sum(1)
+        p /= np.exp(np.mean(np.log(p)))
+    return np.log(p)
+
+def test_fit_recovers_the_true_strengths():
+    strengths, (winner, loser, counts) = comparisons(1000, 500_000)
+    params = fit_bradley_terry(winner, loser, counts, 1000)
+    assert abs(np.mean(params)) < 1e-9
+    assert np.corrcoef(params, strengths)[0, 1] > 0.995
+    # about 1000 comparisons per project
+    assert np.sqrt(np.mean((params - (strengths - strengths.mean()))**2)) < 0.1
+
+def test_squarem_converges_to_the_plain_mm_fixed_point():
+    _, (winner, loser, counts) = comparisons(60, 3000, seed=1)
+    params = fit_bradley_terry(winner, loser, counts, 60, tol=1e-10)
+    np.testing.assert_allclose(params, plain_mm(winner, loser, counts, 60, alpha=0.01, num_iter=5000), atol=1e-7)
+    # a warm start from the solution stays there
+    np.testing.assert_allclose(fit_bradley_terry(winner, loser, counts, 60, init_params=params, max_iter=3), params, atol=1e-9)
+
+def test_map_project_ix_handles_sparse_and_negative_ids():
+    projects = [Project(project_id, 0.5) for project_id in (10**12, -3, 7, -3)]
+    np.testing.assert_array_equal(FundingDesign.map_project_ix(projects, [-3, 7, 5, 10**12, -4]), [1, 2, -1, 0, -1])
+
+def test_projects_without_a_shared_ledger_are_read_from_their_votes():
+    projects = [Project(project_id, 0.5) for project_id in range(4)]
+    rng = np.random.default_rng(2)
+    for _ in range(40):
+        i, j = rng.choice(4, 2, replace=False)
+        val1 = int(rng.random() < (i + 1) / (i + j + 2))
+        vote = PairwiseRankingVote(None, projects[i], projects[j], val1, 1 - val1)
+        projects[i].add_vote(vote)
+        projects[j].add_vote(vote)
+    shared = [Project(project_id, 0.5) for project_id in range(4)]
+    ledger = VoteLedger()
+    for project in shared:
+        project.set_ledger(ledger)
+    for project in projects:
+        for vote in project.votes:
+            ledger.add_pairwise_vote(-1, vote.project1.project_id, vote.project2.project_id, vote.val1, vote.val2)
+
+    # the first project has no ledger at all
+    no_ledger = Project(9, 0.5)
+    expected = PairwiseBinary().allocate_funds(shared)
+    assert PairwiseBinary().allocate_funds(projects) == expected
+    assert PairwiseBinary().allocate_funds([no_ledger] + projects) == {9: 0.0, **expected}
@@ -0,0 +1,59 @@
+import numpy as np
+
+from voting_mechanism_design.agents.communication import DeGrootCommunication, SocialGraph
+
+def dense(graph):
+    adjacency = np.zeros((graph.num_nodes, graph.num_nodes))
+    np.add.at(adjacency, (graph.row_of_edge, graph.indices), graph.weights)
+    return adjacency
+
+def test_from_edges_builds_csr_rows():
+    graph = SocialGraph.from_edges([2, 0, 2, 0, 0], [1, 2, 0, 2, 1], 4, weights=[1., 2., 3., 4., 5.])
+    np.testing.assert_array_equal(graph.indptr, [0, 3, 3, 5, 5])
+    # the edges of a node keep the order they were given in
+    np.testing.assert_array_equal(graph.indices, [2, 2, 1, 1, 0])
+    np.testing.assert_array_equal(graph.weights, [2., 4., 5., 1., 3.])
+    np.testing.assert_array_equal(graph.out_degree, [3, 0, 2, 0])
+    # duplicate edges add up
+    assert dense(graph)[0, 2] == 6.
+
+    symmetric = SocialGraph.from_edges([0, 1], [1, 2], 3, symmetric=True)
+    np.testing.assert_array_equal(dense(symmetric), dense(symmetric).T)
+    assert symmetric.num_edges == 4
+
+def test_matvec_matches_the_dense_product():
+    rng = np.random.default_rng(0)
+    source = rng.integers(0, 50, 400)
+    graph = SocialGraph.from_edges(source, rng.integers(0, 50, 400), 50, weights=rng.random(400))
+    # every node with edges is in exactly one degree group, with its own edges
+    grouped = np.concatenate([nodes for nodes, _ in graph.degree_groups])
+    assert sorted(grouped.tolist()) == np.flatnonzero(graph.out_degree > 0).tolist()
+    for nodes, edge_ix in graph.degree_groups:
+        np.testing.assert_array_equal(graph.row_of_edge[edge_ix], np.repeat(nodes[:, None], edge_ix.shape[1], axis=1))
+
+    x = rng.random((50, 7))
+    np.testing.assert_allclose(graph.matvec(x[:, 0]), dense(graph) @ x[:, 0])
+    np.testing.assert_allclose(graph.matvec(x), dense(graph) @ x)
+    np.testing.assert_allclose(graph.matvec(x, max_block_size=20), dense(graph) @ x)
+
+def test_degroot_reaches_the_consensus_of_a_connected_graph():
+    rng = np.random.default_rng(1)
+    # a ring, so that the graph is connected, plus random chords
+    ring = np.arange(30)
+    chords = rng.integers(0, 30, (2, 20))
+    graph = SocialGraph.from_edges(np.concatenate([ring, chords[0]]), np.concatenate([(ring + 1) % 30, chords[1]]), 30, symmetric=True)
+    ratings = rng.random((30, 5))
+
+    communication = DeGrootCommunication(graph, num_rounds=2000, susceptibility=0.5)
+    consensus = communication.propagate(ratings)
+    np.testing.assert_allclose(consensus, np.broadcast_to(consensus[0], consensus.shape), atol=1e-10)
+    # on an undirected graph the consensus weighs every badgeholder by its degree
+    degree = dense(graph).sum(1)
+    np.testing.assert_allclose(consensus[0], degree @ ratings / degree.sum(), atol=1e-10)
+
+def test_badgeholders_who_listen_to_nobody_keep_their_signal():
+    graph = SocialGraph.from_edges([0, 1], [1, 0], 3)
+    ratings = np.array([[0.], [1.], [5.]])
+    communicated = DeGrootCommunication(graph, num_rounds=3, susceptibility=1.0).propagate(ratings)
+    assert communicated[2, 0] == 5.
+    np.testing.assert_allclose(communicated[:2, 0], [1., 0.])
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+from benchmarks.import_time import CORE_MODULES, OPTIONAL_PACKAGES, ROOT, measure
+
+BUDGET_MS = 15.0
+
+def imported_modules():
+    """
+    The modules -X importtime reports when the core is imported in a fresh interpreter
+    """
+    code = '\n'.join(f'import {module}' for module in CORE_MODULES)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([ROOT, os.environ.get('PYTHONPATH', '')]))
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], env=env, check=True, capture_output=True, text=True).stderr
+    return {line.split('|')[-1].strip() for line in stderr.splitlines() if line.startswith('import time:') and 'cumulative' not in line}
+
+def test_core_imports_no_optional_package():
+    modules = imported_modules()
+    assert 'voting_mechanism_design.sim' in modules
+    optional = sorted(name for name in modules if name.split('.')[0] in OPTIONAL_PACKAGES)
+    assert optional == []
+
+def test_core_imports_within_budget():
+    # -X importtime slows the imports down noticeably, so they are timed as
+    # benchmarks/import_time.py does, after NumPy and with a warm bytecode cache
+    runs = measure(CORE_MODULES, repeat=5)
+    core_ms = min(run['core'] for run in runs) * 1000
+    assert core_ms < BUDGET_MS
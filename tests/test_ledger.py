@@ -0,0 +1,100 @@
+import numpy as np
+
+from voting_mechanism_design.agents.quorum_badgeholder import QuorumBadgeholder
+from voting_mechanism_design.projects.project import Project, ProjectPopulation
+from voting_mechanism_design.voting_designs.ledger import VoteLedger
+from voting_mechanism_design.voting_designs.quorum import QuorumVote
+from voting_mechanism_design.voting_designs.ranking import PairwiseRankingVote
+
+def test_columns_grow_in_chunks_and_keep_their_rows():
+    ledger = VoteLedger(chunk_size=8)
+    ledger.add_votes(0, np.arange(5), amount=np.arange(5.))
+    assert ledger.capacity == 8
+    ledger.add_votes(1, np.arange(6), amount=np.arange(6.) + 10)
+    assert ledger.capacity == 16
+    ledger.add_votes(2, np.arange(30), amount=np.nan)
+    assert ledger.capacity == 48 and ledger.num_votes == 41
+
+    np.testing.assert_array_equal(ledger.voter_id, [0] * 5 + [1] * 6 + [2] * 30)
+    np.testing.assert_array_equal(ledger.amount[:11], list(range(5)) + list(range(10, 16)))
+    assert np.isnan(ledger.amount[11:]).all()
+    assert (ledger.project2_id == -1).all()
+
+    # clear keeps the columns allocated
+    ledger.clear()
+    assert ledger.num_votes == 0 and ledger.capacity == 48
+
+def test_project_and_voter_rows():
+    ledger = VoteLedger()
+    ledger.add_votes(4, [1, 2, 3], amount=[1., 2., 3.])
+    ledger.add_votes(9, [2, 3], amount=[4., np.nan])
+    ledger.add_votes(7, 1, project2_id=3, val1=1, val2=0)
+
+    # a pairwise vote belongs to both of its projects
+    np.testing.assert_array_equal(ledger.project_rows(1), [0, 5])
+    np.testing.assert_array_equal(ledger.project_rows(3), [2, 4, 5])
+    np.testing.assert_array_equal(ledger.project_rows(8), [])
+    # grouped by voter in the order given
+    np.testing.assert_array_equal(ledger.voter_rows([9, 4]), [3, 4, 0, 1, 2])
+    np.testing.assert_array_equal(ledger.voter_rows(5), [])
+    np.testing.assert_array_equal(ledger.project_amounts(3), [3.])
+    assert ledger.num_project_votes(2) == 2
+
+def test_project_index_is_rebuilt_after_every_change():
+    ledger = VoteLedger()
+    ledger.add_votes(0, [1, 2], amount=1.)
+    np.testing.assert_array_equal(ledger.project_rows(2), [1])
+    index = ledger._project_index
+    ledger.project_rows(1)
+    assert ledger._project_index is index
+
+    ledger.add_votes(1, [2], amount=2.)
+    assert ledger._project_index is None
+    np.testing.assert_array_equal(ledger.project_rows(2), [1, 2])
+
+    ledger.remove_votes([1])
+    np.testing.assert_array_equal(ledger.project_rows(2), [1])
+    np.testing.assert_array_equal(ledger.amount, [1., 2.])
+
+def test_discard_project_removes_its_quorum_and_pairwise_votes():
+    ledger = VoteLedger()
+    ledger.add_votes(0, [1, 2, 3], amount=[1., 2., 3.])
+    ledger.add_votes(1, [2, 1], project2_id=[3, 2], val1=[1, 0], val2=[0, 1])
+    ledger.discard_project(2)
+
+    np.testing.assert_array_equal(ledger.project_id, [1, 3])
+    np.testing.assert_array_equal(ledger.amount, [1., 3.])
+    np.testing.assert_array_equal(ledger.project_rows(3), [1])
+    assert ledger.num_project_votes(2) == 0
+
+def test_quorum_and_pairwise_votes_round_trip_through_project_votes():
+    projects = ProjectPopulation()
+    projects.add_projects([Project(ix, 0.5) for ix in range(3)])
+    p0, p1, p2 = projects.get_projects()
+    voter = QuorumBadgeholder(5, laziness=0, expertise=0.5)
+    p0.add_vote(QuorumVote(voter, p0, 2.5))
+    p1.add_vote(QuorumVote(voter, p1, None))
+    pairwise = PairwiseRankingVote(voter, p1, p2, 0, 1)
+    p1.add_vote(pairwise)
+    p2.add_vote(pairwise)
+
+    assert projects.ledger.num_votes == 3
+    assert [p.num_votes for p in (p0, p1, p2)] == [1, 2, 1]
+    vote, = p0.votes
+    assert isinstance(vote, QuorumVote) and (vote.voter, vote.project, vote.amount) == (voter, p0, 2.5)
+    abstention, pair = p1.votes
+    assert abstention.amount is None
+    assert isinstance(pair, PairwiseRankingVote)
+    assert (pair.voter, pair.project1, pair.project2, pair.val1, pair.val2) == (voter, p1, p2, 0, 1)
+    assert p2.votes[0].project1 is p1
+    np.testing.assert_array_equal(p1.get_vote_amounts(), [])
+
+def test_projects_that_are_not_built_yet_come_from_project_source():
+    projects = ProjectPopulation.from_impact(4, rng=0, project_ids=[10, 11, 12, 13])
+    projects.ledger.add_votes(-1, [12, 13], amount=[1., 2.])
+    assert projects.ledger.projects == {}
+
+    votes = projects.ledger.get_votes()
+    assert [vote.project for vote in votes] == [projects.get_project(12), projects.get_project(13)]
+    assert votes[0].voter is None and votes[1].amount == 2.
+    assert projects.get_project(12).votes[0].amount == 1.
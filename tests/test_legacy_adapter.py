@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from voting_mechanism_design.legacy.ledger_adapter import LedgerSimulation
+from voting_mechanism_design.legacy.op_simulator import Simulation
+
+def simulate(simulation_class, seed, laziness_factor, willingness_to_spend, scoring_method):
+    np.random.seed(seed)
+    simulation = simulation_class()
+    simulation.initialize_round(30_000)
+    simulation.randomize_voters(30, willingness_to_spend=willingness_to_spend, laziness_factor=laziness_factor, expertise_factor=0.7)
+    simulation.randomize_projects(80, coi_factor=0.3)
+    results = simulation.simulate_voting_and_scoring(n=3, scoring_method=scoring_method, quorum=5, min_amount=1)
+    # one more round, to look at what the voters have left before the round is reset
+    simulation.simulate_voting()
+    scores = simulation.round.calculate_scores(scoring_method, quorum=5, min_amount=1)
+    balances = [voter.balance_op for voter in simulation.round.voters]
+    return results, scores, balances, np.random.get_state()
+
+@pytest.mark.parametrize('scoring_method', ['median', 'mean', 'quadratic', 'outliers', 'sum'])
+@pytest.mark.parametrize('laziness_factor, willingness_to_spend', [(0.6, 1.0), (0.0, 0.01), (0.3, 0.002)])
+def test_ledger_simulation_matches_the_legacy_simulation(scoring_method, laziness_factor, willingness_to_spend):
+    expected, expected_scores, expected_balances, expected_state = simulate(Simulation, 7, laziness_factor, willingness_to_spend, scoring_method)
+    results, scores, balances, state = simulate(LedgerSimulation, 7, laziness_factor, willingness_to_spend, scoring_method)
+
+    assert results == expected
+    assert scores == expected_scores
+    assert balances == expected_balances
+    # np.random is left where the legacy loop leaves it
+    assert state[0] == expected_state[0] and np.array_equal(state[1], expected_state[1]) and state[2:] == expected_state[2:]
@@ -0,0 +1,15 @@
+import numpy as np
+
+from voting_mechanism_design.metrics import kendall_tau, ranking_metrics, spearman
+
+def test_nan_scores_rank_last():
+    true_impact = np.array([0.1, 0.2, 0.3, 0.4, 0.5])
+    scores = np.array([np.nan, np.nan, 3.0, 4.0, 5.0])
+    # the same ranking as scores with the NaNs tied for last
+    tied_last = np.array([0.0, 0.0, 3.0, 4.0, 5.0])
+    assert kendall_tau(true_impact, scores) == kendall_tau(true_impact, tied_last) > 0.9
+    assert spearman(true_impact, scores) == spearman(true_impact, tied_last) > 0.9
+
+    metrics = ranking_metrics(true_impact, scores, k=2)
+    assert metrics['min_swaps'] == 0
+    assert metrics['top_2_precision'] == 1
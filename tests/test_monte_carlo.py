@@ -0,0 +1,70 @@
+import numpy as np
+
+from voting_mechanism_design.agents.quorum_badgeholder import QuorumBadgeholderPopulation
+from voting_mechanism_design.funds_distribution.threshold_and_aggregate import ThresholdAndAggregate
+from voting_mechanism_design.monte_carlo import AdaptiveMonteCarlo, AdaptiveStopping, RunningStats
+from voting_mechanism_design.projects.project import ProjectPopulation
+from voting_mechanism_design.sim import RoundSimulation
+from voting_mechanism_design.sweep import ParameterSweep
+
+def metric_values(seed=0):
+    rng = np.random.default_rng(seed)
+    # a large offset, which the sum-of-squares formula would lose the variance to
+    values = 1e8 + rng.normal(0, [1., 5., 0.1], (40, 3))
+    values[rng.random((40, 3)) < 0.2] = np.nan
+    if seed:
+        values[:, 2] = np.nan
+    return values
+
+def assert_matches_numpy(stats, values):
+    np.testing.assert_array_equal(stats.count, (~np.isnan(values)).sum(axis=0))
+    seen = stats.count > 0
+    np.testing.assert_allclose(stats.mean[seen], np.nanmean(values[:, seen], axis=0), rtol=1e-15)
+    # the values themselves are only stored to about 1e-8 around 1e8
+    np.testing.assert_allclose(stats.variance[seen], np.nanvar(values[:, seen], axis=0, ddof=1), rtol=1e-6)
+
+def test_welford_updates_match_numpy():
+    values = metric_values()
+    stats = RunningStats(3)
+    for run in values:
+        stats.update(run)
+    assert_matches_numpy(stats, values)
+
+def test_merged_batches_match_numpy():
+    for seed in (0, 1):
+        values = metric_values(seed)
+        stats = RunningStats(3)
+        # uneven batches, one of them a single run
+        for batch in np.split(values, [7, 8, 25]):
+            stats.update_batch(batch)
+        assert_matches_numpy(stats, values)
+        if seed:
+            # a metric that was never seen
+            assert stats.count[2] == 0 and np.isnan(stats.variance[2])
+
+def small_simulation(config=None, seed=0):
+    badgeholders = QuorumBadgeholderPopulation.from_traits(15, expertise='medium', laziness=(1, 3), rng=0)
+    projects = ProjectPopulation.from_impact(20, rng=1)
+    return RoundSimulation(badgeholders, projects, ThresholdAndAggregate('mean', quorum=2), random_seed=seed)
+
+def test_adaptive_monte_carlo_stops_once_the_intervals_are_narrow():
+    loose = AdaptiveMonteCarlo(small_simulation(), AdaptiveStopping(['kendall_tau'], tolerance=0.03, batch_size=4), max_runs=64).run()
+    # more than min_runs are needed, but not the whole budget
+    assert loose['converged'] and 8 < loose['num_runs'] < 64 and loose['num_runs'] % 4 == 0
+    assert loose['half_width']['kendall_tau'] <= 0.03
+    assert len(loose['values']) == loose['num_runs']
+
+    # an interval that cannot get narrow enough uses up the budget
+    strict = AdaptiveMonteCarlo(small_simulation(), AdaptiveStopping(['kendall_tau'], tolerance=1e-6, batch_size=4), max_runs=16).run()
+    assert not strict['converged'] and strict['num_runs'] == 16
+    # the runs are the same, whatever the stopping rule
+    num_runs = min(loose['num_runs'], 16)
+    np.testing.assert_array_equal(strict['values'][:num_runs], loose['values'][:num_runs])
+
+def test_adaptive_sweep_stops_each_configuration_on_its_own():
+    stopping = AdaptiveStopping(['kendall_tau'], tolerance={'kendall_tau': 0.1}, batch_size=4)
+    sweep = ParameterSweep({'quorum': [2, 3]}, small_simulation, n_runs=64, n_jobs=1, stopping=stopping)
+    results = sweep.run()
+    summaries = sweep.summaries()
+    assert all(summary['converged'] for summary in summaries)
+    assert len(results) == sum(summary['num_runs'] for summary in summaries) < 128
@@ -0,0 +1,37 @@
+import numpy as np
+
+from voting_mechanism_design.agents.pairwise_badgeholder import PairwiseBadgeholderPopulation
+from voting_mechanism_design.funds_distribution.pairwise_binary import PairwiseBinary
+from voting_mechanism_design.projects.pair_view import ActiveRankingView
+from voting_mechanism_design.projects.project import ProjectPopulation
+from voting_mechanism_design.sim import RoundArena, RoundSimulation
+
+def make_simulation():
+    badgeholders = PairwiseBadgeholderPopulation.from_traits(40, expertise='very-high', rng=0, voting_style='skewed_towards_impact')
+    projects = ProjectPopulation.from_impact(12, rng=1)
+    return RoundSimulation(badgeholders, projects, PairwiseBinary(), random_seed=2)
+
+def test_two_runs_in_a_row_with_an_active_ranking_view():
+    simulation = make_simulation()
+    view = ActiveRankingView(12, pairs_per_voter=5, batch_size=5)
+    cast_votes_kwargs = {'view': view}
+
+    simulation.run(cast_votes_kwargs=cast_votes_kwargs)
+    ledger = simulation.projects.ledger
+    first_votes = ledger.project_id[:ledger.num_votes].copy()
+    first_scores = list(simulation.projectid2score.values())
+    assert len(first_votes) > 0
+
+    simulation.reset()
+    simulation.seed(2)
+    simulation.run(cast_votes_kwargs=cast_votes_kwargs)
+    # the view hands out the same pairs again, rather than none once it has converged
+    np.testing.assert_array_equal(ledger.project_id[:ledger.num_votes], first_votes)
+    # PairwiseBinary warm-starts its fit, so the scores agree to its tolerance
+    np.testing.assert_allclose(list(simulation.projectid2score.values()), first_scores, atol=1e-4)
+
+def test_arena_runs_start_from_a_fresh_view():
+    simulation = make_simulation()
+    arena = RoundArena(simulation, n_runs=2)
+    scores, _ = arena.run_all(seeds=[3, 3], cast_votes_kwargs={'view': ActiveRankingView(12, pairs_per_voter=5, batch_size=5)})
+    np.testing.assert_allclose(scores[0], scores[1], atol=1e-4)
@@ -0,0 +1,26 @@
+import numpy as np
+import pytest
+
+from voting_mechanism_design.agents.pairwise_badgeholder import PairwiseBadgeholderPopulation
+from voting_mechanism_design.agents.quorum_badgeholder import QuorumBadgeholderPopulation
+from voting_mechanism_design.funds_distribution.op_quorum import OpQuorum
+from voting_mechanism_design.funds_distribution.pairwise_binary import PairwiseBinary
+from voting_mechanism_design.projects.pair_view import AllPairsView
+from voting_mechanism_design.projects.project import ProjectPopulation
+from voting_mechanism_design.sim import RoundSimulation
+
+def test_run_batch_with_a_view_over_some_of_the_projects():
+    badgeholders = PairwiseBadgeholderPopulation.from_traits(5, expertise='high', rng=0, voting_style='skewed_towards_impact')
+    projects = ProjectPopulation.from_impact(10, rng=1)
+    simulation = RoundSimulation(badgeholders, projects, PairwiseBinary(), random_seed=2)
+    # only projects 0-5 are ever compared
+    results = simulation.run_batch(n_rounds=3, cast_votes_kwargs={'view': AllPairsView(6)})
+    assert results['scores'].shape == (3, 10)
+    assert len(results['metrics']['kendall_tau']) == 3
+
+def test_run_batch_needs_a_batch_funding_design():
+    badgeholders = QuorumBadgeholderPopulation.from_traits(5, rng=0)
+    projects = ProjectPopulation.from_impact(10, rng=1)
+    simulation = RoundSimulation(badgeholders, projects, OpQuorum(max_funding=1000, quorum=1, min_amount=0))
+    with pytest.raises(TypeError):
+        simulation.run_batch(n_rounds=2)
@@ -0,0 +1,15 @@
+import pickle
+
+import numpy as np
+
+from voting_mechanism_design.profiling import CountingGenerator, Profiler
+
+def test_counting_generator_survives_pickling():
+    profiler = Profiler()
+    rng = CountingGenerator(np.random.default_rng(0), profiler)
+    with profiler.phase('draw'):
+        rng.random(3)
+        copy = pickle.loads(pickle.dumps(rng))
+        np.testing.assert_array_equal(copy.random(4), rng.random(4))
+        assert profiler.counts[('draw',)]['rng_draws'] == 7
+    assert not hasattr(copy, '_missing')
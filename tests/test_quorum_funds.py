@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from voting_mechanism_design.agents.quorum_badgeholder import QuorumBadgeholder, QuorumBadgeholderPopulation
+from voting_mechanism_design.projects.project import ProjectPopulation
+
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_funds_left_are_those_of_casting_the_votes_one_by_one(vectorized):
+    rng = np.random.default_rng(0)
+    badgeholders = QuorumBadgeholderPopulation()
+    # funds which are not round numbers, so that the order of the subtractions shows
+    badgeholders.add_badgeholders([
+        QuorumBadgeholder(bb, laziness=laziness, expertise=0.5, total_funds=total_funds)
+        for bb, (laziness, total_funds) in enumerate(zip(rng.uniform(0, 0.9, 40), rng.uniform(50, 5000, 40)))
+    ])
+    projects = ProjectPopulation.from_impact(300, rng=1, owner_ids=list(range(40)) + [None] * 260)
+    badgeholders.send_application_information(projects)
+    badgeholders.set_random_generator(np.random.default_rng(2))
+    badgeholders.cast_votes(vectorized=vectorized)
+
+    ledger = projects.ledger
+    for badgeholder in badgeholders.badgeholders:
+        # what cast_vote does for every vote
+        expected = badgeholder.initial_funds
+        for amount in ledger.amount[ledger.voter_rows(badgeholder.badgeholder_id)]:
+            if amount and not np.isnan(amount):
+                expected -= amount
+        assert badgeholder.total_funds == expected
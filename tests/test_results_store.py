@@ -0,0 +1,41 @@
+import os
+
+import numpy as np
+
+from voting_mechanism_design.results_store import ResultsStore
+
+def test_records_round_trip_through_partitions(tmp_path):
+    store = ResultsStore(str(tmp_path), chunk_size=4)
+    for run in range(3):
+        for method in ('median', 'mean'):
+            store.append({'scoring_method': method, 'quorum': 5}, run=run, project_id=np.arange(3), score=np.arange(3) + 10. * run)
+    # a chunk left half-written by an interrupted flush is never read
+    stale = tmp_path / 'scoring_method=mean' / 'quorum=5' / '.tmp-part-00009'
+    os.makedirs(stale)
+    np.save(stale / 'score.npy', np.zeros(100))
+    store.close()
+
+    assert sorted(os.listdir(tmp_path / 'scoring_method=median' / 'quorum=5')) == ['_partition.json', 'part-00000', 'part-00001']
+    assert len(store.read(where={'scoring_method': 'mean'})['score']) == 9
+    assert [partition for _, partition in store.partitions()] == [{'scoring_method': 'mean', 'quorum': 5}, {'scoring_method': 'median', 'quorum': 5}]
+
+    chunks = list(store.iter_chunks(columns=['score'], where={'scoring_method': 'median'}))
+    assert [len(chunk['score']) for _, chunk in chunks] == [6, 3]
+    assert all(isinstance(chunk['score'], np.memmap) for _, chunk in chunks)
+
+    data = store.read(where={'scoring_method': 'median'})
+    assert sorted(data) == ['project_id', 'quorum', 'run', 'score', 'scoring_method']
+    np.testing.assert_array_equal(data['run'], np.repeat([0, 1, 2], 3))
+    np.testing.assert_array_equal(data['score'], np.tile(np.arange(3.), 3) + np.repeat([0, 10, 20], 3))
+    assert (data['scoring_method'] == 'median').all() and (data['quorum'] == 5).all()
+
+    assert len(store.read(where={'scoring_method': ['mean', 'median']})['score']) == 18
+    assert store.read(where={'quorum': 17}) == {}
+
+def test_list_and_path_like_partition_values(tmp_path):
+    with ResultsStore(str(tmp_path)) as store:
+        store.append({'weights': [1, 2], 'name': 'a/b'}, score=np.array([1.5, 2.5]))
+    data = store.read()
+    assert data['weights'].tolist() == [[1, 2], [1, 2]]
+    assert data['name'].tolist() == ['a/b', 'a/b']
+    assert os.path.isdir(tmp_path / 'weights=[1, 2]' / 'name=a_b' / 'part-00000')
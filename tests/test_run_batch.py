@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from voting_mechanism_design.agents.communication import DeGrootCommunication, SocialGraph
+from voting_mechanism_design.agents.pairwise_badgeholder import PairwiseBadgeholderPopulation
+from voting_mechanism_design.agents.quorum_badgeholder import QuorumBadgeholderPopulation
+from voting_mechanism_design.funds_distribution.pairwise_binary import PairwiseBinary
+from voting_mechanism_design.funds_distribution.threshold_and_aggregate import ThresholdAndAggregate
+from voting_mechanism_design.projects.pair_view import AllPairsView
+from voting_mechanism_design.projects.project import ProjectPopulation
+from voting_mechanism_design.sim import RoundSimulation
+
+SEEDS = [5, 6, 7]
+
+def communicating(population, num_badgeholders):
+    graph = SocialGraph.random(num_badgeholders, 3, np.random.default_rng(0))
+    population.set_communication(DeGrootCommunication(graph, num_rounds=2, susceptibility=0.7, signal_noise=0.5))
+    return population
+
+def runs(simulation, cast_votes_kwargs):
+    """
+    The ledger of run() for every one of SEEDS, as (voter, project, project2, amount, val1)
+    rows, the scores and the token amounts
+    """
+    ledgers, scores, token_amounts = [], [], []
+    for seed in SEEDS:
+        if simulation.projectid2score is not None:
+            simulation.reset()
+        simulation.seed(seed)
+        simulation.run(cast_votes_kwargs=cast_votes_kwargs)
+        ledger = simulation.projects.ledger
+        ledgers.append((ledger.voter_id.copy(), ledger.project_id.copy(), ledger.project2_id.copy(), ledger.amount.copy(), ledger.val1.copy()))
+        scores.append([simulation.projectid2score[project_id] for project_id in simulation.projects.project_ids])
+        token_amounts.append([project.token_amount for project in simulation.projects.get_projects()])
+    return ledgers, np.array(scores, dtype=float), np.array(token_amounts, dtype=float)
+
+@pytest.mark.parametrize('rng_streams', ['shared', 'badgeholder'])
+@pytest.mark.parametrize('vectorized', [False, True])
+@pytest.mark.parametrize('communication', [False, True])
+def test_quorum_batch_matches_run(rng_streams, vectorized, communication):
+    badgeholders = QuorumBadgeholderPopulation.from_traits(12, expertise='medium', laziness=(1, 3), rng=0, coi_factor=0.5, coi_project_id_vec=[3])
+    if communication:
+        communicating(badgeholders, 12)
+    projects = ProjectPopulation.from_impact(20, rng=1, owner_ids=[0, 1] + [None] * 18)
+    simulation = RoundSimulation(badgeholders, projects, ThresholdAndAggregate('mean', quorum=3, max_funding=1000, max_cap=150), rng_streams=rng_streams)
+    cast_votes_kwargs = {'vectorized': vectorized}
+
+    results = simulation.run_batch(seeds=SEEDS, cast_votes_kwargs=cast_votes_kwargs)
+    ledgers, scores, token_amounts = runs(simulation, cast_votes_kwargs)
+    for rr, (voter_id, project_id, _, amount, _) in enumerate(ledgers):
+        expected = np.full((12, 20), np.nan)
+        expected[voter_id, project_id] = amount
+        np.testing.assert_array_equal(results['votes'][rr], expected)
+    np.testing.assert_array_equal(results['scores'], np.nan_to_num(scores))
+    np.testing.assert_array_equal(results['token_amounts'], token_amounts)
+
+@pytest.mark.parametrize('rng_streams', ['shared', 'badgeholder'])
+@pytest.mark.parametrize('view_kind', ['pair_view', 'index_array', 'vectorized'])
+@pytest.mark.parametrize('communication', [False, True])
+def test_pairwise_batch_matches_run(rng_streams, view_kind, communication):
+    badgeholders = PairwiseBadgeholderPopulation.from_traits(8, expertise='high', laziness=(1, 3), rng=0, voting_style='skewed_towards_impact')
+    if communication:
+        communicating(badgeholders, 8)
+    projects = ProjectPopulation.from_impact(10, rng=1)
+    simulation = RoundSimulation(badgeholders, projects, PairwiseBinary(max_funding=1000), rng_streams=rng_streams)
+    view = AllPairsView(10)
+    if view_kind == 'index_array':
+        view = view.pair_ix.astype(np.int64)
+    cast_votes_kwargs = {'view': view, 'randomize_order': True, 'vectorized': view_kind == 'vectorized'}
+
+    results = simulation.run_batch(seeds=SEEDS, cast_votes_kwargs=cast_votes_kwargs)
+    view_ix, outcomes, _ = results['votes']
+    ledgers, _, token_amounts = runs(simulation, cast_votes_kwargs)
+    for rr, (voter_id, project_id, project2_id, _, val1) in enumerate(ledgers):
+        # the outcome of every (badgeholder, pair), whatever order the pairs were voted in
+        pair_ix = {(ix1, ix2): pp for pp, (ix1, ix2) in enumerate(view_ix.tolist())}
+        expected = np.full(outcomes.shape[1:], -1, dtype=np.int8)
+        for voter, ix1, ix2, won in zip(voter_id, project_id, project2_id, val1):
+            expected[voter, pair_ix[ix1, ix2]] = won
+        np.testing.assert_array_equal(outcomes[rr], expected)
+    # PairwiseBinary warm-starts its fits, so the allocations agree to its tolerance
+    np.testing.assert_allclose(results['token_amounts'], token_amounts, atol=0.05)
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from voting_mechanism_design.agents.quorum_badgeholder import QuorumBadgeholderPopulation
+from voting_mechanism_design.funds_distribution.threshold_and_aggregate import RunningTally, ThresholdAndAggregate, VoteTable, _aggregate_rows
+from voting_mechanism_design.projects.project import ProjectPopulation
+
+def test_outliers_score_matches_a_full_tally_after_adds_and_removes():
+    rng = np.random.default_rng(0)
+    project_ix = rng.integers(0, 4, 400)
+    amounts = np.round(rng.random(400) * 1e5, 2)
+    tally = RunningTally.from_votes(project_ix[:200], amounts[:200], 4)
+    for key, (ix, amount) in enumerate(zip(project_ix[200:], amounts[200:]), 200):
+        tally.add(int(ix), float(amount), key)
+    tally.remove(int(project_ix[-1]), float(amounts[-1]), 399)
+
+    table = VoteTable(project_ix[:-1], amounts[:-1], 4)
+    expected = _aggregate_rows(table.values, table.counts, 'outliers')
+    assert [tally.score(ix, 'outliers') for ix in range(4)] == expected.tolist()
+
+def test_remove_takes_out_the_given_vote_among_equal_amounts():
+    # few distinct amounts, so that every removed vote has equal amounts cast before and
+    # after it, which the cast order of the 'outliers' mean tells apart
+    rng = np.random.default_rng(1)
+    project_ix = rng.integers(0, 3, 300)
+    amounts = rng.integers(0, 8, 300) + rng.choice([0.1, 0.7], 300)
+    tally = RunningTally.from_votes(project_ix, amounts, 3)
+    removed = rng.choice(300, 60, replace=False)
+    for key in removed.tolist():
+        tally.remove(int(project_ix[key]), float(amounts[key]), key)
+
+    kept = np.setdiff1d(np.arange(300), removed)
+    table = VoteTable(project_ix[kept], amounts[kept], 3)
+    for method in ('median', 'outliers'):
+        expected = _aggregate_rows(table.values, table.counts, method)
+        assert [tally.score(ix, method) for ix in range(3)] == expected.tolist()
+
+@pytest.mark.parametrize('scoring_method', ['median', 'outliers', 'mean', 'quadratic', 'sum'])
+def test_flipping_voters_matches_a_full_allocate_funds(scoring_method):
+    badgeholders = QuorumBadgeholderPopulation.from_traits(30, expertise='medium', laziness=(1, 3), rng=0)
+    projects = ProjectPopulation.from_impact(40, rng=1)
+    badgeholders.send_application_information(projects)
+    badgeholders.set_random_generator(np.random.default_rng(2))
+    badgeholders.cast_votes()
+    design = ThresholdAndAggregate(scoring_method, quorum=5)
+    design.allocate_funds(projects.get_projects())
+
+    # one voter leaves, another comes back with other amounts
+    design.remove_voter(3)
+    project_ids, amounts = design.remove_voter(7)
+    design.add_voter(7, (project_ids, amounts[::-1]))
+    scores = dict(design.update_scores())
+
+    ledger = projects.ledger
+    assert not np.any(ledger.voter_id == 3)
+    assert np.array_equal(ledger.project_id[ledger.voter_rows(7)], project_ids)
+    for project in projects.get_projects():
+        assert project.num_votes == int(np.sum(ledger.project_id == project.project_id))
+    expected = ThresholdAndAggregate(scoring_method, quorum=5).allocate_funds(projects.get_projects())
+    np.testing.assert_allclose([scores[k] for k in expected], list(expected.values()), rtol=1e-12)
+    if scoring_method in ('median', 'outliers'):
+        assert [scores[k] for k in expected] == list(expected.values())
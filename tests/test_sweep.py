@@ -0,0 +1,41 @@
+import numpy as np
+
+from voting_mechanism_design.agents.quorum_badgeholder import QuorumBadgeholderPopulation
+from voting_mechanism_design.funds_distribution.threshold_and_aggregate import ThresholdAndAggregate
+from voting_mechanism_design.projects.project import ProjectPopulation
+from voting_mechanism_design.sim import RoundSimulation
+from voting_mechanism_design.sweep import ParameterSweep
+
+GRID = {'scoring_method': ['median', 'mean'], 'quorum': [2, 4]}
+
+def simulation_factory(config, seed):
+    badgeholders = QuorumBadgeholderPopulation.from_traits(10, expertise='medium', laziness=(1, 3), rng=0)
+    projects = ProjectPopulation.from_impact(15, rng=1)
+    return RoundSimulation(badgeholders, projects, ThresholdAndAggregate(**config), random_seed=seed)
+
+def scores(results):
+    return {(result['task_id'], result['run']): result['projectid2score'] for result in results}
+
+def test_results_do_not_depend_on_the_workers_or_a_resume(tmp_path):
+    serial = ParameterSweep(GRID, simulation_factory, n_runs=3, n_jobs=1).run()
+    parallel = ParameterSweep(GRID, simulation_factory, n_runs=3, n_jobs=2).run()
+    assert scores(parallel) == scores(serial)
+
+    # interrupt a checkpointed sweep after a few runs, then finish it
+    sweep = ParameterSweep(GRID, simulation_factory, n_runs=3, n_jobs=1, checkpoint_path=tmp_path / 'sweep.pkl')
+    results = sweep.iter_results()
+    for _ in range(5):
+        next(results)
+    results.close()
+    assert len(sweep.load_checkpoint()) == 5
+    resumed = ParameterSweep(GRID, simulation_factory, n_runs=3, n_jobs=2, checkpoint_path=tmp_path / 'sweep.pkl').run()
+    assert scores(resumed) == scores(serial)
+
+def test_seeds_are_kept_when_runs_are_added():
+    short = ParameterSweep(GRID, simulation_factory, n_runs=2)
+    long = ParameterSweep(GRID, simulation_factory, n_runs=5)
+    short_seeds = {(config_ix, run_ix): short.seed(config_ix, run_ix) for config_ix in range(4) for run_ix in range(2)}
+    for task_id, _, run_ix, seed in long.tasks():
+        config_ix = task_id // 5
+        if run_ix < 2:
+            assert np.array_equal(seed.generate_state(4), short_seeds[config_ix, run_ix].generate_state(4))
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from voting_mechanism_design.funds_distribution.threshold_and_aggregate import ThresholdAndAggregate, VoteTable
+from voting_mechanism_design.projects.project import ProjectPopulation
+
+# the votes of every project in the order cast; project 2 has none
+VOTES = {0: [1., 2., 3., 4., 10.], 1: [5., 5.], 2: [], 3: [0.5, 8., 2.]}
+
+# the aggregate of every project, before the thresholds
+AGGREGATES = {
+    'median': [3., 5., np.nan, 2.],
+    'mean': [4., 5., np.nan, 3.5],
+    'quadratic': [9.308542030110353, 4.47213595499958, 0., 4.949747468305833],
+    # the votes between the interpolated quartiles: [2, 3, 4], [5, 5] and [2] of [0.5, 2, 8]
+    'outliers': [3., 5., np.nan, 2.],
+    'sum': [20., 10., 0., 10.5],
+}
+
+def vote_population():
+    projects = ProjectPopulation.from_impact(4, rng=0)
+    # the votes of the projects interleaved, with abstentions, as a round casts them
+    for round_ix in range(5):
+        for project_id, amounts in VOTES.items():
+            if round_ix < len(amounts):
+                projects.ledger.add_votes(round_ix, project_id, amount=amounts[round_ix])
+        projects.ledger.add_votes(round_ix, 2, amount=np.nan)
+    return projects
+
+def test_vote_table_groups_the_votes_in_cast_order():
+    design = ThresholdAndAggregate('median', quorum=0)
+    table = VoteTable(*design._flat_vote_amounts(vote_population().get_projects()), 4)
+    np.testing.assert_array_equal(table.counts, [5, 2, 0, 3])
+    for ix, amounts in VOTES.items():
+        np.testing.assert_array_equal(table.values[ix, :len(amounts)], amounts)
+    for method, expected in AGGREGATES.items():
+        np.testing.assert_allclose(table.aggregate(method), expected, rtol=1e-15)
+
+@pytest.mark.parametrize('quorum', [0, 3, 5])
+@pytest.mark.parametrize('min_amount', [0, 4])
+def test_score_many_matches_fixed_scores_and_allocate_funds(quorum, min_amount):
+    projects = vote_population().get_projects()
+    methods = list(AGGREGATES)
+    designs = [ThresholdAndAggregate(method, quorum=quorum, min_amount=min_amount) for method in methods]
+
+    expected = np.array([AGGREGATES[method] for method in methods])
+    counts = np.array([len(amounts) for amounts in VOTES.values()])
+    with np.errstate(invalid='ignore'):
+        expected[:, counts < quorum] = 0
+        expected[expected < min_amount] = 0
+    scores = ThresholdAndAggregate.score_many(designs, projects)
+    np.testing.assert_allclose(scores, expected, rtol=1e-15)
+
+    for design, design_scores in zip(designs, scores):
+        allocated = list(design.allocate_funds(projects).values())
+        np.testing.assert_array_equal(allocated, design_scores)
+
+def test_score_many_at_a_quorum_of_three():
+    designs = [ThresholdAndAggregate(method, quorum=3, min_amount=2.5) for method in AGGREGATES]
+    np.testing.assert_allclose(ThresholdAndAggregate.score_many(designs, vote_population().get_projects()), [
+        [3., 0., 0., 0.],
+        [4., 0., 0., 3.5],
+        [9.308542030110353, 0., 0., 4.949747468305833],
+        [3., 0., 0., 0.],
+        [20., 0., 0., 10.5],
+    ], rtol=1e-15)
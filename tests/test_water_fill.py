@@ -0,0 +1,9 @@
+import numpy as np
+
+from voting_mechanism_design.funds_distribution.funding_design import water_fill
+
+def test_uncapped_split_with_zero_scores_matches_the_plain_normalization():
+    rng = np.random.default_rng(0)
+    scores = rng.random(1000)
+    scores[rng.random(1000) < 0.4] = 0
+    np.testing.assert_array_equal(water_fill(scores, 1e6), scores / scores.sum() * 1e6)
@@ -0,0 +1,170 @@
+import numpy as np
+
+class SocialGraph:
+    """
+    A weighted, directed graph between badgeholders (by their index in the population), in
+    compressed sparse row (CSR) form: the edges out of node i are
+    indices[indptr[i]:indptr[i+1]], with weights in the same positions.  An edge i -> j
+    means that i listens to j.
+
+    Only NumPy is needed; a graph with millions of edges takes 16 bytes per edge.
+    """
+    def __init__(self, indptr, indices, weights=None):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.weights = np.ones(len(self.indices)) if weights is None else np.asarray(weights, dtype=float)
+        assert len(self.indices) == len(self.weights) == self.indptr[-1], "Malformed CSR arrays"
+        self.num_nodes = len(self.indptr) - 1
+        self._row_of_edge = None
+        self._degree_groups = None
+
+    @classmethod
+    def from_edges(cls, source, target, num_nodes, weights=None, symmetric=False):
+        """
+        Builds the graph from the edges source[k] -> target[k].  If symmetric, the reverse
+        of every edge is added too.  Duplicate edges are kept, so their weights add up.
+        """
+        source = np.asarray(source, dtype=np.int64)
+        target = np.asarray(target, dtype=np.int64)
+        weights = np.ones(len(source)) if weights is None else np.asarray(weights, dtype=float)
+        if symmetric:
+            source, target = np.concatenate([source, target]), np.concatenate([target, source])
+            weights = np.concatenate([weights, weights])
+        order = np.argsort(source, kind='stable')
+        indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(source, minlength=num_nodes), out=indptr[1:])
+        return cls(indptr, target[order], weights[order])
+
+    @classmethod
+    def random(cls, num_nodes, mean_degree, rng, symmetric=False):
+        """
+        A random graph in which every node listens to mean_degree others, drawn uniformly
+        (an Erdos-Renyi-like graph with a fixed out-degree and no self-loops)
+        """
+        if num_nodes < 2:
+            return cls.from_edges([], [], num_nodes)
+        source = np.repeat(np.arange(num_nodes), mean_degree)
+        # an offset of 1..n-1 never lands back on the source
+        target = (source + rng.integers(1, num_nodes, len(source))) % num_nodes
+        return cls.from_edges(source, target, num_nodes, symmetric=symmetric)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    @property
+    def out_degree(self):
+        return np.diff(self.indptr)
+
+    @property
+    def row_of_edge(self):
+        if self._row_of_edge is None:
+            self._row_of_edge = np.repeat(np.arange(self.num_nodes), self.out_degree)
+        return self._row_of_edge
+
+    @property
+    def degree_groups(self):
+        """
+        The nodes grouped by out-degree, as (nodes, edge_ix) pairs where edge_ix is the
+        (len(nodes) x degree) array of the positions of their edges
+        """
+        if self._degree_groups is None:
+            degree = self.out_degree
+            order = np.argsort(degree, kind='stable')
+            bounds = np.flatnonzero(np.diff(degree[order])) + 1
+            self._degree_groups = [
+                (nodes, self.indptr[nodes][:, None] + np.arange(degree[nodes[0]]))
+                for nodes in np.split(order, bounds) if len(nodes) and degree[nodes[0]] > 0
+            ]
+        return self._degree_groups
+
+    def row_normalized(self):
+        """
+        The graph with the weights out of every node scaled to sum to 1, so that a matvec
+        averages over the neighbours
+        """
+        totals = np.bincount(self.row_of_edge, weights=self.weights, minlength=self.num_nodes)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            weights = self.weights / totals[self.row_of_edge]
+        graph = SocialGraph(self.indptr, self.indices, weights)
+        graph._row_of_edge, graph._degree_groups = self._row_of_edge, self._degree_groups
+        return graph
+
+    def matvec(self, x, max_block_size=2**24):
+        """
+        The product of the adjacency matrix with x, a vector (one value per node) or a
+        matrix (one row per node).
+
+        For a matrix, the nodes with the same out-degree d are handled together: the rows of
+        x they point to are gathered into an (nodes x d x columns) array, and the weighted
+        sums are a batched matmul.  At most max_block_size gathered values are held in
+        memory at a time.
+        """
+        x = np.asarray(x, dtype=float)
+        if x.ndim == 1:
+            return np.bincount(self.row_of_edge, weights=self.weights * x[self.indices], minlength=self.num_nodes)
+
+        out = np.zeros((self.num_nodes, x.shape[1]))
+        max_edges = max(1, max_block_size // max(x.shape[1], 1))
+        for nodes, edge_ix in self.degree_groups:
+            step = max(1, max_edges // edge_ix.shape[1])
+            for start in range(0, len(nodes), step):
+                block = edge_ix[start:start + step]
+                out[nodes[start:start + step]] = np.matmul(self.weights[block][:, None, :], x[self.indices[block]])[:, 0, :]
+        return out
+
+class DeGrootCommunication:
+    """
+    Badgeholders on a SocialGraph exchange their ratings of the projects for num_rounds
+    rounds of DeGroot updates:
+
+        ratings <- (1 - susceptibility) * ratings + susceptibility * W @ ratings
+
+    where W averages over the badgeholders each one listens to (the row-normalized graph).
+    Each badgeholder starts from a private signal, the true impact plus Gaussian noise with
+    standard deviation signal_noise * (1 - expertise).  Badgeholders who listen to nobody
+    keep their own signal.
+
+    Herding is a high susceptibility over a few rounds on a dense graph; delegation is a
+    susceptibility of 1 on a graph where each delegator has one edge, to its delegate.
+    susceptibility can be a scalar or one value per badgeholder.
+    """
+    def __init__(self, graph, num_rounds=1, susceptibility=0.5, signal_noise=0.1):
+        self.graph = graph
+        self.num_rounds = num_rounds
+        self.susceptibility = susceptibility
+        self.signal_noise = signal_noise
+        # the row-normalized graph, built on first use (the graph is not expected to change)
+        self._weights = None
+
+    def initial_ratings(self, true_impact, expertise, rng):
+        """
+        The private (badgeholders x projects) signals.  rng is one generator, or a list of
+        one per badgeholder which each draws its own signal.
+        """
+        expertise = np.asarray(expertise, dtype=float)
+        if isinstance(rng, (list, tuple)):
+            noise = np.stack([badgeholder_rng.normal(0, 1, len(true_impact)) for badgeholder_rng in rng]).reshape(len(expertise), len(true_impact))
+        else:
+            noise = rng.normal(0, 1, (len(expertise), len(true_impact)))
+        return true_impact[None, :] + noise * (self.signal_noise * (1 - expertise))[:, None]
+
+    def propagate(self, ratings):
+        """
+        Runs the rounds of updates on a (badgeholders x projects) rating matrix
+        """
+        assert ratings.shape[0] == self.graph.num_nodes, "The graph needs one node per badgeholder"
+        if self._weights is None:
+            self._weights = self.graph.row_normalized()
+        weights = self._weights
+        susceptibility = np.broadcast_to(np.asarray(self.susceptibility, dtype=float), (self.graph.num_nodes,))
+        susceptibility = np.where(self.graph.out_degree > 0, susceptibility, 0.0)[:, None]
+        for _ in range(self.num_rounds):
+            ratings = (1 - susceptibility) * ratings + susceptibility * weights.matvec(ratings)
+        return ratings
+
+    def communicate(self, true_impact, expertise, rng):
+        """
+        The (badgeholders x projects) ratings after communication
+        """
+        return self.propagate(self.initial_ratings(true_impact, expertise, rng))
@@ -1,9 +1,82 @@
+import copy
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+from voting_mechanism_design.populations import EXPERTISE_PRESETS, LAZINESS_PRESETS, ObjectView, draw_values
+
+def badgeholder_seed(seed_sequence, badgeholder_id):
+    """
+    The SeedSequence of a badgeholder's own random stream: the child of seed_sequence keyed
+    by badgeholder_id, i.e. seed_sequence.spawn(badgeholder_id + 1)[-1] on a fresh
+    seed_sequence.  It depends on nothing but the seed and the badgeholder_id.
+    """
+    return np.random.SeedSequence(
+        seed_sequence.entropy, spawn_key=seed_sequence.spawn_key + (badgeholder_id,), pool_size=seed_sequence.pool_size
+    )
+
+def _draw(badgeholder, method, args, kwargs):
+    out = getattr(badgeholder, method)(*args, badgeholder.rng, **kwargs)
+    return out, badgeholder.rng.bit_generator.state
+
+def map_draws(executor, badgeholders, method, args, **kwargs):
+    """
+    Calls badgeholder.<method>(*args[i], badgeholder.rng, **kwargs) for the i-th
+    badgeholder on executor (a concurrent.futures thread or process pool), and returns the
+    results in order.  The badgeholders are sent without their projects, and the state of every
+    generator is copied back afterwards, so that a process pool leaves the streams where
+    the serial calls would.
+    """
+    detached = []
+    for badgeholder in badgeholders:
+        badgeholder = copy.copy(badgeholder)
+        badgeholder.project_population = badgeholder.ledger = badgeholder.communicated_ratings = None
+        detached.append(badgeholder)
+    num_badgeholders = len(detached)
+    results = list(executor.map(_draw, detached, [method] * num_badgeholders, args, [kwargs] * num_badgeholders))
+    for badgeholder, (_, state) in zip(badgeholders, results):
+        badgeholder.rng.bit_generator.state = state
+    return [out for out, _ in results]
+
 class BadgeHolder(ABC):
-    pass
+    __slots__ = ()
 
 class BadgeHolderPopulation(ABC):
+    # True once set_random_streams has given every badgeholder a generator of its own
+    independent_streams = False
+    # the class of the badgeholders built by from_traits
+    badgeholder_class = None
+
+    @classmethod
+    def from_traits(cls, num_badgeholders, expertise='medium', laziness='const-0.0', rng=None, badgeholder_ids=None, **badgeholder_kwargs):
+        """
+        A population of num_badgeholders badgeholders whose expertise and laziness are
+        drawn for all of them at once (see populations.draw_values): a preset name such as
+        'high' or 'const-0.5', a (a, b) Beta tuple, a constant or an array.  Expertise is
+        drawn before laziness.  The badgeholders are built by an ObjectView the first time
+        they are used, with the other arguments of badgeholder_kwargs (e.g. voting_style or
+        total_funds); the drawn values are kept in population.traits.
+
+        rng - a np.random.Generator or a seed
+        badgeholder_ids - the IDs of the badgeholders, 0..num_badgeholders-1 by default
+        """
+        rng = np.random.default_rng(rng)
+        badgeholder_ids = np.arange(num_badgeholders) if badgeholder_ids is None else np.asarray(badgeholder_ids)
+        assert len(badgeholder_ids) == num_badgeholders, "Expected one ID per badgeholder"
+        traits = {
+            'expertise': draw_values(expertise, num_badgeholders, rng, EXPERTISE_PRESETS),
+            'laziness': draw_values(laziness, num_badgeholders, rng, LAZINESS_PRESETS),
+        }
+        columns = dict(traits, badgeholder_id=badgeholder_ids.tolist())
+
+        population = cls()
+        population.badgeholders = ObjectView(cls.badgeholder_class, columns, badgeholder_kwargs)
+        population.num_badgeholders = num_badgeholders
+        # like add_badgeholders, a lookup returns the first badgeholder with a given ID
+        population.badgeholderid2ix = dict(zip(columns['badgeholder_id'][::-1], range(num_badgeholders - 1, -1, -1)))
+        population.traits = traits
+        return population
+
     @abstractmethod
     def __init__(self, badgeholders):
         self.badgeholders = badgeholders
@@ -22,4 +95,39 @@ class BadgeHolderPopulation(ABC):
 
     @abstractmethod
     def set_random_generator(self):
-        pass
\ No newline at end of file
+        pass
+
+    def set_random_streams(self, seed, wrap=None):
+        """
+        Gives every badgeholder a random generator of its own, seeded by badgeholder_seed,
+        instead of the one generator shared by all of them of set_random_generator.  The
+        draws of a badgeholder then do not depend on the order of the population, on the
+        draws of the others or on who else is in it, and the votes can be cast concurrently
+        (see the executor argument of cast_votes).  Draws which are nobody's in particular
+        come from a population generator seeded by seed itself.
+
+        seed - an int or a np.random.SeedSequence
+        wrap - an optional function applied to every generator, e.g. to count its draws
+        """
+        seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        wrap = (lambda rng: rng) if wrap is None else wrap
+        self.set_random_generator(wrap(np.random.default_rng(seed)))
+        for badgeholder in self.badgeholders:
+            badgeholder.set_random_generator(wrap(np.random.default_rng(badgeholder_seed(seed, badgeholder.badgeholder_id))))
+        self.independent_streams = True
+
+    def _signal_rng(self):
+        """
+        The generator(s) the private signals of a communication phase are drawn from: the
+        shared one, or every badgeholder's own with independent streams
+        """
+        if self.independent_streams:
+            return [badgeholder.rng for badgeholder in self.badgeholders]
+        return self.rng
+
+    def _rng_of(self, badgeholder):
+        """
+        The generator the population draws from on behalf of badgeholder, e.g. to pick or
+        order its pairs
+        """
+        return badgeholder.rng if self.independent_streams else self.rng
@@ -1,10 +1,113 @@
 import numpy as np
 import copy
 
-from voting_mechanism_design.agents.definitions import BadgeHolder, BadgeHolderPopulation
-from voting_mechanism_design.voting_designs.ranking import PairwiseRankingVote
+from voting_mechanism_design.agents.definitions import BadgeHolder, BadgeHolderPopulation, map_draws
+from voting_mechanism_design.projects.pair_view import PairView
+
+def view_to_ix(view, project_population):
+    """
+    Converts a view (a list of (Project, Project) tuples) into an (n_pairs x 2) array of
+    indices into project_population.  Index arrays are returned as they are.
+    """
+    if isinstance(view, np.ndarray) and view.dtype.kind in 'iu':
+        return view
+    view_ix = np.empty((len(view), 2), dtype=np.int64)
+    for ii, (project1, project2) in enumerate(view):
+        project1_ix = project_population.get_project_ix(project1.project_id)
+        project2_ix = project_population.get_project_ix(project2.project_id)
+        assert project1_ix is not None, "Project 1 is not in the list of projects"
+        assert project2_ix is not None, "Project 2 is not in the list of projects"
+        view_ix[ii] = project1_ix, project2_ix
+    return view_ix
+
+def _sample_rows(eligible, num_samples, rng):
+    """
+    A mask which selects num_samples[i] of the eligible entries of row i uniformly at
+    random (all of them, if there are fewer)
+    """
+    keys = np.where(eligible, rng.random(eligible.shape), np.inf)
+    ranked = np.argsort(keys, axis=1)
+    num_samples = np.minimum(num_samples, eligible.sum(axis=1))
+    rows, cols = np.nonzero(np.arange(eligible.shape[1]) < num_samples[:, None])
+    selected = np.zeros(eligible.shape, dtype=bool)
+    selected[rows, ranked[rows, cols]] = True
+    return selected
+
+def pairwise_outcomes(view_ix, true_impact, project_ids, badgeholders, rng):
+    """
+    The pairwise voting model of PairwiseBadgeholder for a group of badgeholders at once.
+    Every random number is drawn in one call per kind, and laziness and COI are applied as
+    masks, so the draws differ from those of the badgeholders voting one by one, but each
+    badgeholder follows the same model:
+      - random: each pair is a coin flip
+      - perfect: the project with the larger true impact wins
+      - skewed_towards_impact: a random int((1-laziness) * n_pairs) of the pairs are voted
+        on (always including the pairs with a COI project, if coi_factor > 0).  A COI
+        project wins with probability coi_factor*0.5 + 0.5, otherwise the better project
+        wins with probability clip(expertise * |impact delta| + 0.5, 0, 1).
+
+    view_ix - an (n_pairs x 2) integer array of project indices to vote on
+    true_impact - the true impact of each project index, or a (badgeholders x projects)
+                  matrix of the impact each badgeholder perceives (see perceived_impact)
+    project_ids - the project_id of each project index
+
+    Returns an int8 array shaped (badgeholders x n_pairs) which is 1 if the first project
+    of the pair won, 0 if the second won and -1 if the pair was not voted on.
+    """
+    num_badgeholders, num_pairs = len(badgeholders), len(view_ix)
+    impact1 = true_impact[..., view_ix[:, 0]]
+    impact2 = true_impact[..., view_ix[:, 1]]
+    first_is_better = impact1 > impact2
+
+    styles = np.array([badgeholder.voting_style for badgeholder in badgeholders])
+    for style in np.unique(styles):
+        if style not in ('random', 'perfect', 'skewed_towards_impact'):
+            raise ValueError(f"{style} not yet implemented!")
+    expertise = np.array([badgeholder.expertise for badgeholder in badgeholders], dtype=float)
+    laziness = np.array([badgeholder.laziness for badgeholder in badgeholders], dtype=float)
+    coi_factor = np.array([badgeholder.coi_factor for badgeholder in badgeholders], dtype=float)
+
+    # probability of voting for the project with the larger impact
+    probability_correct_vote = np.clip(expertise[:, None] * np.abs(impact1 - impact2) + 0.5, 0, 1)
+    probability_correct_vote[expertise == 0] = 0.5
+    probability_correct_vote[expertise == 1] = 1.0
+    probability_correct_vote[styles == 'random'] = 0.5
+    probability_correct_vote[styles == 'perfect'] = 1.0
+    # (for the random style this is a coin flip)
+    val1 = (rng.random((num_badgeholders, num_pairs)) < probability_correct_vote) == first_is_better
+
+    # COI overrides, for the skewed style only
+    coi1 = np.zeros((num_badgeholders, num_pairs), dtype=bool)
+    coi2 = np.zeros((num_badgeholders, num_pairs), dtype=bool)
+    for bb, badgeholder in enumerate(badgeholders):
+        if badgeholder.voting_style == 'skewed_towards_impact' and badgeholder.coi_factor > 0:
+            coi1[bb] = np.isin(project_ids[view_ix[:, 0]], badgeholder.coi_project_ix_vec)
+            coi2[bb] = np.isin(project_ids[view_ix[:, 1]], badgeholder.coi_project_ix_vec) & ~coi1[bb]
+    is_coi_pair = coi1 | coi2
+    if is_coi_pair.any():
+        vote_coi = rng.random((num_badgeholders, num_pairs)) < (coi_factor*0.5 + 0.5)[:, None]
+        val1 = np.where(coi1, vote_coi, np.where(coi2, ~vote_coi, val1))
+
+    # laziness, for the skewed style only
+    num_votes_to_cast = (num_pairs * (1 - laziness)).astype(np.int64)
+    is_lazy = (styles == 'skewed_towards_impact') & (laziness != 0)
+    voted = np.ones((num_badgeholders, num_pairs), dtype=bool)
+    if is_lazy.any():
+        lazy_rows = np.flatnonzero(is_lazy)
+        num_remaining = np.maximum(num_votes_to_cast[lazy_rows] - is_coi_pair[lazy_rows].sum(axis=1), 0)
+        voted[lazy_rows] = is_coi_pair[lazy_rows] | _sample_rows(~is_coi_pair[lazy_rows], num_remaining, rng)
+    # a badgeholder who would cast no votes does not even cast the COI ones
+    voted[(styles == 'skewed_towards_impact') & (num_votes_to_cast == 0)] = False
+
+    return np.where(voted, val1, -1).astype(np.int8)
 
 class PairwiseBadgeholder:
+    # slotted, since populations can hold many of them
+    __slots__ = (
+        'badgeholder_id', 'ledger', 'project_population', 'rng', 'communicated_ratings', 'voting_style',
+        'voting_style_kwargs', 'expertise', 'laziness', 'coi_project_ix_vec', 'coi_factor',
+    )
+
     def __init__(
             self, 
             badgeholder_id, 
@@ -17,10 +120,12 @@ class PairwiseBadgeholder:
             coi_factor=0.0  # a floating point value between 0 and 1 that indicates how much COI this badgeholder is engaging in
         ):
         self.badgeholder_id = badgeholder_id
-        self.votes = []
+        self.ledger = None
 
         self.project_population = None
         self.rng = None
+        # the badgeholder's ratings of the projects after the communication phase, if any
+        self.communicated_ratings = None
         self.voting_style = voting_style
         self.voting_style_kwargs = voting_style_kwargs
 
@@ -36,15 +141,40 @@ class PairwiseBadgeholder:
         self.coi_factor = coi_factor
 
     def reset_voter(self):
-        self.votes = []
+        self.ledger = None
+        self.communicated_ratings = None
+
+    @property
+    def votes(self):
+        """
+        PairwiseRankingVote objects built from the ledger, for code that still works with them
+        """
+        if self.ledger is None:
+            return []
+        return self.ledger.get_votes(self.ledger.voter_rows(self.badgeholder_id))
 
     def send_applications_to_voter(self, project_population):
         self.project_population = project_population
+        self.ledger = project_population.ledger
+        self.ledger.register_voter(self)
 
     def set_random_generator(self, rng):
         self.rng = rng
 
+    def perceived_impact(self):
+        """
+        The impact of each project index as the badgeholder sees it: its communicated
+        ratings if there was a communication phase, the true impacts otherwise
+        """
+        if self.communicated_ratings is not None:
+            return self.communicated_ratings
+        return self.project_population.true_impact
+
     def cast_votes(self, view):
+        """
+        view - the pairs to vote on, either a list of (Project, Project) tuples or an
+               (n_pairs x 2) array of project indices (see PairView)
+        """
         if self.voting_style == 'random':
             self.cast_random_votes(view)
         elif self.voting_style == 'skewed_towards_impact':
@@ -70,199 +200,361 @@ class PairwiseBadgeholder:
         view - a list of tuples, where the values are the projects to vote on
                pairwise to the agent to vote on
         """
-        self._prevote_checks()
-
-        for pair in view:
-            project1, project2 = pair
-            assert self.project_population.get_project(project1.project_id) is not None, "Project 1 is not in the list of projects"
-            assert self.project_population.get_project(project2.project_id) is not None, "Project 2 is not in the list of projects"
-
-            # ideal voting
-            if project1.true_impact > project2.true_impact:
-                project1_vote, project2_vote = 1, 0
-            else:
-                project1_vote, project2_vote = 0, 1
-
-            vote_obj = PairwiseRankingVote(
-                self,  # pass the voter information to the project, although in the real round this won't be done to keep votes anonymous
-                project1,
-                project2,
-                project1_vote,
-                project2_vote
-            )
-            self.votes.append(vote_obj)
-            # assign the vote received to each project
-            project1.add_vote(vote_obj)  # vote_obj will have a self-reference to project1
-            project2.add_vote(vote_obj)  # vote_obj will have a self-reference to project2
+        # ideal voting
+        self._cast_drawn_votes(view)
 
     def cast_skewed_towards_impact_votes(self, view, use_impact_delta=True):
         """
         view - a list of tuples, where the values are the projects to vote on
                pairwise to the agent to vote on
         """
+        self._cast_drawn_votes(view, use_impact_delta=use_impact_delta)
+
+    def _cast_drawn_votes(self, view, use_impact_delta=True):
+        """
+        Draws the outcome of every pair in the view with draw_pairwise_outcomes and records
+        them in the ledger as one block
+        """
         self._prevote_checks()
-        
+        projects = self.project_population
+        view_ix = view_to_ix(view, projects)
+        order, val1 = self.draw_pairwise_outcomes(
+            view_ix, self.perceived_impact(), projects.project_ids, self.rng, use_impact_delta=use_impact_delta
+        )
+        self.record_votes(view_ix, order, val1)
+
+    def record_votes(self, view_ix, order, val1):
+        """
+        Records the outcomes drawn by draw_pairwise_outcomes in the ledger, as one block
+        """
+        projects = self.project_population
+        # the vote is recorded once in the ledger, and shows up in the votes of both projects
+        voted_ids = projects.project_ids[view_ix[order]]
+        projects.ledger.add_votes(
+            self.badgeholder_id, voted_ids[:, 0], project2_id=voted_ids[:, 1], val1=val1, val2=~val1
+        )
+
+    def draw_pairwise_outcomes(self, view_ix, true_impact, project_ids, rng, use_impact_delta=True):
+        """
+        The voting model behind cast_votes.  Draws the outcome of every pair in the view
+        from rng, one pair at a time in voting order, and returns the outcomes.
+
+        view_ix - an (n_pairs x 2) integer array of project indices to vote on
+        true_impact - the true impact of each project index
+        project_ids - the project_id of each project index
+
+        Returns (order, val1): the rows of view_ix that were voted on, in voting order,
+        and whether the first project of each of those pairs won.
+        """
+        num_votes = len(view_ix)
+        if self.voting_style == 'random':
+            return np.arange(num_votes), rng.random(num_votes) < 0.5
+        elif self.voting_style == 'perfect':
+            order = np.arange(num_votes)
+            return order, true_impact[view_ix[:, 0]] > true_impact[view_ix[:, 1]]
+        elif self.voting_style != 'skewed_towards_impact':
+            raise ValueError(f"{self.voting_style} not yet implemented!")
+
         # determine which indices to vote on, based on laziness
-        num_votes = len(view)
         num_votes_to_cast = int(num_votes * (1 - self.laziness))
         if num_votes_to_cast == 0:
-            return
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=bool)
         elif self.laziness == 0:
-            view_to_process = view
+            order = np.arange(num_votes)
+        elif self.coi_factor > 0:
+            order_coi, order_remaining = [], []
+            for coi_project_ix in self.coi_project_ix_vec:
+                is_coi_pair = (project_ids[view_ix[:, 0]] == coi_project_ix) | (project_ids[view_ix[:, 1]] == coi_project_ix)
+                order_coi.append(np.flatnonzero(is_coi_pair))
+                order_remaining.append(np.flatnonzero(~is_coi_pair))
+                num_votes_to_cast -= len(order_coi[-1])
+            order_remaining = np.concatenate(order_remaining)
+            if num_votes_to_cast < len(order_remaining):
+                order_remaining = order_remaining[rng.choice(len(order_remaining), num_votes_to_cast, replace=False)]
+            order = np.concatenate(order_coi + [order_remaining])
         else:
-            # ensure that the badgeholder will vote on all views w/ the COI projects, if they are
-            # engaging in COI
-            view_remaining = []
-            view_to_process = []
-            if self.coi_factor > 0:
-                for coi_project_ix in self.coi_project_ix_vec:
-                    for pair in view:
-                        project1, project2 = pair
-                        if coi_project_ix == project1.project_id or coi_project_ix == project2.project_id:
-                            view_to_process.append(pair)
-                            num_votes_to_cast -= 1
-                        else:
-                            view_remaining.append(pair)
-                if num_votes_to_cast < len(view_remaining):
-                    view_remaining = self.rng.choice(view_remaining, num_votes_to_cast, replace=False)
-                view_to_process.extend(view_remaining)
-            else:
-                view_to_process = self.rng.choice(view, num_votes_to_cast, replace=False)
-            
-        for pair in view_to_process:
-            project1, project2 = pair
-            assert self.project_population.get_project(project1.project_id) is not None, "Project 1 is not in the list of projects"
-            assert self.project_population.get_project(project2.project_id) is not None, "Project 2 is not in the list of projects"
-
-            voted_on_pair = False
-            if self.coi_factor > 0:
-                # draw a random number to determine if the badgeholder will vote for a COI project, based on the coi factor
-                probability_coi_vote = self.coi_factor*0.5 + 0.5
-                if self.rng.random() < probability_coi_vote:
-                    vote_coi = True
-                else:
-                    vote_coi = False
-
-                if project1.project_id in self.coi_project_ix_vec:
-                    if vote_coi:
-                        project1_vote, project2_vote = 1, 0
-                    else:
-                        project1_vote, project2_vote = 0, 1
-                    voted_on_pair = True
-                elif project2.project_id in self.coi_project_ix_vec:
-                    # print(f'ID{self.badgeholder_id} --> COI voting for {project2.project_id} // 2')
-                    if vote_coi:
-                        project1_vote, project2_vote = 0, 1
-                    else:
-                        project1_vote, project2_vote = 1, 0
-                    voted_on_pair = True
-                
-            if not voted_on_pair:
-                # decide which project to vote for, based on expertise
-                # determine the probability that the voter will vote for the correct project
-                # TODO: this mapping should be generalized!
-                if self.expertise == 0:
-                    probability_correct_vote = 0.5
-                elif self.expertise == 1:
-                    probability_correct_vote = 1.0
-                else:
-                    if use_impact_delta:
-                        impact_delta = np.abs(project1.true_impact - project2.true_impact)
-
-                        # experiment w/ different fn's, but make this cleaner once experimentation is complete
-                        # probability_correct_vote = 0.5 + impact_delta * 0.5 / (1-self.expertise)
-                        probability_correct_vote = self.expertise * impact_delta + 0.5
-                    else:
-                        probability_correct_vote = self.expertise  # this is mapped to the updated Q+T expertise mapping function
-                probability_correct_vote = np.clip(probability_correct_vote, 0, 1)
-                
-                # determine from a random draw whether the vote will be correct or incorrect
-                make_correct_vote = False
-                if self.rng.random() < probability_correct_vote:
-                    make_correct_vote = True
-
-                # map this to the vote
-                if make_correct_vote:
-                    if project1.true_impact > project2.true_impact:
-                        project1_vote, project2_vote = 1, 0
-                    else:
-                        project1_vote, project2_vote = 0, 1
-                else:
-                    if project1.true_impact > project2.true_impact:
-                        project1_vote, project2_vote = 0, 1
-                    else:
-                        project1_vote, project2_vote = 1, 0
-
-            vote_obj = PairwiseRankingVote(
-                self,  # pass the voter information to the project, although in the real round this won't be done to keep votes anonymous
-                project1,
-                project2,
-                project1_vote,
-                project2_vote
-            )
-            self.votes.append(vote_obj)
-            # assign the vote received to each project
-            project1.add_vote(vote_obj)  # vote_obj will have a self-reference to project1
-            project2.add_vote(vote_obj)  # vote_obj will have a self-reference to project2
+            order = rng.choice(num_votes, num_votes_to_cast, replace=False)
+
+        impact1 = true_impact[view_ix[order, 0]]
+        impact2 = true_impact[view_ix[order, 1]]
+        if self.coi_factor > 0:
+            # a COI pair takes one draw, every other pair takes the COI draw and the expertise draw
+            coi1 = np.isin(project_ids[view_ix[order, 0]], self.coi_project_ix_vec)
+            coi2 = np.isin(project_ids[view_ix[order, 1]], self.coi_project_ix_vec) & ~coi1
+            num_draws = np.where(coi1 | coi2, 1, 2)
+            draws = rng.random(num_draws.sum())
+            first_draw_ix = np.cumsum(num_draws) - num_draws
+            vote_coi = draws[first_draw_ix] < self.coi_factor*0.5 + 0.5
+            rv = draws[np.minimum(first_draw_ix + 1, len(draws) - 1)]
+        else:
+            rv = rng.random(len(order))
+
+        if self.expertise == 0:
+            probability_correct_vote = 0.5
+        elif self.expertise == 1:
+            probability_correct_vote = 1.0
+        elif use_impact_delta:
+            probability_correct_vote = self.expertise * np.abs(impact1 - impact2) + 0.5
+        else:
+            probability_correct_vote = self.expertise  # this is mapped to the updated Q+T expertise mapping function
+        probability_correct_vote = np.clip(probability_correct_vote, 0, 1)
+        make_correct_vote = rv < probability_correct_vote
+        val1 = make_correct_vote == (impact1 > impact2)
+        if self.coi_factor > 0:
+            val1[coi1] = vote_coi[coi1]
+            val1[coi2] = ~vote_coi[coi2]
+        return order, val1
 
     def cast_random_votes(self, view):
         """
         view - a list of tuples, where the values are the projects to vote on
                pairwise to the agent to vote on
         """
-        self._prevote_checks()
-
-        for pair in view:
-            project1, project2 = pair
-            assert self.project_population.get_project(project1.project_id) is not None, "Project 1 is not in the list of projects"
-            assert self.project_population.get_project(project2.project_id) is not None, "Project 2 is not in the list of projects"
-            
-            # for now, randomly decide which one to rank higher
-            if self.rng.random() < 0.5:
-                project1_vote, project2_vote = 1, 0
-            else:
-                project1_vote, project2_vote = 0, 1
-            vote_obj = PairwiseRankingVote(
-                self,  # pass the voter information to the project, although in the real round this won't be done to keep votes anonymous
-                project1, 
-                project2,
-                project1_vote,
-                project2_vote
-            )
-            self.votes.append(vote_obj)
-            # assign the vote received to each project
-            project1.add_vote(vote_obj)  # vote_obj will have a self-reference to project1
-            project2.add_vote(vote_obj)  # vote_obj will have a self-reference to project2
+        # for now, randomly decide which one to rank higher
+        self._cast_drawn_votes(view)
 
 
 class PairwiseBadgeholderPopulation(BadgeHolderPopulation):
+    badgeholder_class = PairwiseBadgeholder
+
     def __init__(self):
         self.badgeholders = []
         self.num_badgeholders = 0
+        self.badgeholderid2ix = {}
         self.rng = None
 
+        # the communication model run by communicate (see agents.communication), if any
+        self.communication = None
+        self.communicated_ratings = None
+
     def add_badgeholders(self, badgeholders):
+        for ix, badgeholder in enumerate(badgeholders, start=self.num_badgeholders):
+            self.badgeholderid2ix.setdefault(badgeholder.badgeholder_id, ix)
         self.badgeholders.extend(badgeholders)
         self.num_badgeholders += len(badgeholders)
 
+    def get_badgeholder(self, badgeholder_id):
+        ix = self.badgeholderid2ix.get(badgeholder_id)
+        if ix is None:
+            return None
+        return self.badgeholders[ix]
+
+    def has_badgeholder(self, badgeholder_id):
+        return badgeholder_id in self.badgeholderid2ix
+
     def send_application_information(self, projects):
         for badgeholder in self.badgeholders:
             badgeholder.send_applications_to_voter(projects)
 
+    def set_communication(self, communication):
+        """
+        communication - e.g. a DeGrootCommunication, whose graph has one node per
+                        badgeholder, in the order they were added
+        """
+        self.communication = communication
+
     def communicate(self):
-        pass
+        """
+        Runs the communication model, if one is set, and gives every badgeholder its row
+        of the resulting (badgeholders x projects) rating matrix, which it then votes by
+        instead of the true impacts
+        """
+        if self.communication is None or self.num_badgeholders == 0:
+            return
+        projects = self.badgeholders[0].project_population
+        expertise = [badgeholder.expertise for badgeholder in self.badgeholders]
+        self.communicated_ratings = self.communication.communicate(projects.true_impact, expertise, self._signal_rng())
+        for bb, badgeholder in enumerate(self.badgeholders):
+            badgeholder.communicated_ratings = self.communicated_ratings[bb]
 
-    def cast_votes(self, view=None, randomize_order=False):
+    def cast_votes(self, view=None, randomize_order=False, vectorized=False, executor=None):
+        """
+        vectorized - if True, the votes of all badgeholders are drawn together by the
+                     pairwise_outcomes kernel (see cast_votes_vectorized)
+        executor - a concurrent.futures thread or process pool to draw the votes on, which
+                   needs independent streams (see set_random_streams).  The votes are the
+                   same as without one, and are recorded in population order.
+        """
+        if vectorized:
+            assert view is not None, "A view is needed to cast pairwise votes"
+            self.cast_votes_vectorized(view)
+            return
+        if executor is not None:
+            assert view is not None, "A view is needed to cast pairwise votes"
+            self._cast_votes_concurrently(view, randomize_order, executor)
+            return
         # TODO: this is clunky - fix it
         if view is None:
             for badgeholder in self.badgeholders:
                 badgeholder.cast_votes()
+        elif isinstance(view, PairView):
+            # each badgeholder's pairs are put in random order by permuting their indices
+            for bb, badgeholder in enumerate(self.badgeholders):
+                pair_ix = self._pairs_for(view, bb, badgeholder, randomize_order)
+                first_vote = badgeholder.project_population.ledger.num_votes
+                badgeholder.cast_votes(pair_ix)
+                if view.adaptive:
+                    self._observe_votes(view, badgeholder.project_population, first_vote)
+        elif self.independent_streams:
+            for badgeholder in self.badgeholders:
+                badgeholder.cast_votes(badgeholder.rng.permutation(view) if randomize_order else view)
         else:
             for badgeholder in self.badgeholders:
                 if randomize_order:
                     view = self.rng.permutation(view)
                 badgeholder.cast_votes(view)
 
+    def _pairs_for(self, view, bb, badgeholder, randomize_order):
+        rng = self._rng_of(badgeholder)
+        pair_ix = view.pairs_for(bb, rng)
+        if randomize_order:
+            pair_ix = pair_ix[rng.permutation(len(pair_ix))]
+        return pair_ix
+
+    def _cast_votes_concurrently(self, view, randomize_order, executor):
+        """
+        Picks every badgeholder's pairs in turn, draws the outcomes on executor and records
+        them in population order
+        """
+        assert self.independent_streams, "Concurrent voting needs a random stream per badgeholder (set_random_streams)"
+        assert not (isinstance(view, PairView) and view.adaptive), "An adaptive view needs the votes one badgeholder at a time"
+        if self.num_badgeholders == 0:
+            return
+        projects = self.badgeholders[0].project_population
+        view_ix = []
+        for bb, badgeholder in enumerate(self.badgeholders):
+            if isinstance(view, PairView):
+                view_ix.append(self._pairs_for(view, bb, badgeholder, randomize_order))
+            else:
+                view_ix.append(view_to_ix(badgeholder.rng.permutation(view) if randomize_order else view, projects))
+        draws = map_draws(
+            executor, self.badgeholders, 'draw_pairwise_outcomes',
+            [(view_ix[bb], badgeholder.perceived_impact(), projects.project_ids) for bb, badgeholder in enumerate(self.badgeholders)]
+        )
+        for bb, (badgeholder, (order, val1)) in enumerate(zip(self.badgeholders, draws)):
+            badgeholder.record_votes(view_ix[bb], order, val1)
+
+    def cast_votes_vectorized(self, view, max_block_size=2**24):
+        """
+        Casts the votes of every badgeholder on the view with the pairwise_outcomes kernel,
+        which follows the same voting model as cast_votes but makes its draws for many
+        badgeholders at once.  The votes are recorded in view order, since the order in
+        which a badgeholder goes through the pairs does not change the outcomes.
+
+        Badgeholders are processed in blocks of at most max_block_size (badgeholder, pair)
+        entries, to bound the memory used for large views.
+        """
+        if self.num_badgeholders == 0:
+            return
+        projects = self.badgeholders[0].project_population
+        if isinstance(view, PairView) and not view.shared:
+            # every badgeholder sees different pairs
+            for bb, badgeholder in enumerate(self.badgeholders):
+                first_vote = projects.ledger.num_votes
+                rng = self._rng_of(badgeholder)
+                self._record_outcomes(projects, view.pairs_for(bb, rng), [badgeholder], rng)
+                if view.adaptive:
+                    self._observe_votes(view, projects, first_vote)
+            return
+
+        view_ix = view.pair_ix if isinstance(view, PairView) else view_to_ix(view, projects)
+        if self.independent_streams:
+            # the draws of each badgeholder come from its own stream
+            for badgeholder in self.badgeholders:
+                self._record_outcomes(projects, view_ix, [badgeholder], badgeholder.rng)
+            return
+        block_size = max(1, max_block_size // max(len(view_ix), 1))
+        for start in range(0, self.num_badgeholders, block_size):
+            self._record_outcomes(projects, view_ix, self.badgeholders[start:start + block_size], self.rng)
+
+    @staticmethod
+    def _observe_votes(view, projects, first_vote):
+        """
+        Tells an adaptive view who won each of the votes in the ledger from row first_vote on
+        """
+        ledger = projects.ledger
+        votes = slice(first_vote, ledger.num_votes)
+        val1, val2 = ledger.val1[votes], ledger.val2[votes]
+        # ties carry no information about the ranking
+        decided = val1 != val2
+        # the first project with a given ID wins, like ProjectPopulation.get_project_ix
+        sorter = np.argsort(projects.project_ids, kind='stable')
+        project1_ix = sorter[np.searchsorted(projects.project_ids, ledger.project_id[votes][decided], sorter=sorter)]
+        project2_ix = sorter[np.searchsorted(projects.project_ids, ledger.project2_id[votes][decided], sorter=sorter)]
+        project1_wins = (val1 > val2)[decided]
+        view.observe(np.where(project1_wins, project1_ix, project2_ix), np.where(project1_wins, project2_ix, project1_ix))
+
+    def _pairwise_outcomes(self, projects, view_ix, badgeholders, rng):
+        impact = projects.true_impact
+        if self.communicated_ratings is not None:
+            impact = np.stack([badgeholder.communicated_ratings for badgeholder in badgeholders])
+        return pairwise_outcomes(view_ix, impact, projects.project_ids, badgeholders, rng)
+
+    def _record_outcomes(self, projects, view_ix, badgeholders, rng):
+        outcomes = self._pairwise_outcomes(projects, view_ix, badgeholders, rng)
+        rows, pair_ix = np.nonzero(outcomes >= 0)
+        val1 = outcomes[rows, pair_ix]
+        view_ids = projects.project_ids[view_ix[pair_ix]]
+        badgeholder_ids = np.array([badgeholder.badgeholder_id for badgeholder in badgeholders])
+        projects.ledger.add_votes(
+            badgeholder_ids[rows], view_ids[:, 0], project2_id=view_ids[:, 1], val1=val1, val2=1 - val1
+        )
+
+    def cast_votes_batch(self, projects, rounds, view=None, randomize_order=False, vectorized=False, max_block_size=2**24):
+        """
+        Casts the votes of one round per item of rounds, an iterable which sets up the
+        population's random streams (and communicated ratings) for each round as it is
+        iterated (see RoundSimulation.run_batch).  The draws of every round are those of
+        cast_votes(view, randomize_order, vectorized) on the same streams.
+
+        With vectorized and a shared stream, a round is one pairwise_outcomes call per
+        block of badgeholders; otherwise the draws are made one badgeholder at a time, in
+        the order of the streams.
+
+        Returns (view_ix, outcomes, num_projects): the (n_pairs x 2) array of project indices
+        in the view, an int8 array shaped (rounds x badgeholders x n_pairs) which is 1 if the
+        first project of the pair won, 0 if the second won and -1 if the pair was not voted
+        on, and the number of projects (the view may leave some of them out).
+        """
+        assert view is not None, "A view is needed to cast pairwise votes"
+        is_pair_view = isinstance(view, PairView)
+        if is_pair_view:
+            assert view.shared, "Batches need a view that is the same for every badgeholder"
+            view_ix = view.pair_ix.astype(np.int64)
+        else:
+            view_ix = view_to_ix(view, projects)
+        project_ids = projects.project_ids
+        num_pairs = len(view_ix)
+
+        outcomes = []
+        for _ in rounds:
+            round_outcomes = np.full((self.num_badgeholders, num_pairs), -1, dtype=np.int8)
+            if vectorized:
+                # cast_votes_vectorized votes on the pairs in view order
+                if self.independent_streams:
+                    for bb, badgeholder in enumerate(self.badgeholders):
+                        round_outcomes[bb] = self._pairwise_outcomes(projects, view_ix, [badgeholder], badgeholder.rng)
+                else:
+                    block_size = max(1, max_block_size // max(num_pairs, 1))
+                    for start in range(0, self.num_badgeholders, block_size):
+                        badgeholders = self.badgeholders[start:start + block_size]
+                        round_outcomes[start:start + len(badgeholders)] = self._pairwise_outcomes(projects, view_ix, badgeholders, self.rng)
+                outcomes.append(round_outcomes)
+                continue
+            # the permutations compound across badgeholders for a list of pairs on a shared
+            # stream, as in cast_votes
+            pair_ix = np.arange(num_pairs)
+            for bb, badgeholder in enumerate(self.badgeholders):
+                if randomize_order and (is_pair_view or self.independent_streams):
+                    pair_ix = self._rng_of(badgeholder).permutation(num_pairs)
+                elif randomize_order:
+                    pair_ix = pair_ix[self.rng.permutation(num_pairs)]
+                order, val1 = badgeholder.draw_pairwise_outcomes(view_ix[pair_ix], badgeholder.perceived_impact(), project_ids, badgeholder.rng)
+                round_outcomes[bb, pair_ix[order]] = val1
+            outcomes.append(round_outcomes)
+        outcomes = np.array(outcomes, dtype=np.int8).reshape(len(outcomes), self.num_badgeholders, num_pairs)
+        return view_ix, outcomes, projects.num_projects
+
     def get_all_votes(self):
         all_votes = []
         for badgeholder in self.badgeholders:
@@ -271,5 +563,11 @@ class PairwiseBadgeholderPopulation(BadgeHolderPopulation):
 
     def set_random_generator(self, rng):
         self.rng = rng
+        self.independent_streams = False
+        for badgeholder in self.badgeholders:
+            badgeholder.set_random_generator(rng)
+
+    def reset_all(self):
+        self.communicated_ratings = None
         for badgeholder in self.badgeholders:
-            badgeholder.set_random_generator(rng)
\ No newline at end of file
+            badgeholder.reset_voter()
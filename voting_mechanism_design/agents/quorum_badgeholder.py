@@ -1,5 +1,4 @@
-from voting_mechanism_design.agents.definitions import BadgeHolder, BadgeHolderPopulation
-from voting_mechanism_design.voting_designs.quorum import QuorumVote
+from voting_mechanism_design.agents.definitions import BadgeHolder, BadgeHolderPopulation, map_draws
 import numpy as np
 
 def create_monotonic_array(max_val, min_val, length, total_sum):
@@ -20,7 +19,116 @@ def create_monotonic_array(max_val, min_val, length, total_sum):
 
     return x
 
+def _linspace_rows(start, stop, num):
+    """
+    np.linspace(start[i], stop[i], num) for every row i, computed exactly the way
+    np.linspace computes it for scalar endpoints
+    """
+    y = np.arange(num, dtype=float) * ((stop - start) / max(num - 1, 1))[:, None] + start[:, None]
+    if num > 1:
+        y[:, -1] = stop
+    return y
+
+def create_monotonic_arrays(max_vals, min_vals, lengths, total_sums, num_cols):
+    """
+    create_monotonic_array for many ballots at once.  Row i of the returned
+    (len(lengths) x num_cols) array holds create_monotonic_array(max_vals[i], min_vals[i],
+    lengths[i], total_sums[i]), padded with NaN.  Ballots of the same length are built in
+    one broadcast.
+    """
+    max_vals, min_vals, total_sums = (np.broadcast_to(np.asarray(v, dtype=float), np.shape(lengths)) for v in (max_vals, min_vals, total_sums))
+    lengths = np.asarray(lengths)
+    ballots = np.full((len(lengths), num_cols), np.nan)
+    for length in np.unique(lengths):
+        if length == 0:
+            continue
+        rows = np.flatnonzero(lengths == length)
+        x = _linspace_rows(max_vals[rows], min_vals[rows], length)
+        x /= x.sum(axis=1, keepdims=True)
+        x *= total_sums[rows, None]
+
+        # if any values exceed the first_value, we need to adjust the values
+        mm1 = x[:, 0]
+        mm2 = x[:, -1]
+        delta = np.where(mm1 > max_vals[rows], mm1 - max_vals[rows], 0)
+        x = _linspace_rows(mm1 - delta, mm2 + delta, length)
+        x /= x.sum(axis=1, keepdims=True)
+        x *= total_sums[rows, None]
+        ballots[rows, :length] = x
+    return ballots
+
+def shuffle_ratings(ratings_ix, p_shuffle, rng):
+    """
+    Each entry of ratings_ix is selected with probability p_shuffle, and the selected
+    entries are randomly permuted amongst themselves.  Draws one uniform per entry and
+    then one permutation, as QuorumBadgeholder.expertise2alignment always has.
+    """
+    ratings_ix = ratings_ix.copy()
+    ix_to_shuffle = np.flatnonzero(rng.uniform(0, 1, len(ratings_ix)) < p_shuffle)
+    ratings_ix[ix_to_shuffle] = rng.permutation(ratings_ix[ix_to_shuffle])
+    return ratings_ix
+
+def shuffle_ratings_matrix(ratings_ix, p_shuffle, rng):
+    """
+    shuffle_ratings for a whole population at once: row i of the returned
+    (len(p_shuffle) x len(ratings_ix)) matrix is ratings_ix with each entry selected with
+    probability p_shuffle[i] and the selected entries permuted.  The draws are made for
+    all rows together, so they differ from calling shuffle_ratings row by row.
+
+    ratings_ix can also be a matrix, with a row per entry of p_shuffle to shuffle.
+    """
+    num_rows, num_cols = len(p_shuffle), ratings_ix.shape[-1]
+    selected = rng.uniform(0, 1, (num_rows, num_cols)) < np.asarray(p_shuffle)[:, None]
+    # the selected positions of every row, in order, and the same positions in a random
+    # order (first in each row of shuffled_positions)
+    rows, positions = np.nonzero(selected)
+    random_keys = np.where(selected, rng.random((num_rows, num_cols)), np.inf)
+    shuffled_positions = np.argsort(random_keys, axis=1)
+    num_selected = selected.sum(axis=1)
+    rank = np.arange(len(rows)) - (np.cumsum(num_selected) - num_selected)[rows]
+
+    ratings_ix = np.broadcast_to(ratings_ix, (num_rows, num_cols))
+    shuffled = ratings_ix.copy()
+    shuffled[rows, positions] = ratings_ix[rows, shuffled_positions[rows, rank]]
+    return shuffled
+
+def remaining_funds(total_funds, ballots):
+    """
+    total_funds (one per row of ballots) less the amounts of the row, NaN for no vote.  The
+    amounts are subtracted one at a time from left to right, as casting the votes one by
+    one does, so the funds left are the same to the last bit.
+    """
+    ballots = np.atleast_2d(ballots)
+    steps = np.concatenate([np.reshape(np.asarray(total_funds, dtype=float), (-1, 1)), np.where(np.isnan(ballots), 0, ballots)], axis=1)
+    return np.subtract.accumulate(steps, axis=1)[:, -1]
+
+def move_coi_projects(sorted_project_indices, coi_project_ids, coi_factors):
+    """
+    Moves the COI project of each row of sorted_project_indices up by coi_factor of the
+    steps it would take to reach the top, shifting the projects it passes down by one.
+    Rows with a coi_factor of 0 are left as they are.
+    """
+    num_rows, num_cols = sorted_project_indices.shape
+    coi_factors = np.asarray(coi_factors, dtype=float)
+    has_coi = coi_factors > 0
+    coi_ix = np.zeros(num_rows, dtype=np.int64)
+    coi_ix[has_coi] = np.argmax(sorted_project_indices[has_coi] == np.asarray(coi_project_ids)[has_coi, None], axis=1)
+    target_ix = coi_ix - (coi_ix * coi_factors).astype(np.int64)
+    assert np.all(target_ix >= 0), "COI project index is negative!"
+
+    cols = np.arange(num_cols)
+    source_ix = np.where((cols > target_ix[:, None]) & (cols <= coi_ix[:, None]), cols - 1, cols)
+    source_ix[np.arange(num_rows), target_ix] = coi_ix
+    return np.take_along_axis(sorted_project_indices, source_ix, axis=1)
+
 class QuorumBadgeholder(BadgeHolder):
+    # slotted, since populations can hold many of them
+    __slots__ = (
+        'badgeholder_id', 'ledger', 'initial_funds', 'total_funds', 'min_vote', 'max_vote', 'funds_spent',
+        'laziness_factor', 'expertise_factor', 'coi_factor', 'coi_project_id_vec', 'project_population', 'rng',
+        'communicated_ratings', 'debug', 'sorted_project_indices', 'personal_ratings_ix', 'vote_amounts',
+    )
+
     def __init__(
         self, 
         badgeholder_id, 
@@ -31,9 +139,10 @@ class QuorumBadgeholder(BadgeHolder):
         expertise=1, 
         coi_factor=0, 
         coi_project_id_vec=[],  # a list of project IDs that the badgeholder has a conflict of interest with
+        debug=False,  # keep the arrays of the last cast_votes, see below
     ):
         self.badgeholder_id = badgeholder_id
-        self.votes = []
+        self.ledger = None
 
         # accounting
         self.initial_funds = total_funds
@@ -52,18 +161,37 @@ class QuorumBadgeholder(BadgeHolder):
 
         self.project_population = None
         self.rng=None
+        # the badgeholder's ratings of the projects after the communication phase, if any,
+        # which take the place of the true impacts in expertise2alignment
+        self.communicated_ratings = None
 
-        # debugging
+        # debugging: with debug, the ratings, order and ballot of the last cast_votes are
+        # kept here.  They are not by default, since they would keep one array per project
+        # (or a whole matrix, when voting vectorized) alive per badgeholder between runs.
+        self.debug = debug
         self.sorted_project_indices = None
         self.personal_ratings_ix = None
+        self.vote_amounts = None
 
     def reset_voter(self):
-        self.votes = []
+        self.ledger = None
         self.funds_spent = 0
         self.total_funds = self.initial_funds
+        self.communicated_ratings = None
+
+    @property
+    def votes(self):
+        """
+        QuorumVote objects built from the ledger, for code that still works with them
+        """
+        if self.ledger is None:
+            return []
+        return self.ledger.get_votes(self.ledger.voter_rows(self.badgeholder_id))
 
     def send_applications_to_voter(self, project_population):
         self.project_population = project_population
+        self.ledger = project_population.ledger
+        self.ledger.register_voter(self)
 
     def set_random_generator(self, rng):
         self.rng = rng
@@ -73,75 +201,57 @@ class QuorumBadgeholder(BadgeHolder):
             amount = None
         if amount:
             self.total_funds -= amount
-        vote_obj = QuorumVote(self, project, amount)
-        self.votes.append(vote_obj)
-        project.add_vote(vote_obj)
+        self.project_population.ledger.add_quorum_vote(self.badgeholder_id, project.project_id, amount)
 
     def cast_votes(self):
         projects = self.project_population.get_projects()
-        num_projects = self.project_population.num_projects
-        ballot_size = int((1 - self.laziness_factor) * num_projects)
 
         personal_ratings_ix = self.expertise2alignment(projects)
         sorted_project_indices = np.argsort(-personal_ratings_ix)
 
-        # TODO: model COI here
-        # The approach we take is as follows:
         # The COI project will be sorted proportional to the COI factor.  If COI factor is 1, then
         # the COI project will be the first project in the list.  If COI factor is 0.5, then the project
         #  will be moved by half as many steps as it would if it were COI=1, and so on.
         if self.coi_factor > 0:
-            coi_project_id = self.coi_project_id_vec[0]
-            for p in projects:
-                if p.project_id == coi_project_id:
-                    coi_project_idx = np.where(sorted_project_indices == p.project_id)[0][0]
-                    break
-            assert coi_project_idx is not None
-            # compute how many steps needed if COI_factor is 1
-            num_steps_coi_1 = np.where(sorted_project_indices == coi_project_id)[0][0]
-            num_steps_actual = int(num_steps_coi_1 * self.coi_factor)
-            ix_actual = coi_project_idx - num_steps_actual
-
-            # print(coi_project_id, coi_project_idx, num_steps_coi_1, num_steps_actual, ix_actual)
-            assert ix_actual >= 0, "COI project index is negative!"
-
-            # print('before', np.where(sorted_project_indices == coi_project_id)[0][0])
-            # print(sorted_project_indices)
-            # move the COI project by num_steps_actual
-            vv = sorted_project_indices[coi_project_idx]
-            sorted_project_indices = np.delete(sorted_project_indices, coi_project_idx)
-            sorted_project_indices = np.insert(sorted_project_indices, ix_actual, vv)
-            # print('after', np.where(sorted_project_indices == coi_project_id)[0][0])
-            # print(sorted_project_indices)
+            sorted_project_indices = move_coi_projects(
+                sorted_project_indices[None, :], [self.coi_project_id_vec[0]], [self.coi_factor]
+            )[0]
+        self.record_votes(sorted_project_indices)
+
+    def record_votes(self, sorted_project_indices):
+        """
+        The part of cast_votes which makes no random draws: fills the ballot in the order
+        of sorted_project_indices and records it in the ledger
+        """
+        num_projects = self.project_population.num_projects
+        ballot_size = int((1 - self.laziness_factor) * num_projects)
 
         vote_amounts = np.ones(num_projects)*-999
-        vote_amounts[0:ballot_size] = create_monotonic_array(self.max_vote, self.min_vote, ballot_size, self.total_funds)
-        for ix, project_idx in enumerate(sorted_project_indices):
-            project = self.project_population.get_project(project_idx)
-            vote_amt = vote_amounts[ix]
-            if vote_amt == -999:
-                vote_amt = None
-            self.cast_vote(project, vote_amt)
+        vote_amounts[0:ballot_size] = self.ballot_amounts(num_projects)[0:ballot_size]
+        # the project index doubles as the project_id
+        amounts = np.where(vote_amounts == -999, np.nan, vote_amounts)
+        owned_ix = self.project_population.ownerid2ix.get(self.badgeholder_id)
+        if owned_ix:
+            amounts[np.isin(sorted_project_indices, owned_ix)] = np.nan
+        self.total_funds = remaining_funds(self.total_funds, amounts)[0]
+        self.project_population.ledger.add_votes(self.badgeholder_id, sorted_project_indices, amount=amounts)
         
-        self.sorted_project_indices = sorted_project_indices
-        self.vote_amounts = vote_amounts
+        if self.debug:
+            self.sorted_project_indices = sorted_project_indices
+            self.vote_amounts = vote_amounts
 
     def expertise2alignment(self, projects):
-        true_project_impact_vec = [project.true_impact for project in projects]
+        if self.communicated_ratings is not None:
+            true_project_impact_vec = self.communicated_ratings
+        else:
+            true_project_impact_vec = [project.true_impact for project in projects]
         
         personal_ratings_ix = np.argsort(true_project_impact_vec)  # this is perfect rating
-        p_shuffle_vec = np.zeros(len(personal_ratings_ix))
-        for ii in range(len(personal_ratings_ix)):
-            p_shuffle_vec[ii] = (1-self.expertise_factor)      # currently, not dependent on the "true impact" of a project, but can be in the future
-        # find which indices we should shuffle
-        ix_to_shuffle = []
-        for ii in range(len(p_shuffle_vec)):
-            rv = self.rng.uniform(0,1)
-            if rv < p_shuffle_vec[ii]:
-                ix_to_shuffle.append(ii)
-        # shuffle the indices that need to be
-        personal_ratings_ix[ix_to_shuffle] = self.rng.permutation(personal_ratings_ix[ix_to_shuffle])
-        self.personal_ratings_ix = personal_ratings_ix
+        # each index is shuffled with probability 1-expertise, currently not dependent on the
+        # "true impact" of a project, but can be in the future
+        personal_ratings_ix = shuffle_ratings(personal_ratings_ix, 1 - self.expertise_factor, self.rng)
+        if self.debug:
+            self.personal_ratings_ix = personal_ratings_ix
         return personal_ratings_ix
 
     def get_votes(self):
@@ -149,13 +259,53 @@ class QuorumBadgeholder(BadgeHolder):
             {'project_id': v.project.project_id, 'amount': v.amount} 
             for v in self.votes
         ]
+
+    def draw_sorted_project_indices(self, perfect_ratings_ix, rng, return_ratings=False):
+        """
+        Array version of expertise2alignment + the COI reordering in cast_votes.  Makes
+        the same draws from rng, in the same order, but does not touch any object state.
+
+        perfect_ratings_ix - np.argsort of the true project impacts (or of the
+                             communicated_ratings, if there are any)
+        return_ratings - if True, returns (sorted_project_indices, personal_ratings_ix)
+        """
+        personal_ratings_ix = shuffle_ratings(perfect_ratings_ix, 1 - self.expertise_factor, rng)
+        sorted_project_indices = np.argsort(-personal_ratings_ix)
+        if self.coi_factor > 0:
+            sorted_project_indices = move_coi_projects(
+                sorted_project_indices[None, :], [self.coi_project_id_vec[0]], [self.coi_factor]
+            )[0]
+        if return_ratings:
+            return sorted_project_indices, personal_ratings_ix
+        return sorted_project_indices
+
+    def ballot_amounts(self, num_projects):
+        """
+        The amounts this badgeholder assigns to its 1st, 2nd, ... ranked project, with NaN
+        for the projects that fall outside of the ballot.
+        """
+        ballot_size = int((1 - self.laziness_factor) * num_projects)
+        vote_amounts = np.full(num_projects, np.nan)
+        if ballot_size > 0:
+            vote_amounts[0:ballot_size] = create_monotonic_array(self.max_vote, self.min_vote, ballot_size, self.total_funds)
+        return vote_amounts
     
 class QuorumBadgeholderPopulation(BadgeHolderPopulation):
+    badgeholder_class = QuorumBadgeholder
+
     def __init__(self):
         self.badgeholders = []
         self.num_badgeholders = 0
+        self.badgeholderid2ix = {}
+        self.rng = None
+
+        # the communication model run by communicate (see agents.communication), if any
+        self.communication = None
+        self.communicated_ratings = None
 
     def add_badgeholders(self, badgeholders):
+        for ix, badgeholder in enumerate(badgeholders, start=self.num_badgeholders):
+            self.badgeholderid2ix.setdefault(badgeholder.badgeholder_id, ix)
         self.badgeholders.extend(badgeholders)
         self.num_badgeholders += len(badgeholders)
 
@@ -163,24 +313,216 @@ class QuorumBadgeholderPopulation(BadgeHolderPopulation):
         return self.badgeholders
 
     def get_badgeholder(self, badgeholder_id):
-        for badgeholder in self.badgeholders:
-            if badgeholder.badgeholder_id == badgeholder_id:
-                return badgeholder
-        return None
+        ix = self.badgeholderid2ix.get(badgeholder_id)
+        if ix is None:
+            return None
+        return self.badgeholders[ix]
+
+    def has_badgeholder(self, badgeholder_id):
+        return badgeholder_id in self.badgeholderid2ix
 
     def send_application_information(self, projects):
         for badgeholder in self.badgeholders:
             badgeholder.send_applications_to_voter(projects)
 
+    def set_communication(self, communication):
+        """
+        communication - e.g. a DeGrootCommunication, whose graph has one node per
+                        badgeholder, in the order they were added
+        """
+        self.communication = communication
+
     def communicate(self):
+        """
+        Runs the communication model, if one is set, and gives every badgeholder its row
+        of the resulting (badgeholders x projects) rating matrix.  Without one, the
+        badgeholders keep rating the projects by their true impact.
+        """
         # implement different communication schemes here, including
         # negative and positive based on the things we want to test
-        pass
+        if self.communication is None or self.num_badgeholders == 0:
+            return
+        projects = self.badgeholders[0].project_population
+        expertise = [badgeholder.expertise_factor for badgeholder in self.badgeholders]
+        self.communicated_ratings = self.communication.communicate(projects.true_impact, expertise, self._signal_rng())
+        for bb, badgeholder in enumerate(self.badgeholders):
+            badgeholder.communicated_ratings = self.communicated_ratings[bb]
 
-    def cast_votes(self):
+    def _perfect_ratings_ix(self, projects):
+        """
+        np.argsort of the true impacts, or of each badgeholder's communicated ratings
+        (one row per badgeholder) after a communication phase
+        """
+        if self.communicated_ratings is not None:
+            return np.argsort(self.communicated_ratings, axis=1)
+        return np.argsort(projects.true_impact)
+
+    def cast_votes(self, vectorized=False, executor=None):
+        """
+        vectorized - if True, the votes of all badgeholders are drawn and cast together
+                     (see cast_votes_vectorized), which is much faster for large populations
+                     but makes different draws than letting each badgeholder vote in turn
+        executor - a concurrent.futures thread or process pool to draw the votes on, which
+                   needs independent streams (see set_random_streams).  The votes are the
+                   same as without one, and are recorded in population order.
+        """
+        if vectorized:
+            self.cast_votes_vectorized()
+            return
+        if executor is not None:
+            self._cast_votes_concurrently(executor)
+            return
         for badgeholder in self.badgeholders:
             badgeholder.cast_votes()
 
+    def _cast_votes_concurrently(self, executor):
+        assert self.independent_streams, "Concurrent voting needs a random stream per badgeholder (set_random_streams)"
+        if self.num_badgeholders == 0:
+            return
+        perfect_ratings_ix = np.broadcast_to(
+            self._perfect_ratings_ix(self.badgeholders[0].project_population),
+            (self.num_badgeholders, self.badgeholders[0].project_population.num_projects)
+        )
+        draws = map_draws(
+            executor, self.badgeholders, 'draw_sorted_project_indices',
+            [(perfect_ratings_ix[bb],) for bb in range(self.num_badgeholders)], return_ratings=True
+        )
+        for badgeholder, (sorted_project_indices, personal_ratings_ix) in zip(self.badgeholders, draws):
+            if badgeholder.debug:
+                badgeholder.personal_ratings_ix = personal_ratings_ix
+            badgeholder.record_votes(sorted_project_indices)
+
+    def cast_votes_vectorized(self):
+        """
+        Casts the votes of every badgeholder with whole-population array operations: one
+        (badgeholders x projects) matrix of shuffle draws, a row-wise argsort, the COI moves
+        of all rows at once and one broadcast per ballot size.  The votes are appended to
+        the ledger as a single block.  Every badgeholder must share the same projects and
+        random generator, as set up by send_application_information / set_random_generator,
+        unless each has a stream of its own (set_random_streams), which its shuffle is then
+        drawn from.
+        """
+        if self.num_badgeholders == 0:
+            return
+        projects = self.badgeholders[0].project_population
+        num_projects = projects.num_projects
+        rng = self.badgeholders[0].rng
+
+        perfect_ratings_ix = self._perfect_ratings_ix(projects)
+        expertise = np.array([badgeholder.expertise_factor for badgeholder in self.badgeholders], dtype=float)
+        if self.independent_streams:
+            # every badgeholder shuffles its ratings with draws from its own stream
+            perfect_ratings_ix = np.broadcast_to(perfect_ratings_ix, (self.num_badgeholders, num_projects))
+            personal_ratings_ix = np.stack([
+                shuffle_ratings(perfect_ratings_ix[bb], 1 - expertise[bb], badgeholder.rng)
+                for bb, badgeholder in enumerate(self.badgeholders)
+            ])
+        else:
+            personal_ratings_ix = shuffle_ratings_matrix(perfect_ratings_ix, 1 - expertise, rng)
+        sorted_project_indices = np.argsort(-personal_ratings_ix, axis=1)
+        coi_factors = np.array([badgeholder.coi_factor for badgeholder in self.badgeholders], dtype=float)
+        coi_project_ids = [badgeholder.coi_project_id_vec[0] if badgeholder.coi_factor > 0 else -1 for badgeholder in self.badgeholders]
+        sorted_project_indices = move_coi_projects(sorted_project_indices, coi_project_ids, coi_factors)
+
+        ballots = self._ballots(num_projects)
+        # the project index doubles as the project_id
+        for bb, badgeholder in enumerate(self.badgeholders):
+            owned_ix = projects.ownerid2ix.get(badgeholder.badgeholder_id)
+            if owned_ix:
+                ballots[bb, np.isin(sorted_project_indices[bb], owned_ix)] = np.nan
+        total_funds = remaining_funds([badgeholder.total_funds for badgeholder in self.badgeholders], ballots)
+        badgeholder_ids = [badgeholder.badgeholder_id for badgeholder in self.badgeholders]
+        projects.ledger.add_votes(
+            np.repeat(badgeholder_ids, num_projects), sorted_project_indices.ravel(), amount=ballots.ravel()
+        )
+
+        for bb, badgeholder in enumerate(self.badgeholders):
+            badgeholder.total_funds = total_funds[bb]
+            if badgeholder.debug:
+                # copies, so that the matrices are not kept alive
+                badgeholder.personal_ratings_ix = personal_ratings_ix[bb].copy()
+                badgeholder.sorted_project_indices = sorted_project_indices[bb].copy()
+
+    def _ballots(self, num_projects, total_funds=None):
+        """
+        The ballot_amounts of every badgeholder, as a (badgeholders x projects) array, filled
+        from total_funds (one per badgeholder) or from their current total_funds
+        """
+        if total_funds is None:
+            total_funds = [badgeholder.total_funds for badgeholder in self.badgeholders]
+        return create_monotonic_arrays(
+            [badgeholder.max_vote for badgeholder in self.badgeholders],
+            [badgeholder.min_vote for badgeholder in self.badgeholders],
+            [int((1 - badgeholder.laziness_factor) * num_projects) for badgeholder in self.badgeholders],
+            total_funds,
+            num_projects
+        )
+
+    def cast_votes_batch(self, projects, rounds, vectorized=False):
+        """
+        Casts the votes of one round per item of rounds, an iterable which sets up the
+        population's random streams (and communicated ratings) for each round as it is
+        iterated (see RoundSimulation.run_batch).  The draws of every round are those of
+        cast_votes(vectorized=vectorized) on the same streams.  Like cast_votes, the project
+        index doubles as the project_id.
+
+        Only the shuffle draws are made round by round: one (badgeholders x projects) draw
+        per round with vectorized and a shared stream, otherwise one per badgeholder, since
+        the size of each permutation depends on the uniforms drawn before it in the
+        stream.  The rankings, COI moves and ballots of all rounds are then computed on the
+        (rounds x badgeholders x projects) tensor at once.
+
+        Returns an array of vote amounts shaped (rounds x badgeholders x projects), with
+        NaN wherever no vote was cast.
+        """
+        num_projects = projects.num_projects
+        expertise = np.array([badgeholder.expertise_factor for badgeholder in self.badgeholders], dtype=float)
+        personal_ratings_ix = []
+        for _ in rounds:
+            perfect_ratings_ix = self._perfect_ratings_ix(projects)
+            if vectorized and not self.independent_streams and self.num_badgeholders > 0:
+                personal_ratings_ix.append(shuffle_ratings_matrix(perfect_ratings_ix, 1 - expertise, self.badgeholders[0].rng))
+                continue
+            perfect_ratings_ix = np.broadcast_to(perfect_ratings_ix, (self.num_badgeholders, num_projects))
+            round_ratings_ix = np.empty((self.num_badgeholders, num_projects), dtype=np.int64)
+            for bb, badgeholder in enumerate(self.badgeholders):
+                round_ratings_ix[bb] = shuffle_ratings(perfect_ratings_ix[bb], 1 - expertise[bb], badgeholder.rng)
+            personal_ratings_ix.append(round_ratings_ix)
+        num_rounds = len(personal_ratings_ix)
+        personal_ratings_ix = np.array(personal_ratings_ix, dtype=np.int64).reshape(num_rounds, self.num_badgeholders, num_projects)
+
+        # the ratings are a permutation of 0..num_projects-1, so np.argsort(-ratings) is its
+        # inverse, reversed, which a scatter gives in linear time
+        sorted_project_indices = np.empty(personal_ratings_ix.shape, dtype=np.int64)
+        np.put_along_axis(
+            sorted_project_indices,
+            num_projects - 1 - personal_ratings_ix,
+            np.broadcast_to(np.arange(num_projects), personal_ratings_ix.shape),
+            axis=-1
+        )
+        coi_factors = np.array([badgeholder.coi_factor for badgeholder in self.badgeholders], dtype=float)
+        if np.any(coi_factors > 0):
+            coi_project_ids = [badgeholder.coi_project_id_vec[0] if badgeholder.coi_factor > 0 else -1 for badgeholder in self.badgeholders]
+            sorted_project_indices = move_coi_projects(
+                sorted_project_indices.reshape(-1, num_projects), np.tile(coi_project_ids, num_rounds), np.tile(coi_factors, num_rounds)
+            ).reshape(sorted_project_indices.shape)
+
+        # the ix-th ranked project of each badgeholder receives the ix-th ballot amount, of
+        # a ballot filled from the badgeholder's initial funds, as in a fresh run
+        ballots = self._ballots(num_projects, [badgeholder.initial_funds for badgeholder in self.badgeholders])
+        amounts = np.empty(sorted_project_indices.shape)
+        np.put_along_axis(
+            amounts, 
+            sorted_project_indices, 
+            np.broadcast_to(ballots, sorted_project_indices.shape), 
+            axis=-1
+        )
+        for bb, badgeholder in enumerate(self.badgeholders):
+            owned_ix = projects.ownerid2ix.get(badgeholder.badgeholder_id)
+            if owned_ix:
+                amounts[:, bb, owned_ix] = np.nan
+        return amounts
+
     def get_all_votes(self):
         all_votes = []
         for badgeholder in self.badgeholders:
@@ -188,9 +530,12 @@ class QuorumBadgeholderPopulation(BadgeHolderPopulation):
         return all_votes
 
     def set_random_generator(self,rng):
+        self.rng = rng
+        self.independent_streams = False
         for badgeholder in self.badgeholders:
             badgeholder.set_random_generator(rng)
 
     def reset_all(self):
+        self.communicated_ratings = None
         for badgeholder in self.badgeholders:
             badgeholder.reset_voter()
\ No newline at end of file
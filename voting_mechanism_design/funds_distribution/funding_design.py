@@ -1,6 +1,213 @@
+import itertools
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+def _water_fill_split(sorted_scores, cumulative, num_funded, budget, max_cap):
+    """
+    How water_fill splits budget between the num_funded largest scores: (num_capped, lam),
+    where the num_capped largest get max_cap and the others lam * score.  The number
+    capped is the smallest k for which the (k+1)-th largest score is not over the cap at
+    lam = (budget - k * max_cap) / (the sum of the scores after the k-th).
+    """
+    if max_cap is None:
+        return 0, budget / cumulative[num_funded]
+    num_capped = np.arange(num_funded)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lam = (budget - num_capped * max_cap) / (cumulative[num_funded] - cumulative[num_capped])
+    fits = lam * sorted_scores[:num_funded] <= max_cap
+    if not fits.any():
+        return num_funded, 0.0
+    first = np.argmax(fits)
+    return first, lam[first]
+
+def water_fill(scores, budget, max_cap=None, min_payout=0):
+    """
+    Splits budget between projects in proportion to their scores, subject to:
+      - no project gets more than max_cap, and the excess is redistributed to the others
+        in proportion to their scores;
+      - projects whose share would be below min_payout get nothing, and their share is
+        redistributed the same way;
+      - NaN and non-positive scores get nothing.
+
+    The funded projects are those with the m largest scores, for the largest m whose
+    smallest share is still at least min_payout, and get min(max_cap, lam * score).  The
+    shares only shrink as m grows, so m is found by a binary search, and the projects to
+    cap for a given m by a scan of the cumulative sums of the sorted scores: one sort,
+    O(P log P), instead of repeated passes of redistribution.  If every funded project is
+    capped, the rest of the budget is left unallocated.
+    """
+    scores = np.asarray(scores, dtype=float)
+    allocations = np.zeros(len(scores))
+    eligible = np.flatnonzero(scores > 0)
+    if len(eligible) == 0 or budget <= 0:
+        return allocations
+    order = eligible[np.argsort(-scores[eligible], kind='stable')]
+    sorted_scores = scores[order]
+    cumulative = np.concatenate([[0.0], np.cumsum(sorted_scores)])
+
+    def smallest_share(num_funded):
+        num_capped, lam = _water_fill_split(sorted_scores, cumulative, num_funded, budget, max_cap)
+        return max_cap if num_capped == num_funded else lam * sorted_scores[num_funded - 1]
+
+    lo, hi = 0, len(order)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if smallest_share(mid) >= min_payout:
+            lo = mid
+        else:
+            hi = mid - 1
+    num_funded = lo
+    if num_funded == 0:
+        return allocations
+
+    num_capped, _ = _water_fill_split(sorted_scores, cumulative, num_funded, budget, max_cap)
+    allocations[order[:num_capped]] = max_cap
+    rest = order[num_capped:num_funded]
+    if num_capped == 0 and num_funded == len(order):
+        # every project with a positive score is funded in proportion to it: divide by the
+        # plain sum over all of the scores, as the designs always have.  The others are
+        # zeroed rather than dropped, which keeps the sum bit-for-bit scores.sum() when
+        # they are zeros.
+        total = np.where(scores > 0, scores, 0).sum()
+    else:
+        total = cumulative[num_funded] - cumulative[num_capped]
+    budget_left = budget - num_capped * max_cap if num_capped else budget
+    allocations[rest] = scores[rest] / total * budget_left
+    return allocations
+
 class FundingDesign(ABC):
+    # The allocation stage shared by the designs (see token_amounts): with a max_funding,
+    # the scores are turned into token amounts by water_fill, with the max_cap and
+    # min_payout, rounded to token_decimals; without one, a project's token amount is its
+    # score.  Designs which take these as arguments set them in __init__.
+    max_funding = None
+    max_cap = None
+    min_payout = 0
+    token_decimals = 2
+
     @abstractmethod
     def allocate_funds(self, projects):
-        pass
\ No newline at end of file
+        pass
+
+    def token_amounts(self, scores):
+        """
+        The token amount of each project from its score (NaN counts as 0).  scores can also
+        be a (rounds x projects) matrix, of which every row is allocated max_funding.
+        """
+        scores = np.nan_to_num(np.asarray(scores, dtype=float), nan=0.0)
+        if self.max_funding is None:
+            return scores
+        if scores.ndim == 2:
+            allocations = np.zeros(scores.shape)
+            for rr, row in enumerate(scores):
+                allocations[rr] = water_fill(row, self.max_funding, max_cap=self.max_cap, min_payout=self.min_payout)
+        else:
+            allocations = water_fill(scores, self.max_funding, max_cap=self.max_cap, min_payout=self.min_payout)
+        return allocations if self.token_decimals is None else np.round(allocations, self.token_decimals)
+
+    def allocate_tokens(self, projects, scores):
+        """
+        Sets the token_amount of every project from its score, and returns the amounts
+        """
+        allocations = self.token_amounts(scores)
+        for project, allocation in zip(projects, allocations):
+            project.token_amount = allocation
+        return allocations
+
+    @classmethod
+    def from_grid(cls, grid):
+        """
+        One design per configuration of grid, a dictionary of constructor argument -> list
+        of values, in the order itertools.product gives them
+        """
+        names = list(grid)
+        return [cls(**dict(zip(names, values))) for values in itertools.product(*[grid[name] for name in names])]
+
+    @staticmethod
+    def map_project_ix(projects, project_ids):
+        """
+        Maps each of project_ids onto its position in projects, or -1 if it is not one of
+        them.  The first project with a given ID wins, like ProjectPopulation.get_project.
+        """
+        ids = np.array([project.project_id for project in projects], dtype=np.int64)
+        project_ids = np.asarray(project_ids, dtype=np.int64)
+        project_ix = np.full(len(project_ids), -1, dtype=np.int64)
+        if len(ids) == 0:
+            return project_ix
+        # np.unique gives the index of the first occurrence of every ID
+        unique_ids, first_ix = np.unique(ids, return_index=True)
+        pos = np.minimum(np.searchsorted(unique_ids, project_ids), len(unique_ids) - 1)
+        found = unique_ids[pos] == project_ids
+        project_ix[found] = first_ix[pos[found]]
+        return project_ix
+
+    @staticmethod
+    def shared_ledger(projects):
+        """
+        The VoteLedger of projects, or None if they do not all share one
+        """
+        ledgers = {id(project.ledger) for project in projects}
+        ledger = projects[0].ledger if len(projects) > 0 else None
+        return ledger if len(ledgers) == 1 else None
+
+class BatchFundingDesign(FundingDesign):
+    """
+    A design which can score many rounds at once, as RoundSimulation.run_batch does
+    """
+    @abstractmethod
+    def allocate_funds_batch(self, votes):
+        """
+        Batched counterpart of allocate_funds, for the votes returned by a badgeholder
+        population's cast_votes_batch.  Returns (scores, token_amounts), both
+        (rounds x projects): the token amounts are those the allocation stage gives every
+        round (see token_amounts).
+        """
+        pass
+
+class IncrementalFundingDesign(FundingDesign):
+    """
+    A design whose scores can be kept up to date as votes are added or removed, without
+    tallying every vote again.  allocate_funds sets ledger, the VoteLedger shared by the
+    projects, which the votes are added to and removed from.
+    """
+    @abstractmethod
+    def add_votes(self, voter_id, project_ids, amounts):
+        """
+        Casts a block of votes: records them in the ledger of the projects and in the
+        running tally started by allocate_funds, to be scored by update_scores
+        """
+        pass
+
+    @abstractmethod
+    def remove_votes(self, rows):
+        """
+        Removes the votes in the given rows of the ledger, from the ledger and from the
+        running tally
+        """
+        pass
+
+    def remove_voter(self, badgeholder_id):
+        """
+        Takes every vote of a badgeholder out of the round, and returns them as the
+        (project_ids, amounts) to give add_voter to flip the badgeholder back in
+        """
+        rows = self.ledger.voter_rows(badgeholder_id)
+        votes = (self.ledger.project_id[rows].copy(), self.ledger.amount[rows].copy())
+        self.remove_votes(rows)
+        return votes
+
+    def add_voter(self, badgeholder_id, votes):
+        """
+        Casts the (project_ids, amounts) votes of a badgeholder, after the votes cast so far
+        """
+        project_ids, amounts = votes
+        self.add_votes(badgeholder_id, project_ids, amounts)
+
+    @abstractmethod
+    def update_scores(self):
+        """
+        Re-scores the projects whose votes changed, and returns the project ID -> score
+        dictionary
+        """
+        pass
@@ -1,10 +1,24 @@
 import numpy as np
 
 from voting_mechanism_design.funds_distribution.funding_design import FundingDesign
+from voting_mechanism_design.funds_distribution.threshold_and_aggregate import ThresholdAndAggregate
 
 class OpQuorum(FundingDesign):
-    def __init__(self, max_funding):
+    """
+    The Optimism RetroPGF design: a ThresholdAndAggregate scoring whose scores are then
+    normalized so that the funds add up to max_funding, with an optional cap per project
+    and minimum payout (see FundingDesign.token_amounts).
+
+    No quorum or min_amount is applied unless given; RetroPGF 3 used
+    OpQuorum(max_funding, quorum=17, min_amount=1500).
+    """
+    def __init__(self, max_funding, scoring_method='median', quorum=0, min_amount=0, max_cap=None, min_payout=0):
         self.max_funding = max_funding
+        self.scoring_method = scoring_method
+        self.quorum = quorum
+        self.min_amount = min_amount
+        self.max_cap = max_cap
+        self.min_payout = min_payout
 
         self.projects = []
         self.voters = []
@@ -19,40 +33,29 @@ class OpQuorum(FundingDesign):
         self.voters.extend(voters)
         self.num_voters += len(voters)
 
-    def calculate_allocations(self, scoring_method, quorum, min_amount, normalize=True):        
-        scores = []
-        for project in self.projects:
-            votes = project.get_votes()
-            if len(votes) < quorum:
-                score = 0
-            else:
-                if scoring_method == 'median':
-                    score = np.median(votes)
-                elif scoring_method == 'mean':
-                    score = np.mean(votes)
-                elif scoring_method == 'quadratic':
-                    score = sum(np.sqrt(votes))
-                elif scoring_method == 'outliers':
-                    lo = np.quantile(votes, .25)
-                    hi = np.quantile(votes, .75)
-                    score = np.mean([v for v in votes if lo <= v <= hi])
-                else:
-                    score = sum(votes)            
-                if score < min_amount:
-                    score = 0            
+    def allocate_funds(self, projects):
+        self.projects = list(projects)
+        self.num_projects = len(self.projects)
+        self.calculate_allocations(self.scoring_method, self.quorum, self.min_amount)
+        return {project.project_id: project.score for project in self.projects}
+
+    def calculate_allocations(self, scoring_method, quorum, min_amount, normalize=True):
+        """
+        Scores the projects added so far and sets their token amounts: their shares of
+        max_funding, or their scores if not normalize.  Returns the list of token amounts.
+        """
+        if len(self.projects) == 0:
+            return []
+        scoring = ThresholdAndAggregate(scoring_method, quorum, min_amount)
+        project_ix, amounts = scoring._flat_vote_amounts(self.projects)
+        _, scores = scoring.score_votes(project_ix, amounts, len(self.projects))
+        for project, score in zip(self.projects, scores):
             project.score = score
-            scores.append(score)
-        
-        total_score = sum(scores)
-        allocations = []
-        for i, project in enumerate(self.projects):
-            if normalize:
-                if total_score == 0:
-                    allocation = 0
-                else:
-                    allocation = np.round(scores[i] / total_score * self.max_funding, 2)
-            else:
-                allocation = scores[i]
-            project.token_amount = allocation
-            allocations.append(allocation)
-        return allocations
\ No newline at end of file
+
+        if normalize:
+            allocations = self.allocate_tokens(self.projects, scores)
+        else:
+            allocations = np.asarray(scores, dtype=float)
+            for project, allocation in zip(self.projects, allocations):
+                project.token_amount = allocation
+        return list(allocations)
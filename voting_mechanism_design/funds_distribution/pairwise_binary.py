@@ -1,10 +1,168 @@
 import numpy as np
 
-from voting_mechanism_design.funds_distribution.funding_design import FundingDesign
+from voting_mechanism_design.funds_distribution.funding_design import BatchFundingDesign
+from voting_mechanism_design.voting_designs.ranking import PairwiseRankingVote
 
-class PairwiseBinary(FundingDesign):
-    def __init__(self):
-        pass
+def win_counts(winner_ix, loser_ix, num_projects):
+    """
+    Sparse (COO) win-count matrix: entry k says that project winner[k] beat project
+    loser[k] counts[k] times
+    """
+    keys, counts = np.unique(winner_ix * num_projects + loser_ix, return_counts=True)
+    return keys // num_projects, keys % num_projects, counts
+
+def fit_bradley_terry(winner, loser, counts, num_projects, alpha=0.01, init_params=None, max_iter=1000, tol=1e-6):
+    """
+    Maximum-likelihood Bradley-Terry strengths from a sparse win-count matrix, using the
+    minorization-maximization (MM) updates of Hunter (2004):
+
+        p_i <- W_i / sum_j n_ij / (p_i + p_j)
+
+    where W_i is the number of wins of project i and n_ij the number of comparisons
+    between i and j.  The updates are accelerated with SQUAREM (Varadhan & Roland, 2008),
+    which needs about a third of the plain MM iterations.  alpha adds that many virtual
+    wins in both directions to every pair that was compared, so that the estimate exists
+    even if a project never won or never lost.
+
+    Returns the log-strengths, centered to mean zero (the same convention as choix).
+    Projects which were never compared get a log-strength of 0, and (only possible when
+    alpha is 0) projects which never won get -inf.
+    """
+    # fold the matrix into unordered pairs a < b, with n_ab comparisons in total
+    lo, hi = np.minimum(winner, loser), np.maximum(winner, loser)
+    keys, pair_ix = np.unique(lo * num_projects + hi, return_inverse=True)
+    a, b = keys // num_projects, keys % num_projects
+    ab = np.concatenate([a, b])
+    n = np.bincount(pair_ix, weights=counts, minlength=len(keys)) + 2 * alpha
+    num_pairs = np.bincount(ab, minlength=num_projects)
+    wins = np.bincount(winner, weights=counts, minlength=num_projects) + alpha * num_pairs
+
+    params = np.zeros(num_projects)
+    params[(num_pairs > 0) & (wins == 0)] = -np.inf
+    won = wins > 0
+    if not won.any():
+        return params
+    log_wins = np.log(wins[won])
+    p = np.zeros(num_projects)  # the projects which never won keep a strength of 0
+
+    def mm_step(x):
+        p[won] = np.exp(x)
+        d = n / (p[a] + p[b])
+        x_new = log_wins - np.log(np.bincount(ab, weights=np.concatenate([d, d]), minlength=num_projects)[won])
+        # fix the scale, which the model leaves free
+        return x_new - np.mean(x_new)
+
+    if init_params is None or not np.all(np.isfinite(init_params[won])):
+        x = np.zeros(won.sum())
+    else:
+        x = init_params[won] - np.mean(init_params[won])
+    num_iter = 0
+    while num_iter < max_iter:
+        x1 = mm_step(x)
+        x2 = mm_step(x1)
+        num_iter += 2
+        if np.max(np.abs(x2 - x1)) < tol:
+            x = x2
+            break
+        r = x1 - x
+        v = x2 - x1 - r
+        step = -np.sqrt((r @ r) / (v @ v)) if v @ v > 0 else -1.0
+        step = min(step, -1.0)
+        # an MM step from the extrapolated point keeps the iteration stable
+        x = mm_step(x - 2 * step * r + step**2 * v)
+        num_iter += 1
+    params[won] = x
+    return params
+
+class PairwiseBinary(BatchFundingDesign):
+    """
+    Scores projects by fitting a Bradley-Terry model to the pairwise votes.  The score of
+    a project is its log-strength, and the funds are split in proportion to the strengths
+    by the allocation stage (see FundingDesign.token_amounts).
+
+    Each fit is warm-started from the previous one, which makes repeated Monte Carlo
+    runs over the same projects converge in a few iterations.
+    """
+    def __init__(self, max_funding=None, alpha=0.01, max_iter=1000, tol=1e-6, max_cap=None, min_payout=0):
+        self.max_funding = max_funding
+        self.max_cap = max_cap
+        self.min_payout = min_payout
+        self.alpha = alpha
+        self.max_iter = max_iter
+        self.tol = tol
+
+        self.params = None
+
+    def fit(self, winner_ix, loser_ix, num_projects):
+        winner, loser, counts = win_counts(winner_ix, loser_ix, num_projects)
+        init_params = self.params if self.params is not None and len(self.params) == num_projects else None
+        self.params = fit_bradley_terry(
+            winner, loser, counts, num_projects,
+            alpha=self.alpha, init_params=init_params, max_iter=self.max_iter, tol=self.tol
+        )
+        return self.params
 
     def allocate_funds(self, projects):
-        pass
\ No newline at end of file
+        if len(projects) == 0:
+            return {}
+        project1_ids, project2_ids, val1, val2 = self._pairwise_votes(projects)
+        project1_ix = self.map_project_ix(projects, project1_ids)
+        project2_ix = self.map_project_ix(projects, project2_ids)
+        # ties carry no information about the ranking
+        decided = (project1_ix >= 0) & (project2_ix >= 0) & (val1 != val2)
+        project1_wins = (val1 > val2)[decided]
+        project1_ix, project2_ix = project1_ix[decided], project2_ix[decided]
+        winner_ix = np.where(project1_wins, project1_ix, project2_ix)
+        loser_ix = np.where(project1_wins, project2_ix, project1_ix)
+
+        params = self.fit(winner_ix, loser_ix, len(projects))
+        allocations = self.calculate_allocations(params)
+
+        projectid2score = {}
+        for ix, project in enumerate(projects):
+            project.score = params[ix]
+            project.token_amount = allocations[ix]
+            projectid2score[project.project_id] = params[ix]
+        return projectid2score
+
+    def _pairwise_votes(self, projects):
+        """
+        The (project1_id, project2_id, val1, val2) columns of the pairwise votes on projects
+        """
+        ledger = self.shared_ledger(projects)
+        if ledger is not None:
+            is_pairwise = ledger.project2_id >= 0
+            return ledger.project_id[is_pairwise], ledger.project2_id[is_pairwise], ledger.val1[is_pairwise], ledger.val2[is_pairwise]
+
+        # projects that do not share a ledger are gathered one at a time.  A vote is taken
+        # from its project1 only, so that it is counted once.
+        votes = [
+            (vote.project1.project_id, vote.project2.project_id, vote.val1, vote.val2)
+            for project in projects for vote in project.votes
+            if isinstance(vote, PairwiseRankingVote) and vote.project1 is project
+        ]
+        columns = np.array(votes, dtype=np.int64).reshape(-1, 4)
+        return columns[:, 0], columns[:, 1], columns[:, 2], columns[:, 3]
+
+    def calculate_allocations(self, params):
+        """
+        The token amounts of the projects: their strengths, or their shares of max_funding
+        """
+        return self.token_amounts(np.exp(params))
+
+    def allocate_funds_batch(self, votes):
+        """
+        votes - (view_ix, outcomes, num_projects) as returned by
+                PairwiseBadgeholderPopulation.cast_votes_batch
+
+        Returns (log-strengths, token_amounts), as (rounds x projects) arrays.
+        """
+        view_ix, outcomes, num_projects = votes
+        params = np.zeros((outcomes.shape[0], num_projects))
+        for rr in range(outcomes.shape[0]):
+            _, pair_ix = np.nonzero(outcomes[rr] >= 0)
+            project1_wins = outcomes[rr][outcomes[rr] >= 0] == 1
+            winner_ix = np.where(project1_wins, view_ix[pair_ix, 0], view_ix[pair_ix, 1])
+            loser_ix = np.where(project1_wins, view_ix[pair_ix, 1], view_ix[pair_ix, 0])
+            params[rr] = self.fit(winner_ix, loser_ix, num_projects)
+        return params, self.calculate_allocations(params)
\ No newline at end of file
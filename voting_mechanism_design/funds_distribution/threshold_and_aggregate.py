@@ -1,37 +1,551 @@
-from .funding_design import FundingDesign
+import math
+from random import Random
+
+from .funding_design import BatchFundingDesign, IncrementalFundingDesign
 import numpy as np
 
-class ThresholdAndAggregate(FundingDesign):
-    def __init__(self, scoring_method, quorum, min_amount=0):
+def _row_means(values, counts):
+    """
+    np.mean of the first counts[i] entries of each row of values.  Rows are grouped by
+    count so that every mean is taken over a contiguous row, which keeps the result
+    bit-for-bit equal to np.mean on the list of those values.
+    """
+    means = np.full(len(counts), np.nan)
+    for n in np.unique(counts):
+        if n == 0:
+            continue
+        rows = np.flatnonzero(counts == n)
+        means[rows] = np.mean(values[rows, :n], axis=1)
+    return means
+
+def _aggregate_rows(values, counts, scoring_method):
+    """
+    Applies scoring_method to the first counts[i] entries of each row of values, which
+    must be the vote amounts of one project in the order the votes were cast.  Matches
+    the per-project computation of ThresholdAndAggregate.allocate_funds exactly.
+    """
+    scores = np.zeros(len(counts))
+    for n in np.unique(counts):
+        rows = np.flatnonzero(counts == n)
+        x = values[rows, :n]
+        if scoring_method in ('median', 'mean', 'outliers') and n == 0:
+            scores[rows] = np.nan
+        elif scoring_method == 'median':
+            scores[rows] = np.median(x, axis=1)
+        elif scoring_method == 'mean':
+            scores[rows] = np.mean(x, axis=1)
+        elif scoring_method == 'quadratic':
+            # python's sum() adds left to right, which is what cumsum does
+            scores[rows] = np.cumsum(np.sqrt(x), axis=1)[:, -1] if n > 0 else 0
+        elif scoring_method == 'outliers':
+            lo = np.quantile(x, .25, axis=1)
+            hi = np.quantile(x, .75, axis=1)
+            keep = (lo[:, None] <= x) & (x <= hi[:, None])
+            # move the kept values to the front of each row, preserving their order
+            kept_first = np.argsort(~keep, axis=1, kind='stable')
+            scores[rows] = _row_means(np.take_along_axis(x, kept_first, axis=1), keep.sum(axis=1))
+        else:
+            scores[rows] = np.cumsum(x, axis=1)[:, -1] if n > 0 else 0
+    return scores
+
+def _sorted_quantile(amounts, q):
+    """
+    np.quantile(amounts, q) (linear interpolation) of a sorted list, without copying it
+    """
+    virtual_ix = q * (len(amounts) - 1)
+    lo = math.floor(virtual_ix)
+    t = virtual_ix - lo
+    a, b = amounts[lo], amounts[min(lo + 1, len(amounts) - 1)]
+    # the same two-sided interpolation as numpy, for the same rounding
+    return b - (b - a) * (1 - t) if t >= 0.5 else a + (b - a) * t
+
+def _sorted_quantiles(sorted_values, counts, q):
+    """
+    np.quantile(..., q) (linear interpolation) of the first counts[i] entries of each
+    sorted row, with the same rounding as _sorted_quantile.  Rows without votes get NaN.
+    """
+    if sorted_values.shape[1] == 0:
+        return np.full(len(counts), np.nan)
+    rows = np.arange(len(counts))
+    virtual_ix = q * (counts - 1)
+    lo = np.floor(virtual_ix).astype(np.int64)
+    t = virtual_ix - lo
+    has_votes = counts > 0
+    lo = np.where(has_votes, lo, 0)
+    a = sorted_values[rows, lo]
+    b = sorted_values[rows, np.minimum(lo + 1, np.maximum(counts - 1, 0))]
+    with np.errstate(invalid='ignore'):
+        quantiles = np.where(t >= 0.5, b - (b - a) * (1 - t), a + (b - a) * t)
+    return np.where(has_votes, quantiles, np.nan)
+
+class VoteTable:
+    """
+    The non-abstaining votes of a round grouped by project once, to be scored by any number
+    of ThresholdAndAggregate designs (see ThresholdAndAggregate.score_many).
+
+    Row i of values holds the counts[i] amounts of project i in the order they were cast.
+    The rows are also sorted once, the first time the median or the quartiles of
+    'outliers' are needed, and the aggregate of each scoring method is cached, so designs
+    which differ only in quorum or min_amount cost one threshold each.  The aggregates are
+    bit-for-bit those of _aggregate_rows.
+    """
+    def __init__(self, project_ix, amounts, num_projects):
+        # group the votes by project, keeping the order they were cast within each project
+        # (a stable sort of small integers is a radix sort, so use the smallest dtype that fits)
+        sort_dtype = np.uint16 if num_projects <= np.iinfo(np.uint16).max else np.int64
+        order = np.argsort(project_ix.astype(sort_dtype), kind='stable')
+        project_ix, amounts = project_ix[order], amounts[order]
+        self.num_projects = num_projects
+        self.counts = np.bincount(project_ix, minlength=num_projects)
+        starts = np.cumsum(self.counts) - self.counts
+        self.values = np.zeros((num_projects, self.counts.max(initial=0)))
+        self.values[project_ix, np.arange(len(project_ix)) - starts[project_ix]] = amounts
+
+        self._sorted_values = None
+        self._aggregates = {}
+
+    @property
+    def sorted_values(self):
+        """
+        values with the first counts[i] entries of each row sorted (and +inf after them)
+        """
+        if self._sorted_values is None:
+            is_vote = np.arange(self.values.shape[1]) < self.counts[:, None]
+            self._sorted_values = np.where(is_vote, self.values, np.inf)
+            self._sorted_values.sort(axis=1)
+        return self._sorted_values
+
+    def aggregate(self, scoring_method):
+        """
+        The score of every project under scoring_method, before any threshold
+        """
+        if scoring_method in self._aggregates:
+            return self._aggregates[scoring_method]
+        counts = self.counts
+        if scoring_method == 'median':
+            sorted_values, rows = self.sorted_values, np.arange(self.num_projects)
+            upper = sorted_values[rows, counts // 2] if sorted_values.shape[1] else np.zeros(self.num_projects)
+            lower = sorted_values[rows, np.maximum(counts // 2 - 1, 0)] if sorted_values.shape[1] else upper
+            # np.median averages the two middle values of an even count the same way
+            scores = np.where(counts % 2 == 1, upper, (lower + upper) / 2)
+            scores[counts == 0] = np.nan
+        elif scoring_method == 'outliers':
+            lo = _sorted_quantiles(self.sorted_values, counts, .25)
+            hi = _sorted_quantiles(self.sorted_values, counts, .75)
+            is_vote = np.arange(self.values.shape[1]) < counts[:, None]
+            keep = is_vote & (lo[:, None] <= self.values) & (self.values <= hi[:, None])
+            # move the kept values to the front of each row, preserving their order
+            kept_first = np.argsort(~keep, axis=1, kind='stable')
+            scores = _row_means(np.take_along_axis(self.values, kept_first, axis=1), keep.sum(axis=1))
+        else:
+            scores = _aggregate_rows(self.values, counts, scoring_method)
+        self._aggregates[scoring_method] = scores
+        return scores
+
+class _SkipNode:
+    __slots__ = ('vote', 'next', 'width')
+
+    def __init__(self, vote, num_levels):
+        self.vote = vote
+        self.next = [None] * num_levels
+        # the number of level-0 steps to next[level]
+        self.width = [1] * num_levels
+
+class _SortedVotes:
+    """
+    The (amount, key) votes of one project in sorted order, as an indexable skip list: a
+    vote is inserted or removed, and the k-th smallest amount found, in O(log n).
+    Indexing returns the amount, so that the list can be passed to _sorted_quantile.
+    """
+    _END = _SkipNode((math.inf, math.inf), 0)
+
+    def __init__(self, sorted_votes, random):
+        """
+        Builds the list in O(n) from votes which are already sorted, with the node at
+        position p (from 1) on 1 + (the number of trailing zeros of p) levels
+        """
+        self.size = len(sorted_votes)
+        self.num_levels = max(4, (2 * self.size + 1).bit_length())
+        self.random = random
+        self.head = _SkipNode(None, self.num_levels)
+        last = [self.head] * self.num_levels
+        last_position = [0] * self.num_levels
+        for position, vote in enumerate(sorted_votes, 1):
+            num_levels = min(self.num_levels, (position & -position).bit_length())
+            node = _SkipNode(vote, num_levels)
+            for level in range(num_levels):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level], last_position[level] = node, position
+        for level in range(self.num_levels):
+            last[level].next[level] = self._END
+            last[level].width[level] = self.size + 1 - last_position[level]
+
+    def __len__(self):
+        return self.size
+
+    def __getitem__(self, i):
+        node = self.head
+        i += 1
+        for level in reversed(range(self.num_levels)):
+            while node.width[level] <= i:
+                i -= node.width[level]
+                node = node.next[level]
+        return node.vote[0]
+
+    def _chain(self, vote):
+        """
+        The last node before vote on every level, and its position
+        """
+        chain = [None] * self.num_levels
+        positions = [0] * self.num_levels
+        node, position = self.head, 0
+        for level in reversed(range(self.num_levels)):
+            while node.next[level].vote < vote:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level], positions[level] = node, position
+        return chain, positions
+
+    def insert(self, vote):
+        chain, positions = self._chain(vote)
+        num_levels = 1
+        while num_levels < self.num_levels and self.random.random() < 0.5:
+            num_levels += 1
+        node = _SkipNode(vote, num_levels)
+        position = positions[0] + 1
+        for level in range(num_levels):
+            previous = chain[level]
+            node.next[level] = previous.next[level]
+            node.width[level] = previous.width[level] - (position - positions[level]) + 1
+            previous.next[level] = node
+            previous.width[level] = position - positions[level]
+        for level in range(num_levels, self.num_levels):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def remove(self, vote):
+        chain, _ = self._chain(vote)
+        node = chain[0].next[0]
+        assert node.vote == vote, "There is no such vote to remove"
+        for level in range(self.num_levels):
+            previous = chain[level]
+            if level < len(node.next):
+                previous.width[level] += node.width[level] - 1
+                previous.next[level] = node.next[level]
+            else:
+                previous.width[level] -= 1
+        self.size -= 1
+
+    def between(self, lo, hi):
+        """
+        The votes with lo <= amount <= hi, in sorted order
+        """
+        node = self._chain((lo, -math.inf))[0][0].next[0]
+        votes = []
+        while node.vote[0] <= hi:
+            votes.append(node.vote)
+            node = node.next[0]
+        return votes
+
+class RunningTally:
+    """
+    Running aggregates of the vote amounts of each project: the count, sum and sum of square
+    roots, and the (amount, key) votes in sorted order, an order-statistic skip list for
+    the median and quantiles.  The key of a vote orders it as cast: the 'outliers' mean
+    takes the votes between the quartiles in that order, as np.mean does.  A project's skip
+    list is only built when one of its votes is first added or removed, so that adding or
+    removing a vote takes O(log n).  The projects whose votes changed since the last score
+    are kept in dirty.
+    """
+    def __init__(self, num_projects):
+        self.count = np.zeros(num_projects, dtype=np.int64)
+        self.total = np.zeros(num_projects)
+        self.sqrt_total = np.zeros(num_projects)
+        # the sorted (amounts, keys) of the projects which do not have a skip list yet
+        self.sorted_votes = [(np.zeros(0), np.zeros(0, dtype=np.int64))] * num_projects
+        self.skip_lists = {}
+        self.random = Random(0)
+        self.dirty = set()
+
+    @classmethod
+    def from_votes(cls, project_ix, amounts, num_projects, keys=None):
+        """
+        The tally of the votes given by their project indices and amounts.  The keys
+        default to the position of each vote, i.e. the votes are taken to be in the
+        order they were cast.
+        """
+        if keys is None:
+            keys = np.arange(len(amounts))
+        tally = cls(num_projects)
+        tally.count = np.bincount(project_ix, minlength=num_projects)
+        tally.total = np.bincount(project_ix, weights=amounts, minlength=num_projects)
+        tally.sqrt_total = np.bincount(project_ix, weights=np.sqrt(amounts), minlength=num_projects)
+        order = np.lexsort((keys, amounts, project_ix))
+        bounds = np.cumsum(tally.count)
+        tally.sorted_votes = list(zip(np.split(amounts[order], bounds[:-1]), np.split(keys[order], bounds[:-1])))
+        return tally
+
+    def _skip_list(self, ix):
+        skip_list = self.skip_lists.get(ix)
+        if skip_list is None:
+            amounts, keys = self.sorted_votes[ix]
+            skip_list = _SortedVotes(list(zip(amounts.tolist(), keys.tolist())), self.random)
+            self.skip_lists[ix] = skip_list
+        return skip_list
+
+    def add(self, ix, amount, key):
+        self._skip_list(ix).insert((amount, key))
+        self.count[ix] += 1
+        self.total[ix] += amount
+        self.sqrt_total[ix] += math.sqrt(amount)
+        self.dirty.add(ix)
+
+    def remove(self, ix, amount, key):
+        """
+        Removes the vote with the given amount and key, which must have been added
+        """
+        self._skip_list(ix).remove((amount, key))
+        self.count[ix] -= 1
+        self.total[ix] -= amount
+        self.sqrt_total[ix] -= math.sqrt(amount)
+        self.dirty.add(ix)
+
+    def score(self, ix, scoring_method):
+        n = self.count[ix]
+        if n == 0:
+            return np.nan if scoring_method in ('median', 'mean', 'outliers') else 0
+        if scoring_method == 'median':
+            amounts = self._skip_list(ix)
+            return amounts[n // 2] if n % 2 else np.mean([amounts[n // 2 - 1], amounts[n // 2]])
+        elif scoring_method == 'mean':
+            return self.total[ix] / n
+        elif scoring_method == 'quadratic':
+            return self.sqrt_total[ix]
+        elif scoring_method == 'outliers':
+            amounts = self._skip_list(ix)
+            lo, hi = _sorted_quantile(amounts, .25), _sorted_quantile(amounts, .75)
+            kept = sorted(amounts.between(lo, hi), key=lambda vote: vote[1])
+            # the interpolated quartiles can leave no vote between them, as in _row_means
+            return np.mean([amount for amount, _ in kept]) if kept else np.nan
+        else:
+            return self.total[ix]
+
+class ThresholdAndAggregate(IncrementalFundingDesign, BatchFundingDesign):
+    def __init__(self, scoring_method, quorum, min_amount=0, max_funding=None, max_cap=None, min_payout=0):
         self.scoring_method = scoring_method
         self.quorum = quorum
         self.min_amount = min_amount
+        # the allocation stage, see FundingDesign.token_amounts
+        self.max_funding = max_funding
+        self.max_cap = max_cap
+        self.min_payout = min_payout
+
+        # the votes of the last allocate_funds, from which the running tally for add_votes /
+        # remove_votes is built the first time it is needed.  _row_keys holds the tally key
+        # of each row of the ledger, or -1 for the rows the tally does not count.
+        self._tally_votes = None
+        self._tally = None
+        self._row_keys = None
+        self.ledger = None
+        self.projects = None
+        self.projectid2ix = None
+        self.projectid2score = None
 
     def allocate_funds(self, projects):
+        """
+        Scores every project in one grouped pass over the flat (project, amount) arrays of
+        the cast votes, instead of one project at a time.  The scores are bit-for-bit the
+        same as computing np.median / np.mean / ... on each project's list of votes.  The
+        token amounts are set from the scores by the allocation stage.
+        """
+        ledger = self.shared_ledger(projects)
+        if ledger is not None:
+            rows, project_ix = self._ledger_vote_rows(ledger, projects)
+            amounts = ledger.amount[rows]
+            self._row_keys = np.full(ledger.num_votes, -1, dtype=np.int64)
+            self._row_keys[rows] = np.arange(len(rows))
+        else:
+            project_ix, amounts = self._flat_vote_amounts(projects)
+            self._row_keys = None
+        num_projects = len(projects)
+        _, scores = self.score_votes(project_ix, amounts, num_projects)
+
         projectid2score = {}
-        for project in projects:
-            # votes = project.get_votes()
-            votes_objs = project.votes
-            votes = [v.amount for v in votes_objs if v.amount is not None]
-            # print(project.project_id, votes)
-            if len(votes) < self.quorum:
-                score = 0
-            else:
-                if self.scoring_method == 'median':
-                    score = np.median(votes)
-                elif self.scoring_method == 'mean':
-                    score = np.mean(votes)
-                elif self.scoring_method == 'quadratic':
-                    score = sum(np.sqrt(votes))
-                elif self.scoring_method == 'outliers':
-                    lo = np.quantile(votes, .25)
-                    hi = np.quantile(votes, .75)
-                    score = np.mean([v for v in votes if lo <= v <= hi])
-                else:
-                    score = sum(votes)            
-                if score < self.min_amount:
-                    score = 0            
+        for project, score in zip(projects, scores):
             project.score = score
             projectid2score[project.project_id] = score
+        self.allocate_tokens(projects, scores)
+
+        # keep the votes, so that changes to a few of them can be re-scored incrementally
+        self._tally_votes = (project_ix, amounts, num_projects)
+        self._tally = None
+        self._next_key = len(amounts)
+        self.ledger = ledger
+        self.projects = projects
+        self.projectid2ix = {}
+        for ix, project in enumerate(projects):
+            self.projectid2ix.setdefault(project.project_id, ix)
+        self.projectid2score = projectid2score
         
-        return projectid2score
\ No newline at end of file
+        return projectid2score
+
+    def score_votes(self, project_ix, amounts, num_projects):
+        """
+        Scores num_projects projects from the flat (project index, amount) arrays of the
+        non-abstaining votes, given in the order they were cast.
+
+        Returns (counts, scores): the number of votes of each project, and the list of their
+        scores after the quorum and min_amount thresholds.
+        """
+        table = VoteTable(project_ix, amounts, num_projects)
+        counts = table.counts
+        scores = _aggregate_rows(table.values, counts, self.scoring_method)
+        return counts, [self._threshold(counts[ix], scores[ix]) for ix in range(num_projects)]
+
+    @staticmethod
+    def score_many(designs, projects):
+        """
+        The scores of projects under every one of designs (ThresholdAndAggregate instances
+        with any scoring_method, quorum and min_amount), as a (designs x projects) array.
+        The votes are grouped into one VoteTable, each scoring method is aggregated once
+        and every design only adds its thresholds.  The scores are those allocate_funds
+        would give; neither the designs nor the projects are modified.
+        """
+        scores = np.zeros((len(designs), len(projects)))
+        if len(designs) == 0 or len(projects) == 0:
+            return scores
+        table = VoteTable(*designs[0]._flat_vote_amounts(projects), len(projects))
+        for dd, design in enumerate(designs):
+            scores[dd] = design.threshold_scores(table.counts, table.aggregate(design.scoring_method))
+        return scores
+
+    def threshold_scores(self, counts, scores):
+        """
+        Array version of _threshold
+        """
+        with np.errstate(invalid='ignore'):
+            return np.where((counts < self.quorum) | (scores < self.min_amount), 0, scores)
+
+    @property
+    def tally(self):
+        if self._tally is None and self._tally_votes is not None:
+            self._tally = RunningTally.from_votes(*self._tally_votes)
+            self._tally_votes = None
+        return self._tally
+
+    def _threshold(self, count, score):
+        if count < self.quorum:
+            return 0
+        elif count == 0 and self.scoring_method not in ('median', 'mean', 'outliers'):
+            # sum() over no votes
+            return 0
+        elif score < self.min_amount:
+            return 0
+        return score
+
+    def add_votes(self, voter_id, project_ids, amounts):
+        """
+        Casts a block of votes of voter_id (amount NaN to abstain): they are appended to the
+        ledger, after every vote counted so far, and added to the running tally of the last
+        allocate_funds.  The scores are brought up to date by update_scores.
+        """
+        self._check_ledger()
+        project_ids = np.atleast_1d(np.asarray(project_ids, dtype=np.int64))
+        amounts = np.broadcast_to(np.asarray(amounts, dtype=float), project_ids.shape)
+        project_ix = np.array([self.projectid2ix.get(project_id, -1) for project_id in project_ids.tolist()], dtype=np.int64)
+        counted = (project_ix >= 0) & ~np.isnan(amounts)
+        keys = np.full(len(project_ids), -1, dtype=np.int64)
+        keys[counted] = self._next_key + np.arange(counted.sum())
+        self._next_key += int(counted.sum())
+
+        self.ledger.add_votes(voter_id, project_ids, amount=amounts)
+        self._row_keys = np.concatenate([self._row_keys, keys])
+        for ix, amount, key in zip(project_ix[counted].tolist(), amounts[counted].tolist(), keys[counted].tolist()):
+            self.tally.add(ix, amount, key)
+
+    def remove_votes(self, rows):
+        """
+        Removes the votes in the given rows of the ledger, from the ledger and from the
+        running tally
+        """
+        self._check_ledger()
+        rows = np.atleast_1d(np.asarray(rows, dtype=np.int64))
+        keys = self._row_keys[rows]
+        counted = rows[keys >= 0]
+        project_ids = self.ledger.project_id[counted].tolist()
+        for project_id, amount, key in zip(project_ids, self.ledger.amount[counted].tolist(), keys[keys >= 0].tolist()):
+            self.tally.remove(self.projectid2ix[project_id], amount, key)
+
+        self.ledger.remove_votes(rows)
+        self._row_keys = np.delete(self._row_keys, rows)
+
+    def _check_ledger(self):
+        assert self.tally is not None, "allocate_funds must be called first"
+        assert self.ledger is not None, "The projects must share a ledger"
+        assert len(self._row_keys) == self.ledger.num_votes, "The ledger was changed outside of add_votes / remove_votes"
+
+    def update_scores(self):
+        """
+        Re-scores only the projects whose votes were added or removed since the last score,
+        from the running tally.  The scores are those of a full allocate_funds over the
+        changed votes: exactly for 'median' and 'outliers', and up to the rounding of the
+        running sums for the others.  With a max_funding, every
+        token amount can change, so they are all allocated again.
+        """
+        assert self.tally is not None, "allocate_funds must be called first"
+        for ix in sorted(self.tally.dirty):
+            project = self.projects[ix]
+            score = self._threshold(self.tally.count[ix], self.tally.score(ix, self.scoring_method))
+            project.score = score
+            self.projectid2score[project.project_id] = score
+            if self.max_funding is None:
+                project.token_amount = self.token_amounts([score])[0]
+        if self.max_funding is not None and self.tally.dirty:
+            self.allocate_tokens(self.projects, [project.score for project in self.projects])
+        self.tally.dirty.clear()
+        return self.projectid2score
+
+    def _ledger_vote_rows(self, ledger, projects):
+        """
+        The rows of the non-abstaining votes on projects in ledger, in the order cast, and
+        the index into projects of each
+        """
+        cast = np.flatnonzero(~np.isnan(ledger.amount))
+        project_ix = self.map_project_ix(projects, ledger.project_id[cast])
+        in_projects = project_ix >= 0
+        return cast[in_projects], project_ix[in_projects]
+
+    def _flat_vote_amounts(self, projects):
+        """
+        The (index into projects, amount) of every non-abstaining vote, in the order cast
+        """
+        ledger = self.shared_ledger(projects)
+        if ledger is not None:
+            rows, project_ix = self._ledger_vote_rows(ledger, projects)
+            return project_ix, ledger.amount[rows]
+
+        # projects that do not share a ledger are gathered one at a time
+        amounts = [np.asarray(project.get_vote_amounts(), dtype=float) for project in projects]
+        project_ix = np.repeat(np.arange(len(projects)), [len(a) for a in amounts])
+        return project_ix, np.concatenate(amounts) if amounts else np.zeros(0)
+
+    def allocate_funds_batch(self, votes):
+        """
+        votes - an array of vote amounts shaped (rounds x badgeholders x projects), with NaN
+                where no vote was cast, as returned by QuorumBadgeholderPopulation.cast_votes_batch
+
+        Returns (scores, token_amounts), as (rounds x projects) arrays.
+        """
+        num_rounds, num_badgeholders, num_projects = votes.shape
+        values = votes.transpose(0, 2, 1).reshape(num_rounds * num_projects, num_badgeholders)
+        # move the cast votes to the front of each row, preserving the badgeholder order
+        not_cast = np.isnan(values)
+        values = np.take_along_axis(values, np.argsort(not_cast, axis=1, kind='stable'), axis=1)
+        counts = num_badgeholders - not_cast.sum(axis=1)
+
+        scores = _aggregate_rows(values, counts, self.scoring_method)
+        with np.errstate(invalid='ignore'):
+            scores[(counts < self.quorum) | (scores < self.min_amount)] = 0
+        scores = scores.reshape(num_rounds, num_projects)
+        return scores, self.token_amounts(scores)
\ No newline at end of file
@@ -0,0 +1,183 @@
+import numpy as np
+
+from voting_mechanism_design.funds_distribution.threshold_and_aggregate import ThresholdAndAggregate
+from voting_mechanism_design.legacy.op_simulator import Round, Simulation
+from voting_mechanism_design.voting_designs.ledger import VoteLedger
+
+# Runs the legacy op_simulator model on the VoteLedger and the grouped scorer of
+# ThresholdAndAggregate.  LedgerSimulation is a drop-in replacement for op_simulator.Simulation:
+# with the same np.random seed it casts the same votes, returns the same scores, allocations
+# and results, and leaves np.random in the same state.
+#
+# The votes are kept in the ledger (one row per voter and project, with the project's
+# position in round.projects as project_id), so Vote objects are not built:
+# project.votes and voter.votes stay empty, while project.num_votes, project.score,
+# project.token_amount and voter.balance_op are kept up to date as before.
+
+class LedgerRound(Round):
+    def __init__(self, max_funding):
+        super().__init__(max_funding)
+        self.ledger = VoteLedger()
+
+    def _scores(self, scoring_method, quorum, min_amount):
+        voted = ~np.isnan(self.ledger.amount)
+        design = ThresholdAndAggregate(scoring_method, quorum, min_amount)
+        _, scores = design.score_votes(self.ledger.project_id[voted], self.ledger.amount[voted], len(self.projects))
+        for project, score in zip(self.projects, scores):
+            project.score = score
+        return scores
+
+    def calculate_scores(self, scoring_method, quorum, min_amount=0):
+        scores = self._scores(scoring_method, quorum, min_amount)
+        return {project.project_id: score for project, score in zip(self.projects, scores)}
+
+    def calculate_allocations(self, scoring_method, quorum, min_amount, normalize=True):
+        scores = self._scores(scoring_method, quorum, min_amount)
+
+        total_score = sum(scores)
+        allocations = []
+        for i, project in enumerate(self.projects):
+            if normalize:
+                if total_score == 0:
+                    allocation = 0
+                else:
+                    allocation = np.round(scores[i] / total_score * self.max_funding, 2)
+            else:
+                allocation = scores[i]
+            project.token_amount = allocation
+            allocations.append(allocation)
+        return allocations
+
+class LedgerSimulation(Simulation):
+    def initialize_round(self, max_funding, min_project_vote=1, max_project_vote=16):
+        super().initialize_round(max_funding, min_project_vote, max_project_vote)
+        self.round = LedgerRound(max_funding)
+
+    def reset_round(self):
+        super().reset_round()
+        self.round.ledger.clear()
+
+    def _vote_amounts(self, balance, idx, ballot_size, scale, is_owner):
+        """
+        The legacy vote of a voter with the given balance_op on the project they rank idx.
+        The arguments are arrays which broadcast together.
+
+        Returns (amount, is_drawn, ub): the amount (NaN for None), and whether and with
+        which upper bound the legacy loop calls np.random.randint(lb, ub) for it.
+        """
+        lb = int(self.min_project_vote)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            max_vote_per_project = balance * scale / np.sqrt(ballot_size - idx)
+        votes = (idx < ballot_size) & ~(max_vote_per_project < self.min_project_vote)
+        ub = np.where(votes, np.minimum(self.max_project_vote, max_vote_per_project), 0).astype(np.int64)
+        is_drawn = votes & (lb < ub)
+        amount = np.where(is_drawn, (lb + ub) / 2, lb)
+        amount = np.where(votes & ~is_owner, amount, np.nan)
+        return amount, is_drawn, ub
+
+    def _ballots(self, max_passes=3):
+        """
+        The legacy voting rule for all voters at once.  Every voter ranks the projects the
+        same way (the legacy subjectivity scores are drawn but not used), so only the
+        running balance_op differs between the ballots.
+
+        The balances are solved for as a fixed point over the whole ballot matrix: guess
+        the amounts, replay the balances they leave with np.subtract.accumulate (the same
+        left-to-right subtractions as the legacy loop), recompute the amounts from those
+        balances and repeat.  Each pass fixes at least one more rank, and when the
+        balances are far from the vote limits (the usual case) two passes are enough.
+        Otherwise the remaining ranks are scanned one at a time after max_passes.
+
+        Returns (sorted_project_indices, amounts, is_drawn, ub, balance), where
+        amounts[v, idx] is the vote of voter v on the project ranked idx (NaN for None),
+        is_drawn / ub say where the legacy loop calls np.random.randint(lb, ub), and balance
+        is the balance_op each voter is left with.
+        """
+        projects, voters = self.round.projects, self.round.voters
+        num_projects, num_voters = len(projects), len(voters)
+        ratings = np.array([project.rating for project in projects])
+        sorted_project_indices = np.argsort(-ratings)
+
+        voter_ids = np.array([voter.voter_id for voter in voters])
+        laziness = np.array([voter.laziness_factor for voter in voters], dtype=float)
+        ballot_size = np.array([int((1 - voter.laziness_factor) * num_projects) for voter in voters], dtype=np.int64)
+        balance = np.array([voter.balance_op for voter in voters], dtype=float)
+        # balance * 1.0 is balance, so the laziness_factor == 0 case needs no branch
+        scale = np.where(laziness == 0, 1.0, laziness)
+
+        # only the ranks that are on somebody's ballot need to be looked at
+        num_ranks = min(ballot_size.max(initial=0), num_projects)
+        ranks = np.arange(num_ranks)
+        is_owner = np.zeros((num_voters, num_projects), dtype=bool)
+        for ix, project in enumerate(projects):
+            if project.owner_id is not None:
+                is_owner[:, ix] = voter_ids == project.owner_id
+        is_owner = is_owner[:, sorted_project_indices[:num_ranks]]
+
+        # the amount taken out of the balance at each rank; only a vote with a non-zero
+        # amount is, and subtracting 0 leaves the balance as it is
+        spent = np.zeros((num_voters, num_ranks))
+        for _ in range(max_passes):
+            balances = np.subtract.accumulate(np.concatenate([balance[:, None], spent], axis=1), axis=1)
+            amount, is_drawn, ub = self._vote_amounts(balances[:, :-1], ranks, ballot_size[:, None], scale[:, None], is_owner)
+            new_spent = np.where(np.isnan(amount), 0, amount)
+            is_fixed = new_spent == spent
+            spent = new_spent
+            if is_fixed.all():
+                break
+        else:
+            # the ranks before the first change are right for every voter
+            start = np.argmin(is_fixed.all(axis=0))
+            for idx in range(start, num_ranks):
+                amount[:, idx], is_drawn[:, idx], ub[:, idx] = self._vote_amounts(
+                    balances[:, idx], idx, ballot_size, scale, is_owner[:, idx]
+                )
+                spent[:, idx] = np.where(np.isnan(amount[:, idx]), 0, amount[:, idx])
+                balances[:, idx + 1] = balances[:, idx] - spent[:, idx]
+
+        amounts = np.full((num_voters, num_projects), np.nan)
+        amounts[:, :num_ranks] = amount
+        return sorted_project_indices, amounts, is_drawn, ub, balances[:, -1]
+
+    def simulate_voting(self):
+        """
+        Vectorized version of the legacy simulate_voting.  np.random is advanced exactly as
+        the legacy loop does it (the subjectivity scores and the unused randint draws of
+        every voter, in order), so that runs stay reproducible across both versions.
+        """
+        projects, voters = self.round.projects, self.round.voters
+        num_projects = len(projects)
+        if not voters:
+            return
+        sorted_project_indices, amounts, is_drawn, ub, balance = self._ballots()
+
+        lb = int(self.min_project_vote)
+        num_draws = is_drawn.sum(axis=1)
+        # voters whose draws all have the same upper bound draw them with a scalar bound
+        ub_max = np.where(is_drawn, ub, np.iinfo(np.int64).min).max(axis=1, initial=np.iinfo(np.int64).min)
+        ub_min = np.where(is_drawn, ub, np.iinfo(np.int64).max).min(axis=1, initial=np.iinfo(np.int64).max)
+        for vv, voter in enumerate(voters):
+            if balance[vv] != voter.balance_op:
+                voter.balance_op = float(balance[vv])
+            # the subjectivity scores: uniform(low, high, n) takes the same n numbers from
+            # the stream as random_sample(n), which is cheaper
+            np.random.random_sample(num_projects)
+            # one call for all of a voter's draws takes the same numbers from the stream as
+            # one call per draw
+            if num_draws[vv] == 0:
+                continue
+            elif ub_min[vv] == ub_max[vv]:
+                np.random.randint(lb, ub_max[vv], num_draws[vv])
+            else:
+                np.random.randint(lb, ub[vv, is_drawn[vv]])
+
+        # the votes in the order the legacy loop casts them: voter by voter, by rank
+        self.round.ledger.add_votes(
+            np.repeat([voter.voter_id for voter in voters], num_projects),
+            np.tile(sorted_project_indices, len(voters)),
+            amount=amounts.ravel()
+        )
+        num_votes = np.zeros(num_projects, dtype=np.int64)
+        num_votes[sorted_project_indices] = (~np.isnan(amounts)).sum(axis=0)
+        for project, n in zip(projects, num_votes):
+            project.num_votes += int(n)
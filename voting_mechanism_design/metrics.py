@@ -0,0 +1,225 @@
+import numpy as np
+
+# Metrics comparing the ranking / allocation a funding design produced to the true impact of
+# the projects.  Every metric takes 1D arrays for a single run, or 2D arrays shaped
+# (runs x projects) and returns one value per run.
+
+def _as_rows(*arrays):
+    arrays = [np.asarray(a) for a in arrays]
+    is_single = arrays[0].ndim == 1
+    return is_single, [np.atleast_2d(a) for a in arrays]
+
+def _unwrap(is_single, values):
+    return values[0] if is_single else values
+
+def _nan_last(x):
+    """
+    x with NaN (e.g. the score of a project that missed the quorum) replaced by -inf, so
+    that it ranks below every other value, tied with the other NaNs, instead of above them
+    as np.argsort would put it
+    """
+    x = np.asarray(x, dtype=float)
+    return np.where(np.isnan(x), -np.inf, x)
+
+def _dense_ranks(x):
+    """
+    Row-wise dense ranks (0, 1, ... with equal values sharing a rank)
+    """
+    order = np.argsort(x, axis=1, kind='stable')
+    x_sorted = np.take_along_axis(x, order, axis=1)
+    new_value = np.ones(x.shape, dtype=np.int64)
+    new_value[:, 1:] = x_sorted[:, 1:] != x_sorted[:, :-1]
+    new_value[:, 0] = 0
+    ranks = np.empty(x.shape, dtype=np.int64)
+    np.put_along_axis(ranks, order, np.cumsum(new_value, axis=1), axis=1)
+    return ranks
+
+def _tied_pairs(ranks):
+    """
+    The number of tied pairs in each row of dense ranks
+    """
+    num_rows, n = ranks.shape
+    counts = np.zeros((num_rows, n), dtype=np.int64)
+    np.add.at(counts, (np.repeat(np.arange(num_rows), n), ranks.ravel()), 1)
+    return (counts * (counts - 1) // 2).sum(axis=1)
+
+def count_inversions(x):
+    """
+    The number of pairs i < j with x[i] > x[j] in each row of x, counted by a bottom-up
+    merge sort which works on all rows (and all blocks of a row) at once, in O(n log n)
+    per row.
+    """
+    x = _dense_ranks(np.atleast_2d(x))
+    num_rows, n = x.shape
+    width = 1
+    while width < n:
+        width *= 2
+    # pad with values larger than any other, which are never inverted with anything
+    blocks = np.full((num_rows, width), n, dtype=np.int64)
+    blocks[:, :n] = x
+
+    # small blocks are cheaper to compare all against all than to merge
+    block_size = min(width, 32)
+    blocks = blocks.reshape(num_rows, -1, block_size)
+    is_later = np.triu(np.ones((block_size, block_size), dtype=bool), 1)
+    inversions = ((blocks[:, :, :, None] > blocks[:, :, None, :]) & is_later).sum(axis=(1, 2, 3))
+    blocks = np.sort(blocks, axis=2).reshape(num_rows, width)
+
+    while block_size < width:
+        block_size *= 2
+        blocks = blocks.reshape(num_rows, -1, block_size)
+        # merge the two sorted halves of every block; timsort (kind='stable') does this in
+        # linear time, and keeps equal values of the left half first
+        order = np.argsort(blocks, axis=2, kind='stable')
+        # an element of the right half which ends up at position m, coming from position
+        # order[m] of the block, passed order[m] - m elements of the left half that are
+        # larger than it
+        from_right = order >= block_size // 2
+        inversions += np.where(from_right, order - np.arange(block_size), 0).sum(axis=(1, 2))
+        blocks = np.take_along_axis(blocks, order, axis=2).reshape(num_rows, width)
+    return inversions
+
+def kendall_tau(x, y):
+    """
+    Kendall's tau-b between x and y (rows of x and y for a batch), computed with Knight's
+    O(n log n) algorithm: sort by x (then y) and count the discordant pairs as the
+    inversions of y.  Matches scipy.stats.kendalltau, except that NaN ranks last.
+    """
+    is_single, (x, y) = _as_rows(_nan_last(x), _nan_last(y))
+    n = x.shape[1]
+    x_ranks, y_ranks = _dense_ranks(x), _dense_ranks(y)
+    order = _lexsort_rows(x_ranks, y_ranks)
+    discordant = count_inversions(np.take_along_axis(y_ranks, order, axis=1))
+
+    num_pairs = n * (n - 1) // 2
+    x_ties = _tied_pairs(x_ranks)
+    y_ties = _tied_pairs(y_ranks)
+    joint_ties = _tied_pairs(_dense_ranks(x_ranks * (n + 1) + y_ranks))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tau = (num_pairs - x_ties - y_ties + joint_ties - 2 * discordant) / np.sqrt((num_pairs - x_ties) * (num_pairs - y_ties))
+    return _unwrap(is_single, tau)
+
+def _lexsort_rows(primary, secondary):
+    """
+    Row-wise order sorting by primary, then secondary (both dense ranks)
+    """
+    n = primary.shape[1]
+    return np.argsort(primary * (n + 1) + secondary, axis=1, kind='stable')
+
+def average_ranks(x):
+    """
+    Row-wise ranks 1..n, with tied values getting the average of their ranks
+    """
+    x = np.atleast_2d(x)
+    num_rows, n = x.shape
+    order = np.argsort(x, axis=1, kind='stable')
+    x_sorted = np.take_along_axis(x, order, axis=1)
+    # the start of each run of equal values, for every position
+    is_start = np.ones(x.shape, dtype=bool)
+    is_start[:, 1:] = x_sorted[:, 1:] != x_sorted[:, :-1]
+    positions = np.broadcast_to(np.arange(n), x.shape)
+    run_start = np.maximum.accumulate(np.where(is_start, positions, 0), axis=1)
+    is_end = np.ones(x.shape, dtype=bool)
+    is_end[:, :-1] = is_start[:, 1:]
+    run_end = np.minimum.accumulate(np.where(is_end, positions, n - 1)[:, ::-1], axis=1)[:, ::-1]
+    ranks = np.empty(x.shape)
+    np.put_along_axis(ranks, order, (run_start + run_end) / 2 + 1, axis=1)
+    return ranks
+
+def spearman(x, y):
+    """
+    Spearman's rank correlation between x and y (rows of x and y for a batch).  NaN ranks
+    last.
+    """
+    is_single, (x, y) = _as_rows(_nan_last(x), _nan_last(y))
+    x_ranks = average_ranks(x)
+    y_ranks = average_ranks(y)
+    x_ranks -= x_ranks.mean(axis=1, keepdims=True)
+    y_ranks -= y_ranks.mean(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rho = (x_ranks * y_ranks).sum(axis=1) / np.sqrt((x_ranks**2).sum(axis=1) * (y_ranks**2).sum(axis=1))
+    return _unwrap(is_single, rho)
+
+def min_swaps_to_sort(arr1, arr2):
+    """
+    The minimum number of swaps which turn arr2 into arr1 (two orderings of the same
+    values, e.g. the true and the inferred ranking of the projects): the length minus the
+    number of cycles of the permutation between them.  The cycles are found for all rows
+    at once by pointer jumping, in O(n log n).
+    """
+    is_single, (arr1, arr2) = _as_rows(arr1, arr2)
+    num_rows, n = arr1.shape
+    # position in arr1 of each value of arr2
+    ranks = _dense_ranks(np.concatenate([arr1, arr2], axis=1))
+    rank2position = np.empty((num_rows, n), dtype=np.int64)
+    np.put_along_axis(rank2position, ranks[:, :n], np.broadcast_to(np.arange(n), (num_rows, n)), axis=1)
+    position = np.take_along_axis(rank2position, ranks[:, n:], axis=1)
+    # label every element with the smallest index on its cycle
+    label = np.broadcast_to(np.arange(n), (num_rows, n)).copy()
+    jump = position
+    steps = 1
+    while steps < n:
+        label = np.minimum(label, np.take_along_axis(label, jump, axis=1))
+        jump = np.take_along_axis(jump, jump, axis=1)
+        steps *= 2
+    num_cycles = (label == np.arange(n)).sum(axis=1)
+    return _unwrap(is_single, n - num_cycles)
+
+def top_k_precision(true_scores, scores, k):
+    """
+    The fraction of the k projects with the largest scores which are also among the k
+    projects with the largest true scores
+    """
+    is_single, (true_scores, scores) = _as_rows(true_scores, scores)
+    n = true_scores.shape[1]
+    k = min(k, n)
+    true_top = np.argpartition(-true_scores, k - 1, axis=1)[:, :k]
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    in_true_top = np.zeros(true_scores.shape, dtype=bool)
+    np.put_along_axis(in_true_top, true_top, True, axis=1)
+    precision = np.take_along_axis(in_true_top, top, axis=1).sum(axis=1) / k
+    return _unwrap(is_single, precision)
+
+def gini(allocations):
+    """
+    The Gini coefficient of the allocations (0 for an equal split, 0 if nothing is allocated)
+    """
+    is_single, (allocations,) = _as_rows(allocations)
+    n = allocations.shape[1]
+    x = np.sort(allocations, axis=1)
+    total = x.sum(axis=1)
+    weights = 2 * np.arange(1, n + 1) - n - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        g = np.where(total > 0, (x * weights).sum(axis=1) / (n * total), 0.0)
+    return _unwrap(is_single, g)
+
+def hhi(allocations):
+    """
+    The Herfindahl-Hirschman index of the allocations: the sum of the squared shares, from
+    1/n for an equal split to 1 if one project gets everything (0 if nothing is allocated)
+    """
+    is_single, (allocations,) = _as_rows(allocations)
+    total = allocations.sum(axis=1, keepdims=True)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        h = np.where(total[:, 0] > 0, ((allocations / total)**2).sum(axis=1), 0.0)
+    return _unwrap(is_single, h)
+
+def ranking_metrics(true_impact, scores, allocations=None, k=10):
+    """
+    All of the metrics for one run (1D arrays) or a batch of runs (2D arrays shaped
+    runs x projects), as a dictionary.  Projects with a NaN score rank last.
+    """
+    true_impact = _nan_last(true_impact)
+    scores = _nan_last(scores)
+    if true_impact.ndim < scores.ndim:
+        true_impact = np.broadcast_to(true_impact, scores.shape)
+    results = {
+        'kendall_tau': kendall_tau(true_impact, scores),
+        'spearman': spearman(true_impact, scores),
+        'min_swaps': min_swaps_to_sort(np.argsort(true_impact, axis=-1, kind='stable'), np.argsort(scores, axis=-1, kind='stable')),
+        f'top_{k}_precision': top_k_precision(true_impact, scores, k),
+    }
+    if allocations is not None:
+        results['gini'] = gini(allocations)
+        results['hhi'] = hhi(allocations)
+    return results
@@ -0,0 +1,186 @@
+"""
+Sequential Monte Carlo: instead of a fixed number of runs per configuration, runs are made
+in batches until the confidence intervals of the metrics of interest are narrow enough, or
+a budget of runs is used up.  Easy configurations stop after a few batches, and noisy ones
+get the runs they need.
+
+AdaptiveMonteCarlo does this for one RoundSimulation; ParameterSweep(..., stopping=...)
+does it for every configuration of a grid.
+"""
+import numpy as np
+
+class RunningStats:
+    """
+    The running mean and variance of a vector of metrics over runs, by Welford's update,
+    which does not lose precision the way the sum-of-squares formula does.  A batch of runs
+    is merged in one step by Chan et al.'s pairwise update.  NaN values (e.g. a rank
+    correlation of constant scores) are left out of their metric's statistics.
+    """
+    def __init__(self, num_metrics):
+        self.count = np.zeros(num_metrics, dtype=np.int64)
+        self.mean = np.zeros(num_metrics)
+        self.m2 = np.zeros(num_metrics)
+
+    def update(self, values):
+        """
+        Adds one run
+        """
+        values = np.asarray(values, dtype=float)
+        seen = ~np.isnan(values)
+        self.count += seen
+        delta = np.where(seen, values - self.mean, 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.mean += np.where(seen, delta / self.count, 0)
+        self.m2 += np.where(seen, delta * (values - self.mean), 0)
+
+    def update_batch(self, values):
+        """
+        Adds a (runs x metrics) batch of runs
+        """
+        values = np.asarray(values, dtype=float).reshape(-1, len(self.mean))
+        seen = ~np.isnan(values)
+        batch_count = seen.sum(axis=0)
+        has_values = batch_count > 0
+        with np.errstate(invalid='ignore', divide='ignore'):
+            batch_mean = np.where(has_values, np.where(seen, values, 0).sum(axis=0) / batch_count, 0)
+        batch_m2 = np.where(seen, values - batch_mean, 0) ** 2
+        batch_m2 = batch_m2.sum(axis=0)
+
+        total = self.count + batch_count
+        delta = batch_mean - self.mean
+        with np.errstate(invalid='ignore', divide='ignore'):
+            self.mean = np.where(has_values, self.mean + delta * batch_count / total, self.mean)
+            self.m2 = np.where(has_values, self.m2 + batch_m2 + delta ** 2 * self.count * batch_count / total, self.m2)
+        self.count = total
+
+    @property
+    def variance(self):
+        """
+        The sample variance of every metric (NaN before two runs)
+        """
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(self.count > 1, self.m2 / (self.count - 1), np.nan)
+
+    def half_width(self, confidence=0.95):
+        """
+        The half-width of the normal confidence interval of the mean of every metric
+        """
+        # imported here, since statistics pulls in decimal and fractions, which the core
+        # does not otherwise need (see benchmarks/import_time.py)
+        from statistics import NormalDist
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return z * np.sqrt(self.variance / self.count)
+
+class AdaptiveStopping:
+    """
+    When to stop running a configuration: once the confidence-interval half-width of the
+    mean of every one of metrics is at most tolerance.  The intervals are checked after
+    every batch of batch_size runs, from min_runs on; fewer runs give too rough an estimate
+    of the variance to trust the interval.
+
+    metrics - the names of the metrics, keys of the results of a run
+    tolerance - a half-width for all metrics, or a dictionary with one per metric
+    relative - if True, the tolerance is a fraction of the absolute value of the mean
+    """
+    def __init__(self, metrics, tolerance, confidence=0.95, batch_size=8, min_runs=8, relative=False):
+        assert batch_size >= 1, "batch_size must be at least 1"
+        self.metrics = list(metrics)
+        if isinstance(tolerance, dict):
+            tolerance = [tolerance[name] for name in self.metrics]
+        self.tolerance = np.broadcast_to(np.asarray(tolerance, dtype=float), (len(self.metrics),))
+        self.confidence = confidence
+        self.batch_size = batch_size
+        self.min_runs = max(min_runs, 2)
+        self.relative = relative
+
+    def new_stats(self):
+        return RunningStats(len(self.metrics))
+
+    def values(self, result):
+        """
+        The metrics of one run, from its results
+        """
+        missing = [name for name in self.metrics if name not in result]
+        if missing:
+            raise KeyError(f"The results of a run have no {', '.join(missing)}; the evaluate function must return them")
+        return [float(result[name]) for name in self.metrics]
+
+    def converged(self, stats):
+        if stats.count.min() < self.min_runs:
+            return False
+        tolerance = self.tolerance * np.abs(stats.mean) if self.relative else self.tolerance
+        return bool(np.all(stats.half_width(self.confidence) <= tolerance))
+
+    def summary(self, stats):
+        """
+        The mean, standard deviation and confidence-interval half-width of every metric, as
+        dictionaries keyed by metric name, and whether the intervals have converged
+        """
+        half_width = stats.half_width(self.confidence)
+        std = np.sqrt(stats.variance)
+        return {
+            'num_runs': int(stats.count.max()) if len(stats.count) else 0,
+            'converged': self.converged(stats),
+            'mean': dict(zip(self.metrics, stats.mean.tolist())),
+            'std': dict(zip(self.metrics, std.tolist())),
+            'half_width': dict(zip(self.metrics, half_width.tolist())),
+        }
+
+def run_metrics(simulation):
+    """
+    An evaluate function which returns the metrics of get_results (without the scores)
+    """
+    results = simulation.get_results()
+    results.pop('projectid2score')
+    return results
+
+class AdaptiveMonteCarlo:
+    """
+    Runs one RoundSimulation over and over, in batches, until stopping (an AdaptiveStopping)
+    is satisfied or max_runs runs have been made.  The simulation is reset in place between
+    runs, as by RoundArena.
+
+    Run i is seeded with the i-th child of SeedSequence(entropy), whatever the batch size,
+    so raising max_runs or the tolerance only adds or drops runs at the end.
+
+    evaluate(simulation) turns a finished run into a dictionary of results, which must
+    include the metrics of stopping (run_metrics by default).
+    """
+    def __init__(self, simulation, stopping, max_runs=256, entropy=1234, evaluate=run_metrics, cast_votes_kwargs=None):
+        self.simulation = simulation
+        self.stopping = stopping
+        self.max_runs = max_runs
+        self.entropy = entropy
+        self.evaluate = evaluate
+        self.cast_votes_kwargs = cast_votes_kwargs
+
+        self.stats = stopping.new_stats()
+        self.values = np.zeros((0, len(stopping.metrics)))
+
+    def run(self):
+        """
+        Returns the summary of the stopping rule (see AdaptiveStopping.summary), plus the
+        (runs x metrics) values of every run made
+        """
+        simulation = self.simulation
+        seeds = np.random.SeedSequence(self.entropy).spawn(self.max_runs)
+        self.stats = self.stopping.new_stats()
+        values = []
+        for start in range(0, self.max_runs, self.stopping.batch_size):
+            batch = []
+            for seed in seeds[start:start + self.stopping.batch_size]:
+                if simulation.projectid2score is not None:
+                    simulation.reset()
+                simulation.seed(seed)
+                simulation.run(cast_votes_kwargs=self.cast_votes_kwargs)
+                batch.append(self.stopping.values(self.evaluate(simulation)))
+            self.stats.update_batch(batch)
+            values.extend(batch)
+            if self.stopping.converged(self.stats):
+                break
+        self.values = np.array(values).reshape(-1, len(self.stopping.metrics))
+        summary = self.stopping.summary(self.stats)
+        summary['num_runs'] = len(self.values)
+        summary['values'] = self.values
+        return summary
@@ -0,0 +1,117 @@
+"""
+Building blocks of the population factories (QuorumBadgeholderPopulation.from_traits,
+PairwiseBadgeholderPopulation.from_traits and ProjectPopulation.from_impact): named
+distributions of the badgeholder and project attributes, drawn for a whole population at
+once, and a list-like view which only builds the badgeholder / project objects when
+they are accessed.
+"""
+import numpy as np
+
+# Beta(a, b) parameters of the named distributions used by the notebooks.  Any
+# 'const-<value>' name is a constant, e.g. 'const-0.5'.
+EXPERTISE_PRESETS = {
+    'very-low': (1, 6),
+    'low': (1, 3),
+    'medium': (3, 3),
+    'high': (3, 1),
+    'very-high': (6, 1),
+}
+
+LAZINESS_PRESETS = {
+    'low': (1, 3),
+    'medium': (3, 3),
+    'high': (3, 1),
+}
+
+IMPACT_PRESETS = {
+    'low': (1, 4),
+    'medium': (2, 2),
+    'high': (4, 1),
+    'random': (1, 1),
+    'u-shaped': (0.5, 0.5),
+}
+
+def draw_values(spec, size, rng, presets=None):
+    """
+    size values of an attribute, drawn in one call.  spec is
+      - the name of one of presets, or 'const-<value>'
+      - an (a, b) tuple, for a Beta(a, b) distribution
+      - a number, for a constant
+      - an array of size values, used as is
+    """
+    if isinstance(spec, str):
+        if spec.startswith('const-'):
+            return np.full(size, float(spec[len('const-'):]))
+        if presets is None or spec not in presets:
+            raise ValueError(f"Unknown distribution {spec!r}, expected one of {sorted(presets or [])} or 'const-<value>'")
+        spec = presets[spec]
+    if isinstance(spec, tuple):
+        return rng.beta(*spec, size)
+    values = np.asarray(spec, dtype=float)
+    if values.ndim == 0:
+        return np.full(size, float(values))
+    if len(values) != size:
+        raise ValueError(f"Expected {size} values, got {len(values)}")
+    return values
+
+class ObjectView:
+    """
+    A list of the objects cls(**columns[i], **constants), built the first time each one is
+    accessed and kept afterwards.  columns maps the argument names to lists or arrays of
+    values; the objects get Python scalars rather than NumPy ones.  setup, if given, is
+    called on every object once built.
+
+    It supports what the populations do with their lists: len, indexing and slicing,
+    iteration, append and extend (which add objects built elsewhere).
+    """
+    def __init__(self, cls, columns, constants=None, setup=None):
+        self.cls = cls
+        self.columns = columns
+        self.constants = {} if constants is None else constants
+        self.setup = setup
+        num_objects = len(next(iter(columns.values()))) if columns else 0
+        self._objects = [None] * num_objects
+        self._num_built = 0
+
+    def _build(self, ix):
+        obj = self.cls(
+            **{name: values.item(ix) if isinstance(values, np.ndarray) else values[ix] for name, values in self.columns.items()},
+            **self.constants
+        )
+        if self.setup is not None:
+            self.setup(obj)
+        self._objects[ix] = obj
+        self._num_built += 1
+        return obj
+
+    @property
+    def num_built(self):
+        return self._num_built
+
+    def __len__(self):
+        return len(self._objects)
+
+    def __getitem__(self, ix):
+        if isinstance(ix, slice):
+            return [self[jj] for jj in range(*ix.indices(len(self._objects)))]
+        obj = self._objects[ix]
+        if obj is None:
+            obj = self._build(ix if ix >= 0 else ix + len(self._objects))
+        return obj
+
+    def __iter__(self):
+        if self._num_built == len(self._objects):
+            return iter(self._objects)
+        return (self[ix] for ix in range(len(self._objects)))
+
+    def append(self, obj):
+        self._objects.append(obj)
+        self._num_built += 1
+
+    def extend(self, objects):
+        objects = list(objects)
+        self._objects.extend(objects)
+        self._num_built += len(objects)
+
+    def __repr__(self):
+        return f'ObjectView({self.cls.__name__}, {self._num_built}/{len(self._objects)} built)'
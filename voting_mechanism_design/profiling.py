@@ -0,0 +1,172 @@
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import numpy as np
+
+class CountingGenerator:
+    """
+    Wraps a np.random.Generator and counts the calls to each of its methods, and the
+    number of values they return, in the current phase of a Profiler.  The draws are
+    those of the wrapped generator, so a run gives the same results with or without it.
+    """
+    def __init__(self, rng, profiler):
+        self._rng = rng
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        # only reached for names not set on the wrapper itself.  Private and special names
+        # are not forwarded, which also keeps unpickling (which looks up __setstate__
+        # before _rng is set) from recursing.
+        if name.startswith('_'):
+            raise AttributeError(name)
+        attr = getattr(self._rng, name)
+        if not callable(attr):
+            return attr
+
+        def counted(*args, **kwargs):
+            out = attr(*args, **kwargs)
+            self._profiler.count(f'rng.{name}')
+            self._profiler.count('rng_draws', 0 if out is None else np.size(out))
+            return out
+        return counted
+
+class Profiler:
+    """
+    Opt-in instrumentation of where the time, memory and work of a simulation go.
+
+    Code runs inside nested phases (with profiler.phase(name): ...) and reports counts of
+    what it did with profiler.count(name, n).  Every phase is identified by its stack, the
+    names of the phases it is nested in, and the wall time, calls and counts of a stack are
+    summed over all the runs profiled.  If trace_memory is set, tracemalloc is started and
+    the peak and net memory allocated in every phase are recorded too (which slows the
+    traced code down noticeably).
+
+    The results can be exported as JSON (to_json) or as folded stacks (to_folded), which
+    flamegraph.pl, speedscope and inferno read.
+    """
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.num_runs = 0
+
+        # stack (tuple of phase names) -> statistics of the phase, and counts reported in it
+        self.stats = {}
+        self.counts = {}
+        self._frames = []
+        self._started_tracemalloc = False
+
+    @contextmanager
+    def phase(self, name):
+        parent = self._frames[-1] if self._frames else None
+        stack = (parent['stack'] if parent else ()) + (name,)
+        frame = {'stack': stack, 'memory_start': 0, 'memory_peak': 0}
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            current, peak = tracemalloc.get_traced_memory()
+            # the peak is reset for this phase, so keep the one the parent reached so far
+            if parent is not None:
+                parent['memory_peak'] = max(parent['memory_peak'], peak)
+            tracemalloc.reset_peak()
+            frame['memory_start'] = frame['memory_peak'] = current
+        self._frames.append(frame)
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            elapsed = time.perf_counter() - start
+            self._frames.pop()
+            stats = self.stats.get(stack)
+            if stats is None:
+                stats = self.stats[stack] = {
+                    'calls': 0, 'time': 0.0, 'time_min': np.inf, 'time_max': 0.0,
+                    'memory_peak': 0, 'memory_net': 0,
+                }
+            stats['calls'] += 1
+            stats['time'] += elapsed
+            stats['time_min'] = min(stats['time_min'], elapsed)
+            stats['time_max'] = max(stats['time_max'], elapsed)
+            if self.trace_memory:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(frame['memory_peak'], peak)
+                stats['memory_peak'] = max(stats['memory_peak'], peak - frame['memory_start'])
+                stats['memory_net'] += current - frame['memory_start']
+
+    def count(self, name, n=1):
+        """
+        Adds n to the count called name of the current phase
+        """
+        stack = self._frames[-1]['stack'] if self._frames else ()
+        counts = self.counts.setdefault(stack, {})
+        counts[name] = counts.get(name, 0) + int(n)
+
+    def end_run(self):
+        self.num_runs += 1
+
+    def close(self):
+        """
+        Stops tracemalloc, if the profiler started it
+        """
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def summary(self):
+        """
+        One dictionary per phase, with its totals over all runs and its mean per run.
+        Times are in seconds and memory in bytes; the memory peak is the largest of any call.
+        """
+        num_runs = max(self.num_runs, 1)
+        phases = []
+        for stack in sorted(set(self.stats) | set(self.counts)):
+            stats = self.stats.get(stack, {})
+            counts = self.counts.get(stack, {})
+            phases.append({
+                'phase': ';'.join(stack),
+                'calls': stats.get('calls', 0),
+                'time': stats.get('time', 0.0),
+                'time_per_run': stats.get('time', 0.0) / num_runs,
+                'time_min': stats.get('time_min', 0.0) if stats.get('calls') else 0.0,
+                'time_max': stats.get('time_max', 0.0),
+                'memory_peak': stats.get('memory_peak', 0),
+                'memory_net_per_run': stats.get('memory_net', 0) / num_runs,
+                'counts': dict(counts),
+                'counts_per_run': {name: n / num_runs for name, n in counts.items()},
+            })
+        return phases
+
+    def to_json(self, path=None):
+        """
+        The summary as a JSON string, also written to path if given
+        """
+        text = json.dumps({'num_runs': self.num_runs, 'trace_memory': self.trace_memory, 'phases': self.summary()}, indent=2)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+    def to_folded(self, path=None, metric='time'):
+        """
+        The phases as folded stacks ("run;cast_votes 1234" per line), weighted by their self
+        time in microseconds (the time not spent in a nested phase), or by the self value of
+        a count if metric is the name of one.
+        """
+        totals = {}
+        for stack in set(self.stats) | set(self.counts):
+            if metric == 'time':
+                totals[stack] = self.stats.get(stack, {}).get('time', 0.0) * 1e6
+            else:
+                totals[stack] = self.counts.get(stack, {}).get(metric, 0)
+        self_values = dict(totals)
+        if metric == 'time':
+            for stack, total in totals.items():
+                if len(stack) > 1 and stack[:-1] in self_values:
+                    self_values[stack[:-1]] -= total
+        lines = [f"{';'.join(stack)} {max(int(round(value)), 0)}" for stack, value in sorted(self_values.items()) if value > 0]
+        text = '\n'.join(lines) + '\n' if lines else ''
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
@@ -0,0 +1,304 @@
+import numpy as np
+
+from voting_mechanism_design.funds_distribution.pairwise_binary import win_counts, fit_bradley_terry
+from voting_mechanism_design.metrics import kendall_tau
+
+def num_all_pairs(num_projects):
+    return num_projects * (num_projects - 1) // 2
+
+def unrank_pairs(pair_rank, num_projects):
+    """
+    Maps the rank of a pair in the order of itertools.combinations(range(num_projects), 2)
+    to the pair itself, without enumerating the pairs before it.
+
+    Returns an (n x 2) int32 array of project indices.
+    """
+    pair_rank = np.asarray(pair_rank, dtype=np.int64)
+    n = num_projects
+    # pairs (i, .) start at rank i*(2n - i - 1)/2; invert that with a square root and fix
+    # up the floating point rounding
+    i = np.floor((2*n - 1 - np.sqrt((2.0*n - 1)**2 - 8.0*pair_rank)) / 2).astype(np.int64)
+    i = np.clip(i, 0, max(n - 2, 0))
+    start = i * (2*n - i - 1) // 2
+    too_far = start > pair_rank
+    i[too_far] -= 1
+    start = i * (2*n - i - 1) // 2
+    next_start = (i + 1) * (2*n - i - 2) // 2
+    not_far_enough = next_start <= pair_rank
+    i[not_far_enough] += 1
+    start = i * (2*n - i - 1) // 2
+    j = pair_rank - start + i + 1
+    return np.stack([i, j], axis=-1).astype(np.int32)
+
+class PairView:
+    """
+    The pairs of projects that badgeholders are asked to vote on, as (n_pairs x 2) int32
+    arrays of indices into a ProjectPopulation instead of lists of (Project, Project)
+    tuples.
+
+    pairs_for(badgeholder_ix, rng) returns the pairs one badgeholder sees.  Views where
+    every badgeholder sees the same pairs (shared = True) also expose them as pair_ix.
+    Adaptive views (adaptive = True) are told the outcome of every vote through observe,
+    as soon as the badgeholder has cast it.
+    """
+    shared = True
+    adaptive = False
+
+    def __init__(self, pair_ix):
+        self._pair_ix = np.asarray(pair_ix, dtype=np.int32).reshape(-1, 2)
+
+    @property
+    def pair_ix(self):
+        return self._pair_ix
+
+    @property
+    def num_pairs(self):
+        return len(self.pair_ix)
+
+    def __len__(self):
+        return self.num_pairs
+
+    def pairs_for(self, badgeholder_ix, rng):
+        return self.pair_ix
+
+    def observe(self, winner_ix, loser_ix):
+        pass
+
+    def iter_blocks(self, block_size=2**20):
+        """
+        Yields the pairs in blocks of at most block_size
+        """
+        for start in range(0, self.num_pairs, block_size):
+            yield self.pair_ix[start:start + block_size]
+
+    def to_projects(self, project_population, pair_ix=None):
+        """
+        The pairs as a list of (Project, Project) tuples, for code that still works with them
+        """
+        projects = project_population.get_projects()
+        pair_ix = self.pair_ix if pair_ix is None else pair_ix
+        return [(projects[ix1], projects[ix2]) for ix1, ix2 in pair_ix]
+
+class AllPairsView(PairView):
+    """
+    All C(num_projects, 2) pairs, in the order of itertools.combinations.  The pairs are
+    generated block by block (or unranked on demand), and only materialized if pair_ix is
+    asked for.
+    """
+    def __init__(self, num_projects):
+        self.num_projects = num_projects
+        self._pair_ix = None
+
+    @property
+    def pair_ix(self):
+        if self._pair_ix is None:
+            self._pair_ix = np.concatenate(list(self.iter_blocks())) if self.num_pairs > 0 else np.zeros((0, 2), dtype=np.int32)
+        return self._pair_ix
+
+    @property
+    def num_pairs(self):
+        return num_all_pairs(self.num_projects)
+
+    def __getitem__(self, pair_rank):
+        return unrank_pairs(pair_rank, self.num_projects)
+
+    def iter_blocks(self, block_size=2**20):
+        if self._pair_ix is not None:
+            yield from super().iter_blocks(block_size)
+            return
+        for start in range(0, self.num_pairs, block_size):
+            yield unrank_pairs(np.arange(start, min(start + block_size, self.num_pairs)), self.num_projects)
+
+class RandomPairsView(AllPairsView):
+    """
+    Every badgeholder sees pairs_per_voter distinct pairs, drawn uniformly at random from
+    all C(num_projects, 2) pairs independently for each badgeholder.
+    """
+    shared = False
+
+    def __init__(self, num_projects, pairs_per_voter):
+        super().__init__(num_projects)
+        self.pairs_per_voter = pairs_per_voter
+
+    def pairs_for(self, badgeholder_ix, rng):
+        num_pairs = min(self.pairs_per_voter, self.num_pairs)
+        return unrank_pairs(rng.choice(self.num_pairs, num_pairs, replace=False), self.num_projects)
+
+class RoundRobinPairsView(AllPairsView):
+    """
+    Deals the C(num_projects, 2) pairs out to the badgeholders in turn, pairs_per_voter at
+    a time, so that every pair is seen before any pair is seen twice.  The pairs are dealt
+    in the order of a random affine permutation of the pair ranks,
+    rank -> (step * rank + offset) mod C, which needs no storage.
+
+    rng - a random generator or seed for the permutation, required so that the view is
+          reproducible like the rest of the simulation
+    """
+    shared = False
+
+    def __init__(self, num_projects, pairs_per_voter, rng):
+        super().__init__(num_projects)
+        self.pairs_per_voter = pairs_per_voter
+        assert rng is not None, "RoundRobinPairsView needs a random generator or seed"
+        rng = np.random.default_rng(rng)
+        self.step, self.offset = 1, 0
+        if self.num_pairs > 1:
+            self.offset = int(rng.integers(self.num_pairs))
+            self.step = int(rng.integers(1, self.num_pairs))
+            while np.gcd(self.step, self.num_pairs) != 1:
+                self.step = int(rng.integers(1, self.num_pairs))
+
+    def pairs_for(self, badgeholder_ix, rng):
+        if self.num_pairs == 0:
+            return np.zeros((0, 2), dtype=np.int32)
+        num_pairs = min(self.pairs_per_voter, self.num_pairs)
+        position = (badgeholder_ix * self.pairs_per_voter + np.arange(num_pairs, dtype=np.int64)) % self.num_pairs
+        if self.num_pairs < 2**31:
+            pair_rank = (self.step * position + self.offset) % self.num_pairs
+        else:
+            # python ints, since step * position can overflow int64
+            pair_rank = [(self.step * int(pp) + self.offset) % self.num_pairs for pp in position]
+        return unrank_pairs(pair_rank, self.num_projects)
+
+class AdaptivePairsView(AllPairsView):
+    """
+    Gives each badgeholder the pairs_per_voter pairs whose projects have been shown the
+    least so far, chosen from candidate_factor * pairs_per_voter random candidates, so that
+    coverage evens out across projects as the round goes on.  The counts are kept across
+    badgeholders; call reset() between rounds.
+    """
+    shared = False
+
+    def __init__(self, num_projects, pairs_per_voter, candidate_factor=4):
+        super().__init__(num_projects)
+        self.pairs_per_voter = pairs_per_voter
+        self.candidate_factor = candidate_factor
+        self.reset()
+
+    def reset(self):
+        self.times_shown = np.zeros(self.num_projects, dtype=np.int64)
+
+    def pairs_for(self, badgeholder_ix, rng):
+        num_pairs = min(self.pairs_per_voter, self.num_pairs)
+        num_candidates = min(self.candidate_factor * num_pairs, self.num_pairs)
+        candidates = unrank_pairs(rng.choice(self.num_pairs, num_candidates, replace=False), self.num_projects)
+        coverage = self.times_shown[candidates].sum(axis=1)
+        pair_ix = candidates[np.argsort(coverage, kind='stable')[:num_pairs]]
+        np.add.at(self.times_shown, pair_ix.ravel(), 1)
+        return pair_ix
+
+class ActiveRankingView(AllPairsView):
+    """
+    Active ranking: gives each badgeholder the pairs_per_voter pairs that the current
+    Bradley-Terry estimate is least sure about, and stops handing out pairs once the
+    ranking has converged.
+
+    The outcomes of the votes come back through observe, and the log-strengths are refit
+    (warm-started) after every batch_size badgeholders.  A candidate pair (i, j) is scored
+    by p_ij * (1 - p_ij) * (v_i + v_j), where p_ij is the estimated probability that i
+    beats j and v_i = 1 / (information_i + 1/4) approximates the variance of the
+    log-strength of i: close pairs of poorly measured projects come first.  The candidates
+    are candidate_factor * pairs_per_voter pairs, half of them drawn uniformly and half
+    between projects at most neighbourhood places apart in the current ranking, so
+    choosing them never enumerates the C(num_projects, 2) pairs.
+
+    A share explore of every badgeholder's pairs is drawn uniformly instead.  This matters
+    when the voters are not Bradley-Terry-like: with the skewed_towards_impact style, the
+    votes on close pairs are near coin flips, so the scheduler is at best on par with
+    RandomPairsView, and falls well behind it without exploration.  With perfect voters it
+    reaches the Kendall tau of random pairs with a quarter of the votes or fewer.
+
+    The ranking has converged once the Kendall tau between successive fits has been at
+    least 1 - tol for patience refits in a row; pairs_for then returns no pairs.  Call
+    reset() between rounds.
+    """
+    shared = False
+    adaptive = True
+
+    def __init__(self, num_projects, pairs_per_voter, batch_size=10, candidate_factor=8,
+                 neighbourhood=10, explore=0.5, alpha=0.01, tol=1e-3, patience=2):
+        super().__init__(num_projects)
+        self.pairs_per_voter = pairs_per_voter
+        self.batch_size = batch_size
+        self.candidate_factor = candidate_factor
+        self.neighbourhood = neighbourhood
+        self.explore = explore
+        self.alpha = alpha
+        self.tol = tol
+        self.patience = patience
+        self.reset()
+
+    def reset(self):
+        self.params = np.zeros(self.num_projects)
+        self.information = np.zeros(self.num_projects)
+        self.converged = False
+        self.num_votes = 0
+        # Kendall tau between each fit and the one before it
+        self.history = []
+        self._winner_ix, self._loser_ix = [], []
+        self._num_served = 0
+        self._num_stable = 0
+
+    def observe(self, winner_ix, loser_ix):
+        self._winner_ix.append(np.asarray(winner_ix, dtype=np.int64))
+        self._loser_ix.append(np.asarray(loser_ix, dtype=np.int64))
+        self.num_votes += len(self._winner_ix[-1])
+
+    def refit(self):
+        """
+        Refits the log-strengths to all of the votes observed so far, and updates the
+        information of every project and the convergence test
+        """
+        if self.num_votes == 0:
+            return
+        winner, loser, counts = win_counts(np.concatenate(self._winner_ix), np.concatenate(self._loser_ix), self.num_projects)
+        params = fit_bradley_terry(winner, loser, counts, self.num_projects, alpha=self.alpha, init_params=self.params)
+        # with alpha = 0 a project which never won has a strength of -inf
+        params = np.where(np.isfinite(params), params, np.min(params[np.isfinite(params)], initial=0.0) - 10)
+
+        p = 1 / (1 + np.exp(params[loser] - params[winner]))
+        pair_information = counts * p * (1 - p)
+        self.information = (
+            np.bincount(winner, weights=pair_information, minlength=self.num_projects)
+            + np.bincount(loser, weights=pair_information, minlength=self.num_projects)
+        )
+
+        tau = kendall_tau(self.params, params)
+        self.history.append(tau)
+        self._num_stable = self._num_stable + 1 if tau >= 1 - self.tol else 0
+        self.converged = self._num_stable >= self.patience
+        self.params = params
+
+    def _pair_keys(self, pairs):
+        return np.minimum(pairs[:, 0], pairs[:, 1]).astype(np.int64) * self.num_projects + np.maximum(pairs[:, 0], pairs[:, 1])
+
+    def pairs_for(self, badgeholder_ix, rng):
+        if self._num_served >= self.batch_size:
+            self.refit()
+            self._num_served = 0
+        if self.converged or self.num_pairs == 0:
+            return np.zeros((0, 2), dtype=np.int32)
+        self._num_served += 1
+
+        num_pairs = min(self.pairs_per_voter, self.num_pairs)
+        num_explored = int(round(self.explore * num_pairs))
+        num_candidates = min(max(self.candidate_factor * num_pairs, num_explored), self.num_pairs)
+        num_random = max(num_candidates - num_candidates // 2, num_explored)
+        random_pairs = unrank_pairs(rng.choice(self.num_pairs, num_random, replace=False), self.num_projects)
+        explored, candidates = random_pairs[:num_explored], [random_pairs[num_explored:]]
+        neighbourhood = min(self.neighbourhood, self.num_projects - 1)
+        if num_candidates > num_random and neighbourhood > 0:
+            ranking = np.argsort(-self.params, kind='stable')
+            offset = rng.integers(1, neighbourhood + 1, num_candidates - num_random)
+            position = rng.integers(0, self.num_projects - offset)
+            candidates.append(np.stack([ranking[position], ranking[position + offset]], axis=1))
+        # distinct candidates, none of them among the explored pairs
+        keys = np.unique(self._pair_keys(np.concatenate(candidates)))
+        keys = keys[~np.isin(keys, self._pair_keys(explored))]
+        ix1, ix2 = keys // self.num_projects, keys % self.num_projects
+
+        p = 1 / (1 + np.exp(self.params[ix2] - self.params[ix1]))
+        variance = 1 / (self.information + 0.25)
+        uncertainty = p * (1 - p) * (variance[ix1] + variance[ix2])
+        best = np.argsort(-uncertainty, kind='stable')[:num_pairs - num_explored]
+        return np.concatenate([explored, np.stack([ix1[best], ix2[best]], axis=1)]).astype(np.int32)
@@ -1,8 +1,15 @@
 from typing import List
 
+import numpy as np
+
 from voting_mechanism_design.voting_designs.vote import Vote
+from voting_mechanism_design.voting_designs.ledger import VoteLedger
+from voting_mechanism_design.populations import IMPACT_PRESETS, ObjectView, draw_values
 
 class Project:
+    # slotted, since populations can hold many of them
+    __slots__ = ('project_id', 'owner_id', 'true_impact', 'ledger', 'score', 'token_amount')
+
     def __init__(self, project_id, true_impact, owner_id=None):
         self.project_id = project_id
         self.owner_id = owner_id    
@@ -11,8 +18,9 @@ class Project:
         assert 0 <= self.true_impact <= 1, "True impact must be between 0 and 1"
 
         # variables needed for voting simulations
-        self.votes: List[Vote] = []
-        self.num_votes = 0
+        # the votes themselves live in a VoteLedger, which is shared by all projects of a
+        # ProjectPopulation.  A project which is not part of a population gets its own.
+        self.ledger = None
         self.score = None
         self.token_amount = 0
 
@@ -23,14 +31,45 @@ class Project:
 
     # TODO: do we need this?
     def reset_project(self):
-        self.votes: List[Vote] = []
-        self.num_votes = 0
+        if self.ledger is not None:
+            self.ledger.discard_project(self.project_id)
         self.score = None
         self.token_amount = 0
 
+    @property
+    def votes(self) -> List[Vote]:
+        """
+        Vote objects built from the ledger, for code that still works with them
+        """
+        if self.ledger is None:
+            return []
+        return self.ledger.get_votes(self.ledger.project_rows(self.project_id))
+
+    @property
+    def num_votes(self):
+        if self.ledger is None:
+            return 0
+        return self.ledger.num_project_votes(self.project_id)
+
+    def get_vote_amounts(self):
+        """
+        The amounts of the (non-abstaining) quorum votes on this project, in the order they were cast
+        """
+        if self.ledger is None:
+            return []
+        return self.ledger.project_amounts(self.project_id)
+
+    def set_ledger(self, ledger):
+        self.ledger = ledger
+        ledger.register_project(self)
+
     def add_vote(self, vote):
-        self.votes.append(vote)
-        self.num_votes = len(self.votes)
+        # a pairwise vote is added to both of its projects, but only needs to be recorded once
+        if getattr(vote, 'project2', None) is self:
+            return
+        if self.ledger is None:
+            self.set_ledger(VoteLedger())
+        self.ledger.add_vote(vote)
 
     # def get_votes(self):
     #     return [vote.amount for vote in self.votes if vote.amount is not None]
@@ -49,20 +88,81 @@ class ProjectPopulation:
     def __init__(self):
         self.projects = []
         self.num_projects = 0
+        self.ledger = VoteLedger()
+
+        # project_id -> index into self.projects, owner_id -> the indices of the projects
+        # it owns, and the true impact and project_id of each project in the same order, 
+        # kept up to date by add_projects
+        self.projectid2ix = {}
+        self.ownerid2ix = {}
+        self.true_impact = np.zeros(0)
+        self.project_ids = np.zeros(0, dtype=np.int64)
 
     def add_projects(self, projects):
+        for ix, project in enumerate(projects, start=self.num_projects):
+            # like a linear scan, a lookup returns the first project added with a given ID
+            self.projectid2ix.setdefault(project.project_id, ix)
+            if project.owner_id is not None:
+                self.ownerid2ix.setdefault(project.owner_id, []).append(ix)
+            project.set_ledger(self.ledger)
         self.projects.extend(projects)
         self.num_projects += len(projects)
+        self.true_impact = np.concatenate([self.true_impact, [project.true_impact for project in projects]])
+        self.project_ids = np.concatenate([self.project_ids, [project.project_id for project in projects]]).astype(np.int64)
+
+    @classmethod
+    def from_impact(cls, num_projects, impact='medium', rng=None, project_ids=None, owner_ids=None):
+        """
+        A population of num_projects projects whose true impacts are drawn at once (see
+        populations.draw_values): a preset name such as 'low' or 'u-shaped', a (a, b) Beta
+        tuple, a constant or an array.  The projects are built by an ObjectView the first
+        time they are used.
+
+        rng - a np.random.Generator or a seed
+        project_ids - the IDs of the projects, 0..num_projects-1 by default
+        owner_ids - the owner of each project (None for no owner), for COI modeling
+        """
+        true_impact = draw_values(impact, num_projects, np.random.default_rng(rng), IMPACT_PRESETS)
+        assert ((true_impact >= 0) & (true_impact <= 1)).all(), "True impact must be between 0 and 1"
+        project_ids = np.arange(num_projects) if project_ids is None else np.asarray(project_ids)
+        assert len(project_ids) == num_projects, "Expected one ID per project"
+        columns = {'project_id': project_ids.tolist(), 'true_impact': true_impact}
+        if owner_ids is not None:
+            assert len(owner_ids) == num_projects, "Expected one owner per project"
+            columns['owner_id'] = list(owner_ids)
+
+        population = cls()
+        population.projects = ObjectView(Project, columns, setup=population._adopt)
+        population.num_projects = num_projects
+        # like add_projects, a lookup returns the first project with a given ID
+        population.projectid2ix = dict(zip(columns['project_id'][::-1], range(num_projects - 1, -1, -1)))
+        for ix, owner_id in enumerate(columns.get('owner_id', [])):
+            if owner_id is not None:
+                population.ownerid2ix.setdefault(owner_id, []).append(ix)
+        population.true_impact = true_impact
+        population.project_ids = project_ids.astype(np.int64)
+        population.ledger.project_source = population.get_project
+        return population
+
+    def _adopt(self, project):
+        project.set_ledger(self.ledger)
 
     def get_projects(self):
         return self.projects
 
     def get_project(self, project_id):
-        for project in self.projects:
-            if project.project_id == project_id:
-                return project
-        return None
+        ix = self.projectid2ix.get(project_id)
+        if ix is None:
+            return None
+        return self.projects[ix]
+
+    def get_project_ix(self, project_id):
+        return self.projectid2ix.get(project_id)
+
+    def has_project(self, project_id):
+        return project_id in self.projectid2ix
 
     def reset_projects(self):
+        self.ledger.clear()
         for project in self.projects:
             project.reset_project()
\ No newline at end of file
@@ -0,0 +1,169 @@
+import json
+import os
+
+import numpy as np
+
+def _partition_dirname(partition):
+    return os.path.join(*[f'{key}={value}'.replace(os.sep, '_') for key, value in partition.items()]) if partition else ''
+
+def _to_json(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_to_json(v) for v in value]
+    return value
+
+class ResultsStore:
+    """
+    Append-only columnar storage for simulation results, e.g. one record per (run, project).
+
+    Records are buffered per partition (a dictionary of config values, such as the
+    configuration of a sweep) and written out every chunk_size records as one .npy file per
+    column:
+
+        path/key1=value1/key2=value2/part-00000/score.npy
+                                               /token_amount.npy
+                                               ...
+
+    Each partition directory also holds a _partition.json with the typed config values.
+    Reads memory-map the chunks, so a store much larger than memory can be scanned chunk by
+    chunk, and only the partitions and columns asked for are touched.
+
+    At most max_buffered records are held in memory across all partitions.  Only one
+    process should write to a store at a time.
+    """
+    def __init__(self, path, chunk_size=65536, max_buffered=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.max_buffered = 4 * chunk_size if max_buffered is None else max_buffered
+        os.makedirs(path, exist_ok=True)
+
+        # partition directory -> (partition, column name -> list of arrays, number of buffered rows)
+        self._buffers = {}
+        self.num_buffered = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def append(self, partition=None, **columns):
+        """
+        Buffers records for the given partition.  Scalar columns are broadcast to the length
+        of the array columns.
+        """
+        partition = {} if partition is None else partition
+        dirname = _partition_dirname(partition)
+        lengths = {len(v) for v in columns.values() if np.ndim(v) > 0}
+        assert len(lengths) <= 1, "All columns must have the same length"
+        num_rows = lengths.pop() if lengths else 1
+
+        if dirname not in self._buffers:
+            self._buffers[dirname] = (partition, {}, 0)
+        partition, buffer, num_buffered = self._buffers[dirname]
+        if buffer:
+            assert set(buffer) == set(columns), "Every append to a partition must have the same columns"
+        for name, values in columns.items():
+            buffer.setdefault(name, []).append(np.broadcast_to(np.asarray(values), (num_rows,)).copy())
+        num_buffered += num_rows
+        self.num_buffered += num_rows
+        self._buffers[dirname] = (partition, buffer, num_buffered)
+        if num_buffered >= self.chunk_size:
+            self._flush_partition(dirname)
+        elif self.num_buffered > self.max_buffered:
+            self.flush()
+
+    def flush(self):
+        for dirname in list(self._buffers):
+            self._flush_partition(dirname)
+
+    def close(self):
+        self.flush()
+
+    def _flush_partition(self, dirname):
+        partition, buffer, num_buffered = self._buffers.pop(dirname)
+        self.num_buffered -= num_buffered
+        if num_buffered == 0:
+            return
+        partition_path = os.path.join(self.path, dirname)
+        os.makedirs(partition_path, exist_ok=True)
+        info_path = os.path.join(partition_path, '_partition.json')
+        if not os.path.exists(info_path):
+            with open(info_path, 'w') as f:
+                json.dump({key: _to_json(value) for key, value in partition.items()}, f)
+
+        # write to a temporary directory and rename it, so that readers (and a resumed
+        # sweep) never see half a chunk
+        part_ix = len(self._parts(partition_path))
+        tmp_path = os.path.join(partition_path, f'.tmp-part-{part_ix:05d}')
+        os.makedirs(tmp_path, exist_ok=True)
+        for name, values in buffer.items():
+            np.save(os.path.join(tmp_path, f'{name}.npy'), np.concatenate(values))
+        os.rename(tmp_path, os.path.join(partition_path, f'part-{part_ix:05d}'))
+
+    @staticmethod
+    def _parts(partition_path):
+        if not os.path.isdir(partition_path):
+            return []
+        return sorted(name for name in os.listdir(partition_path) if name.startswith('part-'))
+
+    def partitions(self):
+        """
+        The partitions (config dictionaries) in the store
+        """
+        partitions = []
+        for root, dirs, files in os.walk(self.path):
+            dirs.sort()
+            if '_partition.json' in files:
+                with open(os.path.join(root, '_partition.json')) as f:
+                    partitions.append((root, json.load(f)))
+        return partitions
+
+    def iter_chunks(self, columns=None, where=None):
+        """
+        Yields (partition, column name -> memory-mapped array) for every written chunk
+
+        columns - the columns to read (all of them by default)
+        where - a dictionary of partition key -> value (or list of values) to read
+        """
+        for partition_path, partition in self.partitions():
+            if not self._matches(partition, where):
+                continue
+            for part in self._parts(partition_path):
+                part_path = os.path.join(partition_path, part)
+                names = columns
+                if names is None:
+                    names = sorted(name[:-len('.npy')] for name in os.listdir(part_path) if name.endswith('.npy'))
+                yield partition, {
+                    name: np.load(os.path.join(part_path, f'{name}.npy'), mmap_mode='r') for name in names
+                }
+
+    @staticmethod
+    def _matches(partition, where):
+        if where is None:
+            return True
+        for key, value in where.items():
+            values = value if isinstance(value, (list, tuple, set)) else [value]
+            if partition.get(key) not in values:
+                return False
+        return True
+
+    def read(self, columns=None, where=None):
+        """
+        Reads the matching chunks into memory, as a dictionary of column -> array.  The
+        partition keys are added as columns.
+        """
+        data = {}
+        for partition, chunk in self.iter_chunks(columns=columns, where=where):
+            num_rows = len(next(iter(chunk.values()))) if chunk else 0
+            for key, value in partition.items():
+                if isinstance(value, list):
+                    column = np.empty(num_rows, dtype=object)
+                    column[:] = [value] * num_rows
+                else:
+                    column = np.full(num_rows, value)
+                data.setdefault(key, []).append(column)
+            for name, values in chunk.items():
+                data.setdefault(name, []).append(np.asarray(values))
+        return {name: np.concatenate(values) for name, values in data.items()}
@@ -2,7 +2,9 @@ import numpy as np
 
 from voting_mechanism_design.agents.definitions import BadgeHolderPopulation
 from voting_mechanism_design.projects.project import ProjectPopulation
-from voting_mechanism_design.funds_distribution.funding_design import FundingDesign
+from voting_mechanism_design.funds_distribution.funding_design import BatchFundingDesign, FundingDesign
+from voting_mechanism_design.funds_distribution.threshold_and_aggregate import ThresholdAndAggregate
+from voting_mechanism_design.metrics import ranking_metrics
 
 class RoundSimulation:
     """
@@ -13,15 +15,62 @@ class RoundSimulation:
             badgeholder_population:BadgeHolderPopulation, 
             projects:ProjectPopulation, 
             funding_design:FundingDesign, 
-            random_seed=1234
+            random_seed=1234,
+            profiler=None,
+            rng_streams='shared'
         ):
+        """
+        rng_streams - 'shared' for one random generator that every badgeholder draws from
+                      in turn, or 'badgeholder' for a stream per badgeholder, keyed by its
+                      badgeholder_id (see BadgeHolderPopulation.set_random_streams), so that
+                      the votes do not depend on the order or the makeup of the population
+                      and can be cast concurrently
+        """
+        if rng_streams not in ('shared', 'badgeholder'):
+            raise ValueError(f"rng_streams must be 'shared' or 'badgeholder', not {rng_streams!r}")
         self.badgeholder_population = badgeholder_population
         self.projects = projects
         self.funding_design = funding_design
-        self.rng = np.random.default_rng(random_seed)
+        self.random_seed = random_seed
+        self.rng_streams = rng_streams
+        # the pair view of the last run, which is reset along with the simulation
+        self.view = None
+        self.seed(random_seed)
+        # an optional profiling.Profiler, which records every phase of run and get_results
+        self.profiler = profiler
 
         self.projectid2score = None
 
+    def seed(self, random_seed):
+        """
+        Restarts the random draws from random_seed (an int or a np.random.SeedSequence)
+        """
+        self.rng = np.random.default_rng(random_seed)
+        # every run spawns the next child of this, and keys the badgeholders' streams off it
+        self.seed_sequence = random_seed if isinstance(random_seed, np.random.SeedSequence) else np.random.SeedSequence(random_seed)
+        self._reset_view()
+
+    def _reset_view(self):
+        """
+        Clears what a stateful pair view (e.g. AdaptivePairsView, ActiveRankingView) has
+        learnt from the votes of the last run
+        """
+        if hasattr(self.view, 'reset'):
+            self.view.reset()
+
+    def _set_random_streams(self, wrap=None, rng=None, seed_sequence=None):
+        """
+        Gives the population the random streams of the next run: from self.rng and
+        self.seed_sequence, or from rng and seed_sequence if given
+        """
+        population = self.badgeholder_population
+        rng = self.rng if rng is None else rng
+        seed_sequence = self.seed_sequence if seed_sequence is None else seed_sequence
+        if self.rng_streams == 'badgeholder':
+            population.set_random_streams(seed_sequence.spawn(1)[0], wrap=wrap)
+        else:
+            population.set_random_generator(rng if wrap is None else wrap(rng))
+
     def run(self, cast_votes_kwargs=None):
         """
         Steps
@@ -34,16 +83,261 @@ class RoundSimulation:
         """
         if cast_votes_kwargs is None:
             cast_votes_kwargs = {}
+        self.view = cast_votes_kwargs.get('view')
+        if self.profiler is not None:
+            return self._run_profiled(cast_votes_kwargs)
         
         # setup the simulation for reproducibility
-        self.badgeholder_population.set_random_generator(self.rng)
+        self._set_random_streams()
 
         self.badgeholder_population.send_application_information(self.projects)
         self.badgeholder_population.communicate()
         self.badgeholder_population.cast_votes(**cast_votes_kwargs) # this step updates internal variables for each project
         self.projectid2score = self.funding_design.allocate_funds(self.projects.get_projects())
-        # TODO: compute metrics and store
+        # metrics are computed on demand, by get_results
+
+    def _run_profiled(self, cast_votes_kwargs):
+        """
+        run, with every step in a phase of self.profiler.  The phases of the badgeholders
+        are labelled with the class of their population, and the random draws are counted
+        through CountingGenerators, which draw the same numbers as the generators they wrap.
+        """
+        # profiling is opt-in, so its module is only imported when it is used
+        from voting_mechanism_design.profiling import CountingGenerator
+
+        profiler = self.profiler
+        population = self.badgeholder_population
+        label = type(population).__name__
+        ledger = self.projects.ledger
+        with profiler.phase('run'):
+            self._set_random_streams(wrap=lambda rng: CountingGenerator(rng, profiler))
+            with profiler.phase(f'send_application_information[{label}]'):
+                population.send_application_information(self.projects)
+            with profiler.phase(f'communicate[{label}]'):
+                population.communicate()
+            with profiler.phase(f'cast_votes[{label}]'):
+                num_votes = ledger.num_votes
+                population.cast_votes(**cast_votes_kwargs)
+                profiler.count('votes_cast', ledger.num_votes - num_votes)
+            # allocate_funds tallies the votes and allocates the funds in one pass
+            with profiler.phase(f'allocate_funds[{type(self.funding_design).__name__}]'):
+                profiler.count('votes_tallied', ledger.num_votes)
+                profiler.count('projects_scored', self.projects.num_projects)
+                self.projectid2score = self.funding_design.allocate_funds(self.projects.get_projects())
+        profiler.end_run()
+
+    def evaluate_designs(self, funding_designs, k=10):
+        """
+        Scores the votes of the last run with every one of funding_designs, without casting
+        them again: a list of designs, or a grid of constructor arguments of the
+        simulation's own design class (see FundingDesign.from_grid), e.g.
+
+            simulation.evaluate_designs({'scoring_method': ['median', 'mean'], 'quorum': [5, 10, 17]})
+
+        ThresholdAndAggregate designs are scored together by score_many, which groups the
+        votes once, and their token amounts come from their allocation stage.  Any other
+        design runs its allocate_funds, after which the scores and token amounts of the
+        last run are put back on the projects.
+
+        Returns {'designs', 'scores' and 'token_amounts' (designs x projects), 'metrics'},
+        with the ranking_metrics of every design.
+        """
+        assert self.projectid2score is not None, "The simulation has not been run yet"
+        if isinstance(funding_designs, dict):
+            funding_designs = type(self.funding_design).from_grid(funding_designs)
+        projects = self.projects.get_projects()
+        scores = np.zeros((len(funding_designs), len(projects)))
+        token_amounts = np.zeros((len(funding_designs), len(projects)))
+
+        is_grouped = np.array([isinstance(design, ThresholdAndAggregate) for design in funding_designs], dtype=bool)
+        grouped = [design for design in funding_designs if isinstance(design, ThresholdAndAggregate)]
+        scores[is_grouped] = ThresholdAndAggregate.score_many(grouped, projects)
+        for dd in np.flatnonzero(is_grouped):
+            token_amounts[dd] = funding_designs[dd].token_amounts(scores[dd])
+
+        last_run = [(project.score, project.token_amount) for project in projects]
+        for dd in np.flatnonzero(~is_grouped):
+            projectid2score = funding_designs[dd].allocate_funds(projects)
+            scores[dd] = [projectid2score.get(project.project_id, np.nan) for project in projects]
+            token_amounts[dd] = [project.token_amount for project in projects]
+        for project, (score, token_amount) in zip(projects, last_run):
+            project.score, project.token_amount = score, token_amount
+
+        return {
+            'designs': funding_designs,
+            'scores': scores,
+            'token_amounts': token_amounts,
+            'metrics': ranking_metrics(self.projects.true_impact, scores, k=k),
+        }
+
+    def run_batch(self, n_rounds=None, seeds=None, cast_votes_kwargs=None):
+        """
+        Runs many independently seeded rounds as one batched array computation.
+
+        Round i draws exactly what RoundSimulation(..., random_seed=seeds[i]).run() would,
+        with the same cast_votes_kwargs, rng_streams and communication phase, but the votes
+        are held as arrays shaped (rounds x badgeholders x projects) for quorum voting, or
+        (rounds x badgeholders x pairs) for pairwise voting, instead of Vote objects, and
+        are not recorded in the ledger.  Every round seeds the population's streams and
+        runs its communication phase, as run does, so the badgeholders are left with the
+        streams and communicated ratings of the last round.
+
+        The draws of a round must follow the streams of run, so they are made round by
+        round; with vectorized=True each round is a few whole-population draws, and the
+        rest is done for all rounds at once (see the cast_votes_batch of the population).
+        The funding design must be a BatchFundingDesign.
+
+        n_rounds - the number of rounds to run, seeded random_seed, random_seed+1, ...
+                   if seeds is not provided
+        seeds - the random seed of each round
+
+        Returns {'seeds', 'votes', 'scores' and 'token_amounts' (rounds x projects),
+        'metrics'}, with the ranking_metrics of every round.
+        """
+        if not isinstance(self.funding_design, BatchFundingDesign):
+            raise TypeError(f"{type(self.funding_design).__name__} does not support batched rounds")
+        if cast_votes_kwargs is None:
+            cast_votes_kwargs = {}
+        if seeds is None:
+            assert n_rounds is not None, "Either n_rounds or seeds must be provided"
+            seeds = [self.random_seed + ii for ii in range(n_rounds)]
+        elif n_rounds is not None:
+            assert len(seeds) == n_rounds, "Number of seeds must match n_rounds"
+
+        self.badgeholder_population.send_application_information(self.projects)
+        votes = self.badgeholder_population.cast_votes_batch(self.projects, self._rounds(seeds), **cast_votes_kwargs)
+        scores, token_amounts = self.funding_design.allocate_funds_batch(votes)
+        return {
+            'seeds': np.asarray(seeds),
+            'votes': votes,
+            'scores': scores,
+            'token_amounts': token_amounts,
+            'metrics': ranking_metrics(self.projects.true_impact, scores),
+        }
+
+    def _rounds(self, seeds):
+        """
+        Sets up every round of run_batch in turn, as run would on a simulation seeded with
+        its seed: the population's random streams, then the communication phase
+        """
+        for seed in seeds:
+            seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+            self._set_random_streams(rng=np.random.default_rng(seed), seed_sequence=seed_sequence)
+            self.badgeholder_population.communicate()
+            yield seed
+
+    def reset(self):
+        """
+        Clears the votes and scores of the last run, and the state of its pair view, so that
+        the same simulation can be run again.  The vote ledger keeps its buffers, so clearing
+        it is a length reset.
+        """
+        self.projects.reset_projects()
+        self.badgeholder_population.reset_all()
+        self._reset_view()
+        self.projectid2score = None
+
+    def project_records(self):
+        """
+        One record per project for the last run, as a dictionary of columns: the score,
+        token_amount and number of votes of each project, and its rank (0 = first) by score
+        and by true impact
+        """
+        assert self.projectid2score is not None, "The simulation has not been run yet"
+        projects = self.projects.get_projects()
+        scores = np.array([self.projectid2score.get(project.project_id, np.nan) for project in projects], dtype=float)
+        rank = np.empty(len(projects), dtype=np.int64)
+        rank[np.argsort(-scores, kind='stable')] = np.arange(len(projects))
+        true_rank = np.empty(len(projects), dtype=np.int64)
+        true_rank[np.argsort(-self.projects.true_impact, kind='stable')] = np.arange(len(projects))
+        return {
+            'project_id': self.projects.project_ids,
+            'score': scores,
+            'token_amount': np.array([project.token_amount for project in projects], dtype=float),
+            'num_votes': np.array([project.num_votes for project in projects], dtype=np.int64),
+            'rank': rank,
+            'true_rank': true_rank,
+        }
+
+    def write_results(self, results_store, partition=None, **columns):
+        """
+        Appends the project_records of the last run to a ResultsStore.  Extra scalar columns
+        (e.g. run=3) are added to every record.
+        """
+        results_store.append(partition, **self.project_records(), **columns)
+
+    def get_results(self, k=10):
+        """
+        The scores of the last run, and metrics of how well they rank the projects by true
+        impact and how concentrated the allocations are (see metrics.ranking_metrics)
+        """
+        assert self.projectid2score is not None, "The simulation has not been run yet"
+        projects = self.projects.get_projects()
+        scores = np.array([self.projectid2score.get(project.project_id, np.nan) for project in projects], dtype=float)
+        allocations = np.array([project.token_amount for project in projects], dtype=float)
+        results = {'projectid2score': self.projectid2score}
+        if self.profiler is None:
+            results.update(ranking_metrics(self.projects.true_impact, scores, allocations=allocations, k=k))
+        else:
+            with self.profiler.phase('metrics'):
+                results.update(ranking_metrics(self.projects.true_impact, scores, allocations=allocations, k=k))
+        return results
 
-    def get_results(self):
-        pass
+class RoundArena:
+    """
+    Runs the same RoundSimulation many times (e.g. for Monte Carlo) without rebuilding it.
+
+    The score and allocation buffers are allocated once, for n_runs runs of the simulation's
+    projects, and run i writes row i of them.  Between runs the simulation is reset in place:
+    the vote ledger only has its length reset, and keeps the memory it grew to, so after the
+    first run a round creates almost no new objects.
+    """
+    def __init__(self, simulation, n_runs):
+        self.simulation = simulation
+        self.n_runs = n_runs
+        self.num_runs = 0
+
+        num_projects = simulation.projects.num_projects
+        self.project_ids = simulation.projects.project_ids
+        self.scores = np.full((n_runs, num_projects), np.nan)
+        self.allocations = np.zeros((n_runs, num_projects))
+
+    def reset(self):
+        """
+        Forgets the stored runs, keeping the buffers
+        """
+        self.num_runs = 0
+
+    def run(self, random_seed=None, cast_votes_kwargs=None):
+        """
+        Runs the simulation once more and stores its scores and allocations.  If random_seed
+        is given the run draws what RoundSimulation(..., random_seed=random_seed).run() would,
+        otherwise it continues the simulation's random stream.
+        """
+        assert self.num_runs < self.n_runs, "All runs of the arena have been used"
+        simulation = self.simulation
+        if self.num_runs > 0 or simulation.projectid2score is not None:
+            simulation.reset()
+        if random_seed is not None:
+            simulation.seed(random_seed)
+        simulation.run(cast_votes_kwargs=cast_votes_kwargs)
+
+        ix = self.num_runs
+        projectid2score = simulation.projectid2score
+        for jj, project in enumerate(simulation.projects.get_projects()):
+            score = projectid2score.get(project.project_id)
+            self.scores[ix, jj] = np.nan if score is None else score
+            self.allocations[ix, jj] = project.token_amount
+        self.num_runs += 1
+        return ix
+
+    def run_all(self, seeds=None, cast_votes_kwargs=None):
+        """
+        Runs the simulation until every run of the arena is used, seeded with seeds if given.
+
+        Returns the (runs x projects) scores and allocations.
+        """
+        while self.num_runs < self.n_runs:
+            self.run(None if seeds is None else seeds[self.num_runs], cast_votes_kwargs=cast_votes_kwargs)
+        return self.scores, self.allocations
 
@@ -0,0 +1,304 @@
+import itertools
+import os
+import pickle
+
+import numpy as np
+
+def expand_grid(grid):
+    """
+    grid - a dictionary of parameter name -> list of values to sweep
+
+    Returns the list of configurations (dictionaries) in the cartesian product of the grid,
+    in the order itertools.product would give them.
+    """
+    names = list(grid.keys())
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[name] for name in names])]
+
+def default_evaluate(simulation):
+    return {'projectid2score': simulation.projectid2score}
+
+def project_records(simulation):
+    """
+    An evaluate function for sweeps with a results_store: one record per project
+    """
+    return simulation.project_records()
+
+class _FixedSchedule:
+    """
+    Hands out every task of a sweep, in order
+    """
+    def __init__(self, tasks):
+        self._tasks = iter(tasks)
+
+    def next_task(self):
+        return next(self._tasks, None)
+
+    def record(self, result):
+        pass
+
+class _AdaptiveSchedule:
+    """
+    Hands out the runs of every configuration one batch at a time, and stops giving out the
+    runs of a configuration once stopping is satisfied on the runs so far.  The statistics
+    of a configuration are updated a whole batch at a time, in the order of the runs, so
+    the decisions do not depend on the order in which the runs finish.
+    """
+    def __init__(self, sweep, done):
+        self.sweep = sweep
+        self.stopping = sweep.stopping
+        num_configs = len(sweep.configs)
+        self.stats = [self.stopping.new_stats() for _ in range(num_configs)]
+        # the runs of each config released so far (including those already done), the end
+        # of its current batch, its recorded metrics by run, and whether it has stopped
+        self.released = [0] * num_configs
+        self.batch_end = [min(self.stopping.batch_size, sweep.n_runs)] * num_configs
+        self.values = [{} for _ in range(num_configs)]
+        self.stopped = [sweep.n_runs == 0] * num_configs
+        self.done = done
+        self._first_active = 0
+
+    def next_task(self):
+        n_runs = self.sweep.n_runs
+        for config_ix in range(self._first_active, len(self.stopped)):
+            while not self.stopped[config_ix] and self.released[config_ix] < self.batch_end[config_ix]:
+                run_ix = self.released[config_ix]
+                self.released[config_ix] += 1
+                task_id = config_ix * n_runs + run_ix
+                if task_id not in self.done:
+                    return task_id, self.sweep.configs[config_ix], run_ix, self.sweep.seed(config_ix, run_ix)
+            if self.stopped[config_ix] and config_ix == self._first_active:
+                self._first_active += 1
+        return None
+
+    def record(self, result):
+        config_ix, run_ix = divmod(result['task_id'], self.sweep.n_runs)
+        self.values[config_ix][run_ix] = self.stopping.values(result)
+        self._advance(config_ix)
+
+    def _advance(self, config_ix):
+        values, stats = self.values[config_ix], self.stats[config_ix]
+        batch_size, n_runs = self.stopping.batch_size, self.sweep.n_runs
+        while not self.stopped[config_ix]:
+            end = self.batch_end[config_ix]
+            start = (end - 1) // batch_size * batch_size
+            if any(run_ix not in values for run_ix in range(start, end)):
+                return
+            stats.update_batch([values[run_ix] for run_ix in range(start, end)])
+            if end >= n_runs or self.stopping.converged(stats):
+                self.stopped[config_ix] = True
+            else:
+                self.batch_end[config_ix] = min(end + batch_size, n_runs)
+
+    def summaries(self):
+        summaries = []
+        for config, stats in zip(self.sweep.configs, self.stats):
+            summary = self.stopping.summary(stats)
+            summary['config'] = config
+            summaries.append(summary)
+        return summaries
+
+def _run_task(simulation_factory, evaluate, run_kwargs, task_id, config, run_ix, seed):
+    simulation = simulation_factory(config, seed)
+    simulation.run(**run_kwargs)
+    result = {'task_id': task_id, 'config': config, 'run': run_ix}
+    result.update(evaluate(simulation))
+    return result
+
+class ParameterSweep:
+    """
+    Runs a RoundSimulation for every configuration of a parameter grid, n_runs times each,
+    over a pool of worker processes.
+
+    simulation_factory(config, seed) must build the RoundSimulation for one run.  seed is a
+    np.random.SeedSequence which can be passed straight to RoundSimulation(random_seed=...)
+    (or used with np.random.default_rng / seed.spawn for anything else that is random).
+    The seed of run run_ix of configuration config_ix is SeedSequence(entropy, spawn_key=
+    (config_ix, run_ix)), so each run gets an independent stream and the results do not
+    depend on the number of workers, on the order in which runs finish, or on n_runs.
+
+    evaluate(simulation) turns a finished simulation into a dictionary of results.  Both
+    functions must be picklable (defined at module level) when n_jobs > 1.
+
+    If checkpoint_path is given, every finished run is appended to it, and runs found
+    there are not repeated, so an interrupted sweep can be resumed by running it again.
+
+    If results_store (a ResultsStore) is given instead, the array columns returned by
+    evaluate (e.g. by project_records) are streamed into it, partitioned by config, along
+    with the task_id and run of every record.  Only the small remaining part of each result
+    is kept in memory.  Runs already written to the store are not repeated.
+
+    If stopping (a monte_carlo.AdaptiveStopping) is given, n_runs is the budget of runs of
+    each configuration rather than their number: the runs of a configuration are made in
+    batches, and stop once the confidence intervals of the metrics of stopping are narrow
+    enough.  evaluate must then return those metrics (monte_carlo.run_metrics is used by
+    default), and summaries() gives their mean and interval for every configuration.
+    """
+    def __init__(
+            self,
+            grid,
+            simulation_factory,
+            n_runs=1,
+            entropy=1234,
+            evaluate=default_evaluate,
+            run_kwargs=None,
+            n_jobs=-1,
+            checkpoint_path=None,
+            results_store=None,
+            stopping=None,
+        ):
+        assert checkpoint_path is None or results_store is None, "A sweep with a results_store resumes from the store"
+        # the metrics of runs already in a results_store are not kept, so they could not
+        # count towards the stopping rule when resuming
+        assert stopping is None or results_store is None, "An adaptive sweep keeps its results in memory or a checkpoint"
+        self.grid = grid
+        self.configs = expand_grid(grid)
+        self.simulation_factory = simulation_factory
+        self.n_runs = n_runs
+        self.entropy = entropy
+        self.evaluate = evaluate
+        self.run_kwargs = {} if run_kwargs is None else run_kwargs
+        self.n_jobs = os.cpu_count() if n_jobs == -1 else n_jobs
+        self.checkpoint_path = checkpoint_path
+        self.results_store = results_store
+        self.stopping = stopping
+        if stopping is not None and evaluate is default_evaluate:
+            from voting_mechanism_design.monte_carlo import run_metrics
+            self.evaluate = run_metrics
+        self._schedule = None
+
+    @property
+    def num_tasks(self):
+        return len(self.configs) * self.n_runs
+
+    def tasks(self):
+        """
+        Yields (task_id, config, run_ix, seed) for every run of the sweep
+        """
+        for config_ix, config in enumerate(self.configs):
+            for run_ix in range(self.n_runs):
+                task_id = config_ix * self.n_runs + run_ix
+                yield task_id, config, run_ix, self.seed(config_ix, run_ix)
+
+    def seed(self, config_ix, run_ix):
+        """
+        The SeedSequence of run run_ix of configuration config_ix
+        """
+        return np.random.SeedSequence(self.entropy, spawn_key=(config_ix, run_ix))
+
+    def load_checkpoint(self):
+        """
+        The results stored in the checkpoint file.  A record cut short by an interruption
+        is ignored (and its run repeated).
+        """
+        results = []
+        if self.checkpoint_path is None or not os.path.exists(self.checkpoint_path):
+            return results
+        with open(self.checkpoint_path, 'rb') as f:
+            while True:
+                try:
+                    results.append(pickle.load(f))
+                except (EOFError, pickle.UnpicklingError):
+                    break
+        return results
+
+    def _save(self, f, result):
+        if self.results_store is not None:
+            columns = {name: value for name, value in result.items() if isinstance(value, np.ndarray) and value.ndim > 0}
+            for name in columns:
+                del result[name]
+            self.results_store.append(result['config'], task_id=result['task_id'], run=result['run'], **columns)
+        if f is not None:
+            pickle.dump(result, f)
+            f.flush()
+
+    def iter_results(self):
+        """
+        Yields the result of every run as soon as it finishes, starting with the ones
+        already in the checkpoint
+        """
+        done = set()
+        checkpointed = self.load_checkpoint()
+        for result in checkpointed:
+            done.add(result['task_id'])
+            yield result
+        if self.results_store is not None:
+            for _, chunk in self.results_store.iter_chunks(columns=['task_id']):
+                done.update(np.unique(chunk['task_id']).tolist())
+        if self.stopping is None:
+            schedule = _FixedSchedule(task for task in self.tasks() if task[0] not in done)
+        else:
+            schedule = _AdaptiveSchedule(self, done)
+            for result in checkpointed:
+                schedule.record(result)
+        self._schedule = schedule
+
+        f = None
+        if self.checkpoint_path is not None:
+            if os.path.exists(self.checkpoint_path):
+                # rewrite the complete records only, dropping a truncated last one
+                self._rewrite_checkpoint()
+            f = open(self.checkpoint_path, 'ab')
+        try:
+            if self.n_jobs is None or self.n_jobs <= 1:
+                task = schedule.next_task()
+                while task is not None:
+                    result = _run_task(self.simulation_factory, self.evaluate, self.run_kwargs, *task)
+                    schedule.record(result)
+                    self._save(f, result)
+                    yield result
+                    task = schedule.next_task()
+                return
+
+            # imported here, since it pulls in multiprocessing, which serial sweeps and
+            # code that only imports _run_task do not need
+            from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+            with ProcessPoolExecutor(max_workers=self.n_jobs) as executor:
+                # keep a bounded number of runs in flight, so that huge sweeps do not
+                # create all of their futures up front.  An adaptive schedule may have
+                # nothing to hand out until the runs of a batch come back.
+                max_in_flight = 4 * self.n_jobs
+                in_flight = set()
+                while True:
+                    while len(in_flight) < max_in_flight:
+                        task = schedule.next_task()
+                        if task is None:
+                            break
+                        in_flight.add(executor.submit(
+                            _run_task, self.simulation_factory, self.evaluate, self.run_kwargs, *task
+                        ))
+                    if not in_flight:
+                        break
+                    finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        result = future.result()
+                        schedule.record(result)
+                        self._save(f, result)
+                        yield result
+        finally:
+            if f is not None:
+                f.close()
+            if self.results_store is not None:
+                self.results_store.flush()
+
+    def _rewrite_checkpoint(self):
+        results = self.load_checkpoint()
+        with open(self.checkpoint_path, 'wb') as f:
+            for result in results:
+                pickle.dump(result, f)
+
+    def summaries(self):
+        """
+        For an adaptive sweep, the summary of the stopping rule for every configuration
+        (see AdaptiveStopping.summary), with the config itself, after iter_results or run
+        """
+        assert self.stopping is not None, "Only an adaptive sweep (with stopping) has summaries"
+        assert self._schedule is not None, "The sweep has not been run yet"
+        return self._schedule.summaries()
+
+    def run(self):
+        """
+        Runs (or finishes) the sweep and returns the results ordered by task_id.  With a
+        results_store, runs that were already in the store are not returned again; their
+        records are read from the store.
+        """
+        return sorted(self.iter_results(), key=lambda result: result['task_id'])
\ No newline at end of file
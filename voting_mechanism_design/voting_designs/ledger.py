@@ -0,0 +1,226 @@
+import numpy as np
+
+from .quorum import QuorumVote
+from .ranking import PairwiseRankingVote
+
+class VoteLedger:
+    """
+    Columnar storage for all of the votes cast in a round.
+
+    Each vote is one row of typed NumPy columns instead of a Vote object:
+      voter_id    - the badgeholder_id of the voter (-1 if unknown)
+      project_id  - the project voted on, or project1 for a pairwise vote
+      project2_id - project2 for a pairwise vote, -1 for a quorum vote
+      amount      - the amount of a quorum vote, NaN if the voter abstained (amount=None)
+      val1, val2  - the values given to project1 and project2 in a pairwise vote
+    Badgeholder and project IDs are assumed to be non-negative integers.
+
+    The columns grow in chunks of chunk_size rows.  QuorumVote / PairwiseRankingVote
+    objects are only built on demand, by get_votes, for code that still works with them.
+    """
+    def __init__(self, chunk_size=4096):
+        self.chunk_size = chunk_size
+        self.num_votes = 0
+        self.capacity = 0
+
+        self._voter_id = np.zeros(0, dtype=np.int64)
+        self._project_id = np.zeros(0, dtype=np.int64)
+        self._project2_id = np.zeros(0, dtype=np.int64)
+        self._amount = np.zeros(0, dtype=np.float64)
+        self._val1 = np.zeros(0, dtype=np.int8)
+        self._val2 = np.zeros(0, dtype=np.int8)
+
+        # objects needed to build the Vote views.  A population whose projects are only
+        # built when used (see ProjectPopulation.from_impact) sets project_source, which
+        # returns the project of an ID that has not been registered yet.
+        self.voters = {}
+        self.projects = {}
+        self.project_source = None
+
+        # lazily built index of the rows which belong to each project
+        self._project_index = None
+
+    @property
+    def voter_id(self):
+        return self._voter_id[:self.num_votes]
+
+    @property
+    def project_id(self):
+        return self._project_id[:self.num_votes]
+
+    @property
+    def project2_id(self):
+        return self._project2_id[:self.num_votes]
+
+    @property
+    def amount(self):
+        return self._amount[:self.num_votes]
+
+    @property
+    def val1(self):
+        return self._val1[:self.num_votes]
+
+    @property
+    def val2(self):
+        return self._val2[:self.num_votes]
+
+    def register_voter(self, voter):
+        self.voters[voter.badgeholder_id] = voter
+
+    def register_project(self, project):
+        self.projects[project.project_id] = project
+
+    def clear(self):
+        # the columns are kept allocated so that they can be reused by the next round
+        self.num_votes = 0
+        self._project_index = None
+
+    def _reserve(self, num_new_votes):
+        needed = self.num_votes + num_new_votes
+        if needed <= self.capacity:
+            return
+        num_chunks = -(-max(needed, 2 * self.capacity) // self.chunk_size)
+        self.capacity = num_chunks * self.chunk_size
+        for name in ('_voter_id', '_project_id', '_project2_id', '_amount', '_val1', '_val2'):
+            old = getattr(self, name)
+            new = np.empty(self.capacity, dtype=old.dtype)
+            new[:self.num_votes] = old[:self.num_votes]
+            setattr(self, name, new)
+
+    def add_votes(self, voter_id, project_id, project2_id=-1, amount=np.nan, val1=0, val2=0):
+        """
+        Appends a block of votes.  Scalar arguments are broadcast to the length of project_id.
+        """
+        project_id = np.atleast_1d(project_id)
+        n = len(project_id)
+        self._reserve(n)
+        rows = slice(self.num_votes, self.num_votes + n)
+        self._voter_id[rows] = voter_id
+        self._project_id[rows] = project_id
+        self._project2_id[rows] = project2_id
+        self._amount[rows] = amount
+        self._val1[rows] = val1
+        self._val2[rows] = val2
+        self.num_votes += n
+        self._project_index = None
+
+    def add_quorum_vote(self, voter_id, project_id, amount):
+        self.add_votes(voter_id, project_id, amount=np.nan if amount is None else amount)
+
+    def add_pairwise_vote(self, voter_id, project1_id, project2_id, val1, val2):
+        self.add_votes(voter_id, project1_id, project2_id=project2_id, val1=val1, val2=val2)
+
+    def add_vote(self, vote):
+        """
+        Records a QuorumVote or PairwiseRankingVote object
+        """
+        voter_id = -1 if vote.voter is None else vote.voter.badgeholder_id
+        if vote.voter is not None:
+            self.register_voter(vote.voter)
+        if isinstance(vote, PairwiseRankingVote):
+            self.register_project(vote.project1)
+            self.register_project(vote.project2)
+            self.add_pairwise_vote(voter_id, vote.project1.project_id, vote.project2.project_id, vote.val1, vote.val2)
+        else:
+            self.register_project(vote.project)
+            self.add_quorum_vote(voter_id, vote.project.project_id, vote.amount)
+
+    def _get_project_index(self):
+        if self._project_index is None:
+            # a pairwise vote belongs to both of its projects
+            rows = np.arange(self.num_votes)
+            is_pairwise = self.project2_id >= 0
+            project_ids = np.concatenate([self.project_id, self.project2_id[is_pairwise]])
+            rows = np.concatenate([rows, rows[is_pairwise]])
+            order = np.lexsort((rows, project_ids))
+            unique_ids, starts, counts = np.unique(project_ids[order], return_index=True, return_counts=True)
+            self._project_index = (unique_ids, starts, counts, rows[order])
+        return self._project_index
+
+    def project_rows(self, project_id):
+        """
+        The rows of the votes on project_id, in the order they were cast
+        """
+        unique_ids, starts, counts, rows = self._get_project_index()
+        ix = np.searchsorted(unique_ids, project_id)
+        if ix == len(unique_ids) or unique_ids[ix] != project_id:
+            return rows[:0]
+        return rows[starts[ix]:starts[ix] + counts[ix]]
+
+    def voter_rows(self, voter_ids):
+        """
+        The rows of the votes cast by voter_ids, grouped by voter in the order given
+        and then in the order they were cast
+        """
+        voter_ids = np.atleast_1d(np.asarray(voter_ids, dtype=np.int64))
+        if len(voter_ids) == 0 or self.num_votes == 0:
+            return np.zeros(0, dtype=np.int64)
+        sorter = np.argsort(voter_ids, kind='stable')
+        pos = np.searchsorted(voter_ids, self.voter_id, sorter=sorter)
+        pos = np.minimum(pos, len(voter_ids) - 1)
+        rank = sorter[pos]
+        rows = np.flatnonzero(voter_ids[rank] == self.voter_id)
+        return rows[np.argsort(rank[rows], kind='stable')]
+
+    def num_project_votes(self, project_id):
+        return len(self.project_rows(project_id))
+
+    def project_amounts(self, project_id):
+        """
+        The amounts of the non-abstaining votes on project_id, in the order they were cast
+        """
+        amounts = self.amount[self.project_rows(project_id)]
+        return amounts[~np.isnan(amounts)]
+
+    def discard_project(self, project_id):
+        """
+        Removes every vote on project_id from the ledger
+        """
+        if self.num_votes == 0:
+            return
+        self._compact((self.project_id != project_id) & (self.project2_id != project_id))
+
+    def remove_votes(self, rows):
+        """
+        Removes the votes in rows (e.g. the voter_rows of a badgeholder) from the ledger.
+        The other votes keep their order, but move up to fill the gaps.
+        """
+        keep = np.ones(self.num_votes, dtype=bool)
+        keep[rows] = False
+        self._compact(keep)
+
+    def _compact(self, keep):
+        n = int(keep.sum())
+        for name in ('_voter_id', '_project_id', '_project2_id', '_amount', '_val1', '_val2'):
+            column = getattr(self, name)
+            column[:n] = column[:self.num_votes][keep]
+        self.num_votes = n
+        self._project_index = None
+
+    def get_votes(self, rows=None):
+        """
+        Builds QuorumVote / PairwiseRankingVote views of the given rows (all rows by default)
+        """
+        if rows is None:
+            rows = range(self.num_votes)
+        votes = []
+        for row in rows:
+            voter = self.voters.get(self._voter_id[row])
+            if self._project2_id[row] >= 0:
+                votes.append(PairwiseRankingVote(
+                    voter,
+                    self._project(self._project_id[row]),
+                    self._project(self._project2_id[row]),
+                    int(self._val1[row]),
+                    int(self._val2[row])
+                ))
+            else:
+                amount = self._amount[row]
+                votes.append(QuorumVote(voter, self._project(self._project_id[row]), None if np.isnan(amount) else amount))
+        return votes
+
+    def _project(self, project_id):
+        project = self.projects.get(project_id)
+        if project is None and self.project_source is not None:
+            project = self.project_source(project_id)
+        return project
\ No newline at end of file
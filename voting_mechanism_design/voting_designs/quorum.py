@@ -1,6 +1,8 @@
 from .vote import Vote
 
 class QuorumVote(Vote):
+    __slots__ = ('amount',)
+
     def __init__(self, voter, project, amount):
         self.voter = voter
         self.project = project
@@ -2,6 +2,8 @@ from .vote import Vote
 
 # TODO: define a class which describes what a vote looks like in  a pairwise ranking system
 class PairwiseRankingVote(Vote):
+    __slots__ = ('project1', 'project2', 'val1', 'val2')
+
     def __init__(self, voter, project1, project2, val1, val2):
         self.voter = voter
         self.project1 = project1
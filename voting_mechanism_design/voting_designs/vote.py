@@ -3,7 +3,9 @@ from abc import ABC, abstractmethod
 class Vote(ABC):
     # there could be additional items, like the amount, for example
     # but we leave this general so it can accomodate different kinds of voting
-    # designs
+    # designs.  Votes are slotted, since many of them can be built from a ledger.
+    __slots__ = ('voter', 'project')
+
     def __init__(self, voter, project):
         self.voter = voter
         self.project = project
\ No newline at end of file